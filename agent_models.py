@@ -1,18 +1,40 @@
+import sys
 from dataclasses import dataclass
-from typing import List, Dict
+from typing import Dict, Sequence
 
+# Shared empty sequences. Most plans have no pre/postconditions or fallback,
+# so they all point at these instead of allocating their own empty lists.
+NO_CONDITIONS: tuple = ()
+NO_STEPS: tuple = ()
 
-@dataclass
+
+def intern_text(text):
+    """sys.intern for strings; anything else (None, LLM junk) passes through."""
+    return sys.intern(text) if type(text) is str else text
+
+
+# slots: hundreds of thousands of these are alive at once, a __dict__ each adds up
+@dataclass(slots=True)
 class ActionStep:
     tool: str
     input_schema: Dict[str, any]
     success_condition: str
 
+    def __post_init__(self):
+        # The same few tool names and conditions repeat across every plan
+        self.tool = intern_text(self.tool)
+        self.success_condition = intern_text(self.success_condition)
+
 
-@dataclass
+@dataclass(slots=True)
 class ActionPlan:
+    """
+    Sequences passed in are kept as given (an empty list stays that list).
+    Omitted postconditions / fallback default to the shared empty tuples;
+    adapters pass NO_CONDITIONS / NO_STEPS explicitly for the rest.
+    """
     goal: str
-    preconditions: List[str]
-    actions: List[ActionStep]
-    postconditions: List[str]
-    fallback: List[ActionStep]
+    preconditions: Sequence[str]
+    actions: Sequence[ActionStep]
+    postconditions: Sequence[str] = NO_CONDITIONS
+    fallback: Sequence[ActionStep] = NO_STEPS
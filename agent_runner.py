@@ -1,52 +1,209 @@
 """Main agent loop that coordinates LLM, ASK, execution, and observation."""
-from openai import OpenAI
-from ask_bridge import llm_to_action_plan
-from execution_engine import execute_plan
+import asyncio
+import time
+
+from ask_bridge import REPAIR_STATS, PlanStreamParser, llm_to_action_plan
+from execution_engine import execute_plan, execute_plan_async
 from agent_models import ActionStep
+from law_engine import LawViolation
+from law_enforcer import dry_run_step
+from llm_backends import default_async_backend, default_backend
+from llm_cache import LLMCache, make_prompt_key
+from prompt_builder import PromptBuilder
+from tracing import log, observe, register_gauge, span
+
+MODEL = "gpt-4.1-mini"
+
+# Bump these whenever the matching prompt text changes, so cached answers to
+# the old wording are never served for the new one.
+PLAN_PROMPT_VERSION = "plan-v2"
+REPAIR_PROMPT_VERSION = "repair-v2"
+
+# Identical prompt → identical proposal, without a model round trip
+LLM_CACHE = LLMCache(max_entries=4096, ttl=15 * 60)
+register_gauge(
+    "ask_llm_cache_hit_rate", "Share of LLM proposals and repairs served from cache.",
+    lambda: LLM_CACHE.stats()["hit_rate"]
+)
+# Malformed outputs fixed locally are repair round trips the model never saw
+register_gauge(
+    "ask_local_json_repairs", "LLM outputs fixed by local JSON repair instead of a repair prompt.",
+    lambda: sum(n for fix, n in REPAIR_STATS.items() if fix != "failed")
+)
+
+
+def remember(cache, key: str, text: str):
+    """
+    Cache model output only once it parses into a plan, so a malformed
+    proposal or repair is never replayed to other tickets (or to the next
+    repair attempt with the same error).
+    """
+    if cache is None:
+        return
+    try:
+        llm_to_action_plan(text, stats=None)
+    except Exception:  # pylint: disable=broad-except
+        return
+    cache.put(key, text)
+
+
+def build_plan_prompt(goal: str, runtime_context: dict, builder: PromptBuilder = None) -> str:
+    """Prompt asking the LLM for a plan given the goal + current world state."""
+    return (builder or PromptBuilder()).build(goal, runtime_context)
+
+
+def build_repair_prompt(error: Exception, runtime_context: dict, builder: PromptBuilder = None) -> str:
+    """Prompt asking the LLM to fix output that could not be parsed."""
+    return (builder or PromptBuilder()).build_repair(error, runtime_context)
 
-client = OpenAI()
 
-def call_llm(goal: str, runtime_context: dict) -> str:
+def call_llm(goal: str, runtime_context: dict, llm_client=None, cache=LLM_CACHE, builder=None) -> str:
     """
     Ask the real LLM for a plan given the goal + current world state.
     Returns raw text (JSON-ish) from the model.
     """
 
-    prompt = f"""
-    You are an autonomous agent operating inside an ASK (Assured Safe Kernel) system.
+    prompt = build_plan_prompt(goal, runtime_context, builder)
+    key = make_prompt_key(MODEL, PLAN_PROMPT_VERSION, prompt)
+    cached = cache.get(key) if cache is not None else None
+    if cached is not None:
+        return cached
 
-    GOAL:
-    {goal}
+    with span("llm_call", model=MODEL):
+        response = (llm_client or default_backend()).responses.create(
+            model=MODEL,
+            input=prompt
+        )
+
+    remember(cache, key, response.output_text)
+    return response.output_text
 
-    CURRENT WORLD STATE:
-    {runtime_context}
 
-    YOU MUST OUTPUT ONLY JSON IN THIS EXACT FORMAT:
+def check_streamed_steps(parser: PlanStreamParser, chunk: str, simulated: dict, runtime_context: dict, started: float) -> dict:
+    """Feed one delta to the parser and dry-run every step it completes."""
+    for step in parser.feed(chunk):
+        if len(parser.steps) == 1:
+            observe("llm_first_step", time.perf_counter() - started, model=MODEL)
+        simulated = dry_run_step(step, simulated, runtime_context)
+    return simulated
 
-    {{
-      "plan": [
-        {{
-          "action": "<one action name>",
-          "order_id": 123,
-          "... any other useful parameters ..."
-        }}
-      ]
-    }}
 
-    RULES:
-    1) ALWAYS use top-level key "plan"
-    2) "plan" MUST be a list
-    3) Every step MUST include "action"
-    4) Include "order_id" whenever relevant
-    5) Do NOT add explanations, markdown, or code blocks — ONLY raw JSON
+def call_llm_stream(goal: str, runtime_context: dict, llm_client=None, cache=LLM_CACHE, builder=None) -> str:
+    """
+    Streaming call_llm: each plan step is legality-checked as soon as the
+    model has finished writing it. The first illegal step cancels the stream
+    and raises its LawViolation, so a blocked plan stops costing tokens there.
     """
 
+    prompt = build_plan_prompt(goal, runtime_context, builder)
+    key = make_prompt_key(MODEL, PLAN_PROMPT_VERSION, prompt)
+    cached = cache.get(key) if cache is not None else None
+    if cached is not None:
+        return cached
+
+    parser = PlanStreamParser()
+    simulated = runtime_context
+    with span("llm_call", model=MODEL, stream=True):
+        started = time.perf_counter()
+        stream = (llm_client or default_backend()).responses.create(
+            model=MODEL,
+            input=prompt,
+            stream=True
+        )
+        try:
+            for event in stream:
+                if event.type == "response.output_text.delta":
+                    simulated = check_streamed_steps(parser, event.delta, simulated, runtime_context, started)
+        finally:
+            stream.close()
+
+    remember(cache, key, parser.text)
+    return parser.text
+
+
+def call_repair_llm(error: Exception, runtime_context: dict, llm_client=None, cache=LLM_CACHE, builder=None) -> str:
+    """Ask the LLM to repair output that failed to parse."""
+
+    prompt = build_repair_prompt(error, runtime_context, builder)
+    key = make_prompt_key(MODEL, REPAIR_PROMPT_VERSION, prompt)
+    cached = cache.get(key) if cache is not None else None
+    if cached is not None:
+        return cached
+
+    with span("repair", model=MODEL):
+        response = (llm_client or default_backend()).responses.create(
+            model=MODEL,
+            input=prompt
+        )
 
-    response = client.responses.create(
-        model="gpt-4.1-mini",
-        input=prompt
-    )
+    remember(cache, key, response.output_text)
+    return response.output_text
+
+
+async def call_llm_async(goal: str, runtime_context: dict, llm_client=None, cache=LLM_CACHE, builder=None) -> str:
+    """Async version of call_llm: awaits the model instead of blocking the worker."""
+
+    prompt = build_plan_prompt(goal, runtime_context, builder)
+    key = make_prompt_key(MODEL, PLAN_PROMPT_VERSION, prompt)
+    cached = cache.get(key) if cache is not None else None
+    if cached is not None:
+        return cached
+
+    with span("llm_call", model=MODEL):
+        response = await (llm_client or default_async_backend()).responses.create(
+            model=MODEL,
+            input=prompt
+        )
+
+    remember(cache, key, response.output_text)
+    return response.output_text
+
+
+async def call_llm_stream_async(goal: str, runtime_context: dict, llm_client=None, cache=LLM_CACHE, builder=None) -> str:
+    """Async version of call_llm_stream."""
+
+    prompt = build_plan_prompt(goal, runtime_context, builder)
+    key = make_prompt_key(MODEL, PLAN_PROMPT_VERSION, prompt)
+    cached = cache.get(key) if cache is not None else None
+    if cached is not None:
+        return cached
+
+    parser = PlanStreamParser()
+    simulated = runtime_context
+    with span("llm_call", model=MODEL, stream=True):
+        started = time.perf_counter()
+        stream = await (llm_client or default_async_backend()).responses.create(
+            model=MODEL,
+            input=prompt,
+            stream=True
+        )
+        try:
+            async for event in stream:
+                if event.type == "response.output_text.delta":
+                    simulated = check_streamed_steps(parser, event.delta, simulated, runtime_context, started)
+        finally:
+            await stream.close()
+
+    remember(cache, key, parser.text)
+    return parser.text
+
+
+async def call_repair_llm_async(error: Exception, runtime_context: dict, llm_client=None, cache=LLM_CACHE, builder=None) -> str:
+    """Async version of call_repair_llm."""
+
+    prompt = build_repair_prompt(error, runtime_context, builder)
+    key = make_prompt_key(MODEL, REPAIR_PROMPT_VERSION, prompt)
+    cached = cache.get(key) if cache is not None else None
+    if cached is not None:
+        return cached
+
+    with span("repair", model=MODEL):
+        response = await (llm_client or default_async_backend()).responses.create(
+            model=MODEL,
+            input=prompt
+        )
 
+    remember(cache, key, response.output_text)
     return response.output_text
 
 
@@ -70,7 +227,7 @@ def observe_world(runtime_context: dict) -> dict:
     This simulates reading from real systems (DB, APIs, logs, etc.)
     """
 
-    print("\n👁️ OBSERVING WORLD...")
+    log("\n👁️ OBSERVING WORLD...")
 
     # Simulate reading from systems
     if runtime_context.get("refund_done"):
@@ -84,7 +241,7 @@ def observe_world(runtime_context: dict) -> dict:
     else:
         runtime_context["inventory_status"] = f"{runtime_context['inventory']} units available"
 
-    print("Observed world:", runtime_context)
+    log("Observed world:", runtime_context)
     return runtime_context
 
 
@@ -99,103 +256,196 @@ def goal_satisfied(_goal: str, runtime_context: dict) -> bool:
     return runtime_context.get("refund_done", False)
 
 
-def run_agent(goal: str, runtime_context: dict, max_iterations: int = 5):
+def report_result(result: dict):
+    """Print what happened to the last plan."""
+    if result["status"] == "BLOCKED":
+        log(f"\n❌ ASK BLOCKED THE PLAN: {result.get('reason')}")
+    elif result["status"] == "FAILED":
+        log("\n⚠️ PLAN FAILED — Agent will try again")
+    elif result["status"] == "SUCCESS":
+        log("\n✅ PLAN EXECUTED SUCCESSFULLY")
+
+
+def feedback_goal(goal: str, result: dict) -> str:
+    """
+    STEP 4B: FEEDBACK TO LLM.
+    Rewrite the goal so the next proposal knows why the last plan did not finish.
+    """
+    if result["status"] == "BLOCKED":
+        log("\n🔁 ASK BLOCKED THE PLAN — telling LLM to try again...\n")
+        return f"""
+            Your last plan was blocked because: {result.get('reason')}.
+            You MUST perform check_inventory FIRST before attempting any refund.
+            Now propose a new plan.
+            """
+
+    if result["status"] == "FAILED":
+        log("\n🔁 PLAN FAILED — asking LLM to try a different strategy...\n")
+        return f"Your last plan failed during execution. Try a different approach to achieve: {goal}"
+
+    return goal
+
+
+def run_agent(goal: str, runtime_context: dict, max_iterations: int = 5, llm_client=None, cache=LLM_CACHE,
+              stream: bool = False):
     """
     FULL OUTER LOOP:
     propose → ASK enforces → act → observe → repeat
+    With stream=True, plans are checked step by step while the LLM writes them.
     """
+    llm_client = llm_client or default_backend()
+    builder = PromptBuilder()
 
-    print("\n=== STARTING AGENT LOOP ===")
-    print(f"🎯 Goal: {goal}")
-    print(f"🌍 Initial world: {runtime_context}\n")
+    log("\n=== STARTING AGENT LOOP ===")
+    log(f"🎯 Goal: {goal}")
+    log(f"🌍 Initial world: {runtime_context}\n")
 
 
     for i in range(max_iterations):
-        print(f"\n🚀 === ITERATION {i+1} ===")
-        raw = call_llm(goal, runtime_context)
-        print("\n🤖 LLM PROPOSED PLAN:\n", raw)
+        with span("iteration"):
+            log(f"\n🚀 === ITERATION {i+1} ===")
+            if stream:
+                try:
+                    raw = call_llm_stream(goal, runtime_context, llm_client, cache, builder)
+                except LawViolation as lv:
+                    log("\n✂️ STREAM CANCELLED — proposed step is illegal")
+                    result = {"status": "BLOCKED", "reason": str(lv), "context": runtime_context}
+                    report_result(result)
+                    goal = feedback_goal(goal, result)
+                    continue
+            else:
+                raw = call_llm(goal, runtime_context, llm_client, cache, builder)
+            log("\n🤖 LLM PROPOSED PLAN:\n", raw)
 
 
 # -------- STEP 5.4: MULTI-RETRY SAFE PARSING (3 ATTEMPTS) --------
-        max_retries = 3
-        attempt = 0
-
-        if "order_id" not in runtime_context:
-            runtime_context["order_id"] = 123
+            max_retries = 3
+            attempt = 0
 
-        while True:
-            try:
-                plan = llm_to_action_plan(raw)
-                break   # SUCCESS → exit loop
+            if "order_id" not in runtime_context:
+                runtime_context["order_id"] = 123
 
-            except RuntimeError as e:
-                attempt += 1
+            while True:
+                try:
+                    with span("parse"):
+                        plan = llm_to_action_plan(raw)
+                    break   # SUCCESS → exit loop
 
-                if attempt > max_retries:
-                    print("\n🚨 FATAL: LLM failed 3 times — giving up.")
-                    raise e  # let it crash intentionally
+                # ValueError covers JSON the local repair could not fix
+                except (RuntimeError, ValueError) as e:
+                    attempt += 1
 
-                print(f"\n❌ PARSE ERROR (attempt {attempt}/{max_retries}) — repairing LLM output...\n")
+                    if attempt > max_retries:
+                        log("\n🚨 FATAL: LLM failed 3 times — giving up.")
+                        raise e  # let it crash intentionally
 
-                repair_prompt = f"""
-                Your previous output was invalid JSON.
+                    log(f"\n❌ PARSE ERROR (attempt {attempt}/{max_retries}) — repairing LLM output...\n")
 
-                ERROR:
-                {e}
+                    raw = call_repair_llm(e, runtime_context, llm_client, cache, builder)
 
-                CURRENT WORLD STATE:
-                {runtime_context}
-
-                Respond ONLY with JSON in exactly this format:
+                    log("\nREPAIRED RAW OUTPUT:\n", raw)
+# -------- END STEP 5.4 --------
 
-                {{
-                    "plan": [
-                        {{
-                            "action": "check_inventory",
-                            "order_id": 123
-                        }}
-                    ]
-                }}
-                """
+            with span("execute"):
+                result = execute_plan(plan, runtime_context)
+            with span("observation"):
+                runtime_context = observe_world(runtime_context)
+            report_result(result)
 
 
-                raw = client.responses.create(
-                    model="gpt-4.1-mini",
-                    input=repair_prompt
-                ).output_text
+            # STOP if goal achieved
+            if result["status"] == "SUCCESS" and goal_satisfied(goal, runtime_context):
+                result["prompt_tokens"] = builder.prompt_tokens
+                return result
 
-                print("\nREPAIRED RAW OUTPUT:\n", raw)
-# -------- END STEP 5.4 --------
+            goal = feedback_goal(goal, result)
 
-        result = execute_plan(plan, runtime_context)
-        runtime_context = observe_world(runtime_context)
 
-        if result["status"] == "BLOCKED":
-            print(f"\n❌ ASK BLOCKED THE PLAN: {result.get('reason')}")
-        elif result["status"] == "FAILED":
-            print("\n⚠️ PLAN FAILED — Agent will try again")
-        elif result["status"] == "SUCCESS":
-            print("\n✅ PLAN EXECUTED SUCCESSFULLY")
 
+    log("\n⚠️ MAX ITERATIONS REACHED — STOPPING")
+    return {"status": "STOPPED", "reason": "max_iterations", "prompt_tokens": builder.prompt_tokens}
 
-        # STOP if goal achieved
-        if result["status"] == "SUCCESS" and goal_satisfied(goal, runtime_context):
-            return result
 
-        # ---- STEP 4B: FEEDBACK TO LLM ----
-        if result["status"] == "BLOCKED":
-            goal = f"""
-            Your last plan was blocked because: {result.get('reason')}.
-            You MUST perform check_inventory FIRST before attempting any refund.
-            Now propose a new plan.
-            """
-            print("\n🔁 ASK BLOCKED THE PLAN — telling LLM to try again...\n")
+async def run_agent_async(goal: str, runtime_context: dict, max_iterations: int = 5, llm_client=None, cache=LLM_CACHE,
+                          stream: bool = False):
+    """
+    Async version of run_agent.
+    The worker is free to drive other tickets while this one waits on the LLM or a tool.
+    """
+    llm_client = llm_client or default_async_backend()
+    builder = PromptBuilder()
 
-        if result["status"] == "FAILED":
-            goal = f"Your last plan failed during execution. Try a different approach to achieve: {goal}"
-            print("\n🔁 PLAN FAILED — asking LLM to try a different strategy...\n")
+    log(f"\n=== STARTING AGENT LOOP (async) === 🎯 Goal: {goal}")
 
+    for i in range(max_iterations):
+        with span("iteration"):
+            log(f"\n🚀 === ITERATION {i+1} ===")
+            if stream:
+                try:
+                    raw = await call_llm_stream_async(goal, runtime_context, llm_client, cache, builder)
+                except LawViolation as lv:
+                    log("\n✂️ STREAM CANCELLED — proposed step is illegal")
+                    result = {"status": "BLOCKED", "reason": str(lv), "context": runtime_context}
+                    report_result(result)
+                    goal = feedback_goal(goal, result)
+                    continue
+            else:
+                raw = await call_llm_async(goal, runtime_context, llm_client, cache, builder)
+
+            max_retries = 3
+            attempt = 0
+
+            if "order_id" not in runtime_context:
+                runtime_context["order_id"] = 123
+
+            while True:
+                try:
+                    with span("parse"):
+                        plan = llm_to_action_plan(raw)
+                    break
+
+                # ValueError covers JSON the local repair could not fix
+                except (RuntimeError, ValueError) as e:
+                    attempt += 1
+
+                    if attempt > max_retries:
+                        log("\n🚨 FATAL: LLM failed 3 times — giving up.")
+                        raise e
+
+                    log(f"\n❌ PARSE ERROR (attempt {attempt}/{max_retries}) — repairing LLM output...\n")
+
+                    raw = await call_repair_llm_async(e, runtime_context, llm_client, cache, builder)
+
+            with span("execute"):
+                result = await execute_plan_async(plan, runtime_context)
+            with span("observation"):
+                runtime_context = observe_world(runtime_context)
+            report_result(result)
+
+            if result["status"] == "SUCCESS" and goal_satisfied(goal, runtime_context):
+                result["prompt_tokens"] = builder.prompt_tokens
+                return result
+
+            goal = feedback_goal(goal, result)
+
+    log("\n⚠️ MAX ITERATIONS REACHED — STOPPING")
+    return {"status": "STOPPED", "reason": "max_iterations", "prompt_tokens": builder.prompt_tokens}
+
+
+async def run_tickets(tickets: list, concurrency: int = 10, max_iterations: int = 5, llm_client=None, cache=LLM_CACHE,
+                      stream: bool = False):
+    """
+    Run many (goal, runtime_context) tickets over one event loop,
+    with at most `concurrency` of them in flight at once.
+    Results come back in ticket order; a ticket that raised comes back as its exception.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
 
+    async def run_one(goal, runtime_context):
+        async with semaphore:
+            return await run_agent_async(goal, runtime_context, max_iterations, llm_client, cache, stream)
 
-    print("\n⚠️ MAX ITERATIONS REACHED — STOPPING")
-    return {"status": "STOPPED", "reason": "max_iterations"}
+    return await asyncio.gather(
+        *(run_one(goal, runtime_context) for goal, runtime_context in tickets),
+        return_exceptions=True
+    )
@@ -1,6 +1,25 @@
 # api_explorer.py
 
+import hashlib
 import json
+import os
+
+from tracing import log, span
+
+try:
+    import yaml
+except ImportError:  # JSON specs still work without PyYAML
+    yaml = None
+
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+
+# Parsed OpenAPI catalogs, one JSON file per spec content hash
+OPENAPI_CACHE_DIR = os.environ.get("ASK_OPENAPI_CACHE", os.path.join(".ask_cache", "openapi"))
+# Part of every cache file name: bump whenever extract_operations' output changes
+CATALOG_FORMAT_VERSION = 2
+
+# Endpoints listed by discover_api before it only reports a count
+MAX_LISTED_ENDPOINTS = 20
 
 # -------- MOCK "UNKNOWN SYSTEM" --------
 MOCK_API_CATALOG = {
@@ -22,22 +41,203 @@ MOCK_API_CATALOG = {
     }
 }
 
-def discover_api(system_name: str):
+# ---- OPENAPI CATALOGS ----
+class RouteTrie:
     """
-    Simulate discovering an unknown API.
-    In real life: this would read OpenAPI docs, hit endpoints, or inspect responses.
+    Path templates split into segments; literal segments win over {params}.
+    resolve() walks one node per segment, so lookup cost does not grow with
+    the number of paths in the spec. Parameter names live with each template's
+    operation, since /orders/{order_id} and /orders/{id}/items share a node.
     """
 
-    print(f"\n🔍 DISCOVERING API for system: {system_name}\n")
+    def __init__(self):
+        self.root = {"literal": {}, "param": None, "methods": {}}
 
-    if system_name not in MOCK_API_CATALOG:
-        raise ValueError(f"Unknown system: {system_name}")
+    def add(self, path: str, method: str, operation_id: str):
+        node = self.root
+        names = []
+        for segment in path.strip("/").split("/"):
+            if not segment:
+                continue
+            if segment.startswith("{") and segment.endswith("}"):
+                names.append(segment[1:-1])
+                if node["param"] is None:
+                    node["param"] = {"literal": {}, "param": None, "methods": {}}
+                node = node["param"]
+            else:
+                node = node["literal"].setdefault(segment, {"literal": {}, "param": None, "methods": {}})
+        node["methods"][method.upper()] = (operation_id, tuple(names))
+
+    def resolve(self, method: str, path: str):
+        """(operation_id, path params) for a concrete path, or (None, {})."""
+        segments = [s for s in path.split("?", 1)[0].strip("/").split("/") if s]
+        return self._walk(self.root, segments, 0, method.upper(), ())
+
+    def _walk(self, node, segments, i, method, values):
+        if i == len(segments):
+            found = node["methods"].get(method)
+            if found is None:
+                return None, {}
+            operation_id, names = found
+            return operation_id, dict(zip(names, values))
+
+        child = node["literal"].get(segments[i])
+        if child is not None:
+            found = self._walk(child, segments, i + 1, method, values)
+            if found[0]:
+                return found
+
+        # Backtrack into the {param} branch when the literal one dead-ends
+        if node["param"] is not None:
+            return self._walk(node["param"], segments, i + 1, method, values + (segments[i],))
+        return None, {}
+
+
+class ApiCatalog:
+    """Indexed operations of one OpenAPI spec: by operationId and by route."""
+
+    def __init__(self, operations: list, base_url: str = "", spec_hash: str = ""):
+        self.base_url = base_url
+        self.spec_hash = spec_hash
+        self.operations = {op["operation_id"]: op for op in operations}
+        self.trie = RouteTrie()
+        for op in operations:
+            self.trie.add(op["path"], op["method"], op["operation_id"])
+
+    def operation(self, operation_id: str) -> dict:
+        return self.operations[operation_id]
+
+    def resolve(self, method: str, path: str):
+        """(operation, path params) for a concrete request path, or (None, {})."""
+        operation_id, params = self.trie.resolve(method, path)
+        return (self.operations[operation_id], params) if operation_id else (None, {})
+
+    def entries(self):
+        """(path template, info) pairs, the shape register_http_tools reads."""
+        for op in self.operations.values():
+            yield op["path"], {**op, "tool": op["operation_id"]}
+
+    def __len__(self):
+        return len(self.operations)
+
+
+def default_operation_id(method: str, path: str) -> str:
+    """GET /orders/{order_id} → get_orders_by_order_id (when the spec names none)."""
+    words = [
+        f"by_{p[1:-1]}" if p.startswith("{") else p.replace("-", "_")
+        for p in path.strip("/").split("/") if p
+    ]
+    return "_".join([method.lower()] + words)
+
+
+def parse_spec(text: str) -> dict:
+    """OpenAPI document from JSON or YAML text."""
+    if text.lstrip().startswith("{"):
+        return json.loads(text)
+    if yaml is None:
+        raise ValueError("YAML OpenAPI specs need PyYAML installed")
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    return yaml.load(text, Loader=loader)
 
-    api = MOCK_API_CATALOG[system_name]
 
-    print("Found endpoints:")
-    for path, info in api["endpoints"].items():
-        print(f"- {info['method']} {path} → {info['description']}")
+def extract_operations(spec: dict) -> list:
+    """Flatten spec["paths"] into compact operation records."""
+    operations = []
+    for path, item in (spec.get("paths") or {}).items():
+        shared = item.get("parameters", [])
+        for method in HTTP_METHODS:
+            op = item.get(method)
+            if op is None:
+                continue
+            parameters = shared + op.get("parameters", [])
+            # Path params come from the template itself; specs often omit them
+            record = {
+                "operation_id": op.get("operationId") or default_operation_id(method, path),
+                "method": method.upper(),
+                "path": path,
+                "description": op.get("summary") or op.get("description", ""),
+                "path_params": [p[1:-1] for p in path.split("/") if p.startswith("{") and p.endswith("}")],
+                "query_params": [p["name"] for p in parameters if p.get("in") == "query"],
+            }
+            if "x-timeout" in op:
+                record["timeout"] = float(op["x-timeout"])
+            operations.append(record)
+    return operations
+
+
+def load_openapi(path: str, cache_dir: str = OPENAPI_CACHE_DIR) -> ApiCatalog:
+    """
+    Load an OpenAPI JSON/YAML file as an ApiCatalog. The flattened operations
+    are cached on disk under the sha256 of the spec bytes (and the catalog
+    format version), so an unchanged spec is never parsed twice and neither
+    an edited spec nor a changed parser ever serves stale routes.
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    spec_hash = hashlib.sha256(raw).hexdigest()
+    cache_name = f"{spec_hash}.v{CATALOG_FORMAT_VERSION}.json"
+    cache_path = os.path.join(cache_dir, cache_name) if cache_dir else None
+
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path, encoding="utf-8") as f:
+            cached = json.load(f)
+        return ApiCatalog(cached["operations"], cached["base_url"], spec_hash)
+
+    with span("openapi_parse"):
+        spec = parse_spec(raw.decode("utf-8"))
+        servers = spec.get("servers") or [{}]
+        base_url = servers[0].get("url", "")
+        operations = extract_operations(spec)
+
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write-then-rename so a concurrent worker never reads half a file
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"base_url": base_url, "operations": operations}, f, separators=(",", ":"))
+        os.replace(tmp_path, cache_path)
+
+    return ApiCatalog(operations, base_url, spec_hash)
+
+
+# system name -> ApiCatalog ingested from that system's OpenAPI spec
+API_CATALOGS = {}
+
+# systems discover_api has already reported
+DISCOVERED = set()
+
+
+def register_openapi(system_name: str, spec_path: str, cache_dir: str = OPENAPI_CACHE_DIR) -> ApiCatalog:
+    catalog = load_openapi(spec_path, cache_dir)
+    API_CATALOGS[system_name] = catalog
+    DISCOVERED.discard(system_name)
+    return catalog
+
+
+def discover_api(system_name: str):
+    """
+    Simulate discovering an unknown API.
+    Systems ingested with register_openapi return their ApiCatalog; anything
+    else falls back to the MOCK_API_CATALOG. Endpoints are logged only the
+    first time a system is discovered.
+    """
+    if system_name in API_CATALOGS:
+        api = API_CATALOGS[system_name]
+        endpoints = [(path, info) for path, info in api.entries()]
+    elif system_name in MOCK_API_CATALOG:
+        api = MOCK_API_CATALOG[system_name]
+        endpoints = list(api["endpoints"].items())
+    else:
+        raise ValueError(f"Unknown system: {system_name}")
+
+    if system_name not in DISCOVERED:
+        DISCOVERED.add(system_name)
+        log(f"\n🔍 DISCOVERING API for system: {system_name}\n")
+        log(f"Found {len(endpoints)} endpoints:")
+        for path, info in endpoints[:MAX_LISTED_ENDPOINTS]:
+            log(f"- {info['method']} {path} → {info['description']}")
+        if len(endpoints) > MAX_LISTED_ENDPOINTS:
+            log(f"- … and {len(endpoints) - MAX_LISTED_ENDPOINTS} more")
 
     return api
 
@@ -47,14 +247,15 @@ def call_api(_system_name: str, endpoint: str, method: str, payload: dict = None
     In real life: this would use requests / httpx to make real HTTP calls.
     """
 
-    print(f"\n📡 CALLING API: {method} {endpoint}")
-    print(f"Payload: {json.dumps(payload, indent=2)}")
+    log(f"\n📡 CALLING API: {method} {endpoint}")
+    log(f"Payload: {json.dumps(payload, indent=2)}")
 
-    # --- MOCK RESPONSES ---
-    if endpoint.startswith("/inventory"):
-        return {"status": "success", "inventory": 10}
+    with span("api_call", method=method):
+        # --- MOCK RESPONSES ---
+        if endpoint.startswith("/inventory"):
+            return {"status": "success", "inventory": 10}
 
-    if endpoint == "/refunds":
-        return {"status": "success", "refund_id": "r_123"}
+        if endpoint == "/refunds":
+            return {"status": "success", "refund_id": "r_123"}
 
-    return {"status": "success", "data": "mock_response"}
+        return {"status": "success", "data": "mock_response"}
@@ -1,6 +1,9 @@
 import json
 import re
-from agent_models import ActionPlan, ActionStep
+from collections import Counter
+
+from agent_models import NO_CONDITIONS, NO_STEPS, ActionPlan, ActionStep
+from success_conditions import compile_success_condition
 
 def validate_canonical_schema(plan_dict: dict) -> bool:
     """
@@ -57,6 +60,20 @@ def normalize_tool_name(raw: str) -> str:
     # FALLBACK: make it a valid python-style name but keep meaning
     return name.replace(" ", "_")
 
+# Keys that describe a step rather than feed the tool
+BANNED_INPUT_KEYS = frozenset({
+    "action", "Action",
+    "description", "Description",
+    "next_step", "next_steps", "NextStep", "Next_steps",
+    "step", "Step", "StepNumber"
+})
+
+# Tools that cannot run without an order_id
+ORDER_TOOLS = frozenset({"check_inventory", "refund_order", "verify_order"})
+
+DEFAULT_SUCCESS_CONDITION = "result.get('status') == 'success'"
+
+
 def collect_inputs(step_dict: dict) -> dict:
     """
     Take EVERYTHING the LLM gave us that looks like an input,
@@ -66,207 +83,481 @@ def collect_inputs(step_dict: dict) -> dict:
       - 'next_step' / variants
       - 'step' / 'Step' / 'StepNumber'
     """
-    banned_keys = {
-        "action", "Action",
-        "description", "Description",
-        "next_step", "next_steps", "NextStep", "Next_steps",
-        "step", "Step", "StepNumber"
-    }
-
-    inputs = {}
+    return {k: v for k, v in step_dict.items() if k not in BANNED_INPUT_KEYS}
 
-    for k, v in step_dict.items():
-        if k not in banned_keys:
-            inputs[k] = v
-
-    return inputs
+def fold_keys(d: dict) -> dict:
+    """
+    Normalize key variants once: orderID / OrderID / orderId / order_id → "orderid".
+    The first non-empty value wins, like the old `.get(...) or .get(...)` chains.
+    """
+    folded = {}
+    for k, v in d.items():
+        key = k.lower().replace("_", "")
+        if not folded.get(key):
+            folded[key] = v
+    return folded
 
 def extract_json_from_text(text: str) -> str:
-    match = re.search(r"```json(.*?)```", text, re.S)
-    if match:
-        return match.group(1).strip()
+    start = text.find("```json")
+    if start != -1:
+        end = text.find("```", start + 7)
+        if end != -1:
+            return text[start + 7:end].strip()
     return text.strip()
 
-def llm_to_action_plan(raw_text: str) -> ActionPlan:
+
+# ---- LOCAL JSON REPAIR ----
+# Cheap deterministic fixes tried before asking the LLM to repair its output.
+# Applied in order, each on top of the previous ones; json.loads is retried
+# after every fix that changed the text.
+JSON_REPAIRS = []
+
+# fix name -> how many outputs it helped rescue ("failed" when none did)
+REPAIR_STATS = Counter()
+
+STRING_PATTERN = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'')
+FENCE_PATTERN = re.compile(r"```[A-Za-z]*\s*(.*?)```", re.S)
+
+
+def register_repair(fix):
+    JSON_REPAIRS.append(fix)
+    return fix
+
+
+def split_strings(text: str) -> list:
+    """Split text into (is_string, chunk) pieces; quotes of either kind open a string."""
+    pieces = []
+    pos = 0
+    for match in STRING_PATTERN.finditer(text):
+        pieces.append((False, text[pos:match.start()]))
+        pieces.append((True, match.group()))
+        pos = match.end()
+    pieces.append((False, text[pos:]))
+    return pieces
+
+
+def outside_strings(text: str, fix) -> str:
+    """Apply fix only to the parts of text that are not string literals."""
+    return "".join(chunk if is_string else fix(chunk) for is_string, chunk in split_strings(text))
+
+
+@register_repair
+def extract_block(text: str) -> str:
+    """Any ``` fence (tagged or not), else the span from the first { or [ on."""
+    fence = FENCE_PATTERN.search(text)
+    if fence:
+        return fence.group(1).strip()
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        return text
+    ends = [i for i in (text.rfind("}"), text.rfind("]")) if i > min(starts)]
+    # No closer at all: keep the tail so truncation can still close it
+    return text[min(starts):max(ends) + 1] if ends else text[min(starts):]
+
+
+@register_repair
+def single_quotes(text: str) -> str:
+    def requote(chunk):
+        if not chunk.startswith("'"):
+            return chunk
+        inner = chunk[1:-1].replace("\\'", "'")
+        return '"' + re.sub(r'(?<!\\)"', r'\\"', inner) + '"'
+    return "".join(requote(chunk) if is_string else chunk for is_string, chunk in split_strings(text))
+
+
+@register_repair
+def python_literals(text: str) -> str:
+    literals = {"True": "true", "False": "false", "None": "null"}
+    return outside_strings(text, lambda chunk: re.sub(
+        r"\b(True|False|None)\b", lambda m: literals[m.group()], chunk
+    ))
+
+
+@register_repair
+def trailing_commas(text: str) -> str:
+    return outside_strings(text, lambda chunk: re.sub(r",(\s*[}\]])", r"\1", chunk))
+
+
+@register_repair
+def truncation(text: str) -> str:
+    """Drop the cut-off tail after the last complete object and close what is still open."""
+    stack = []
+    cut = None
+    in_string = escaped = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]" and stack:
+            stack.pop()
+            cut = (i + 1, list(stack))
+
+    if cut is None or not cut[1]:
+        return text
+    end, still_open = cut
+    return text[:end].rstrip().rstrip(",") + "".join(reversed(still_open))
+
+
+def repair_json(raw_text: str, stats: Counter = REPAIR_STATS):
     """
-    Convert messy LLM JSON output into your strict ASK ActionPlan.
-    This function intentionally supports multiple possible LLM formats.
+    Try the local fixes in order; returns the parsed JSON, or None if
+    the output is beyond cheap repair and needs an LLM round trip.
+    Fixes used (or "failed") are counted in `stats` unless it is None.
+    """
+    text = raw_text
+    applied = []
+    for fix in JSON_REPAIRS:
+        fixed = fix(text)
+        if fixed == text:
+            continue
+        text = fixed
+        applied.append(fix.__name__)
+        try:
+            parsed = json.loads(text)
+        except ValueError:
+            continue
+        if stats is not None:
+            stats.update(applied)
+        return parsed
+
+    if stats is not None:
+        stats["failed"] += 1
+    return None
+
+
+def parse_llm_json(raw_text: str, stats: Counter = REPAIR_STATS):
+    """Strict json.loads first; local repair only when that fails."""
+    try:
+        return json.loads(extract_json_from_text(raw_text))
+    except json.JSONDecodeError:
+        repaired = repair_json(raw_text, stats)
+        if repaired is None:
+            raise
+        return repaired
+
+
+# ---- STREAMING ----
+class PlanStreamParser:
+    """
+    Incremental parser for a {"plan": [...]} answer arriving in chunks.
+    feed() returns the ActionSteps completed by each chunk, so they can be
+    checked while the model is still writing the rest. Only the "plan" array
+    is watched; the full text still goes through llm_to_action_plan at the end.
+
+    Steps are built by the same per-step code as the adapter select_adapter
+    will pick (canonical_step or loose_step, decided by the first step as in
+    validate_canonical_schema). A step whose final form is not known yet
+    (unparseable, or depending on a top-level order_id) is not returned.
     """
 
-    json_text = extract_json_from_text(raw_text)
+    def __init__(self):
+        self.text = ""
+        self.steps = []
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._last_key = None     # last string closed directly inside the top object
+        self._in_plan = False
+        self._plan_done = False
+        self._step_start = None
+        self._top_keys = set()    # strings directly inside the top object (keys and string values)
+        self._first_step = True
+        self._canonical = False
+        self._watching = True
+        self._order_id = None
+
+    def feed(self, chunk: str) -> list:
+        self.text += chunk
+        text = self.text
+        completed = []
+
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_key = text[self._string_start + 1:i]
+                        self._top_keys.add(self._last_key)
+            elif self._depth == 0:
+                # Prose or a fence before the JSON starts
+                if ch == "{":
+                    self._depth = 1
+            elif ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in "{[":
+                self._depth += 1
+                if ch == "[" and self._depth == 2 and self._last_key == "plan" and not self._plan_done:
+                    self._in_plan = True
+                elif ch == "{" and self._in_plan and self._depth == 3:
+                    self._step_start = i
+            elif ch in "}]":
+                if ch == "}" and self._step_start is not None and self._depth == 3:
+                    step = self._finish_step(text[self._step_start:i + 1])
+                    if step is not None:
+                        completed.append(step)
+                    self._step_start = None
+                elif ch == "]" and self._in_plan and self._depth == 2:
+                    self._in_plan = False
+                    self._plan_done = True
+                self._depth -= 1
+
+        self._pos = len(text)
+        self.steps.extend(completed)
+        return completed
+
+    def _finish_step(self, step_text: str):
+        try:
+            step = json.loads(step_text)
+        except ValueError:
+            # Left for the local / LLM repair once the whole answer is in
+            step = None
+
+        if self._first_step:
+            self._first_step = False
+            # The same test select_adapter makes (validate_canonical_schema)
+            self._canonical = isinstance(step, dict) and "action" in step and "order_id" in step
+            # A format key that outranks "plan" means this array may not be what runs
+            plan_precedence = FORMAT_ADAPTERS["plan"][0]
+            self._watching = self._canonical or not any(
+                FORMAT_ADAPTERS.get(key, (plan_precedence,))[0] < plan_precedence
+                for key in self._top_keys
+            )
 
-    plan_dict = json.loads(json_text)
-    # ---- STEP 5.1: STRICT SCHEMA CHECK FIRST ----
-    if validate_canonical_schema(plan_dict):
-        actions = []
-        for step in plan_dict["plan"]:
-            raw_tool = step["action"]
-            tool_name = normalize_tool_name(raw_tool)
+        if not self._watching:
+            return None
+        if not isinstance(step, dict):
+            # A repaired step could change what later loose steps inherit
+            self._watching = self._canonical
+            return None
 
-            inputs = {"order_id": step["order_id"]}
+        try:
+            if self._canonical:
+                return canonical_step(step)
+            if "order_id" not in step and self._order_id is None:
+                # May still inherit a top-level order_id written after the plan
+                return None
+            action_step, self._order_id = loose_step(step, self._order_id)
+            return action_step
+        except (LookupError, ValueError):
+            # The final parse fails this plan too; it goes to repair
+            return None
 
-            actions.append(
-                ActionStep(
-                    tool=tool_name,
-                    input_schema=inputs,
-                    success_condition="result.get('status') == 'success'"
-                )
-            )
 
-        order_id = plan_dict["plan"][0]["order_id"]
+# ---- FORMAT ADAPTERS ----
+# top-level key -> (precedence, adapter). The adapter for the lowest
+# precedence key present in the LLM output builds the ActionPlan.
+FORMAT_ADAPTERS = {}
 
-        return ActionPlan(
-            goal=f"Execute plan for order {order_id}",
-            preconditions=[],
-            actions=actions,
-            postconditions=[],
-            fallback=[]
-        )
 
-    # ---- END STEP 5.1 ----
+def register_format(key: str, precedence: int):
+    def decorator(adapter):
+        FORMAT_ADAPTERS[key] = (precedence, adapter)
+        return adapter
+    return decorator
 
 
-    if "ActionPlan" in plan_dict:
-        ap = plan_dict["ActionPlan"]
+def canonical_step(step: dict) -> ActionStep:
+    """One step of the strict schema: only its order_id reaches the tool."""
+    if "order_id" not in step:
+        raise ValueError("order_id required but missing")
 
-        order_id = (
-            ap.get("order_id")
-            or ap.get("orderID")
-            or ap.get("OrderID")
-            or ap.get("orderId")
-        )
+    return ActionStep(
+        tool=normalize_tool_name(step["action"]),
+        input_schema={"order_id": step["order_id"]},
+        success_condition=DEFAULT_SUCCESS_CONDITION
+    )
 
-        step_list = (
-           ap.get("actions")
-           or ap.get("Actions")
-           or ap.get("steps")
-           or ap.get("Steps")
-           or []
-        )
 
+def loose_step(step: dict, order_id):
+    """
+    One step of a loose plan, plus the order_id the steps after it inherit.
+    Steps without an order_id take the last one seen.
+    """
+    tool_name = normalize_tool_name(step.get("action", ""))
+    inputs = collect_inputs(step)
 
-        actions = []
+    if "order_id" in inputs:
+        order_id = inputs["order_id"]
+    elif tool_name in ORDER_TOOLS and order_id is None:
+        raise ValueError("order_id required but missing")
+    elif order_id is not None:
+        inputs["order_id"] = order_id
 
-        for step in step_list:
-            tool_name = (
-                step.get("action")
-                or step.get("Action")
-                or step.get("description")
-                or step.get("Description")
-                or step.get("task")
-                or step.get("Task")
-                or ""
-            )
+    action_step = ActionStep(
+        tool=tool_name,
+        input_schema=inputs,
+        success_condition=DEFAULT_SUCCESS_CONDITION
+    )
+    return action_step, order_id
 
-            tool_name = normalize_tool_name(tool_name)
-            
-            inputs = {}
-            if order_id is not None:
-                inputs["order_id"] = order_id
-
-            actions.append(
-                ActionStep(
-                    tool=tool_name,
-                    input_schema=inputs,
-                    success_condition="result.get('status') == 'success'"
-                )
-            )
 
+def adapt_canonical(plan_dict: dict) -> ActionPlan:
+    """STEP 5.1: the strict {"plan": [{"action", "order_id"}]} schema."""
+    actions = [canonical_step(step) for step in plan_dict["plan"]]
 
-        return ActionPlan(
-            goal=f"Process workflow for order {order_id}",
-            preconditions=[],
-            actions=actions,
-            postconditions=[],
-            fallback=[]
-        )
+    order_id = plan_dict["plan"][0]["order_id"]
+
+    return ActionPlan(
+        goal=f"Execute plan for order {order_id}",
+        preconditions=NO_CONDITIONS,
+        actions=actions,
+        postconditions=NO_CONDITIONS,
+        fallback=NO_STEPS
+    )
 
-    if "actionPlan" in plan_dict:
-        ap = plan_dict["actionPlan"]
 
-        order_id = ap.get("order_id") or ap.get("orderID") or ap.get("orderId")
+@register_format("ActionPlan", 1)
+def adapt_action_plan(plan_dict: dict) -> ActionPlan:
+    ap = fold_keys(plan_dict["ActionPlan"])
 
-        actions = [
+    order_id = ap.get("orderid")
+    step_list = ap.get("actions") or ap.get("steps") or []
+
+    actions = []
+
+    for step in step_list:
+        fields = fold_keys(step)
+        tool_name = normalize_tool_name(
+            fields.get("action") or fields.get("description") or fields.get("task") or ""
+        )
+
+        inputs = {}
+        if order_id is not None:
+            inputs["order_id"] = order_id
+
+        actions.append(
             ActionStep(
-                tool=ap.get("action", "unknown_action"),
-                input_schema={"order_id": order_id},
-                success_condition="result.get('status') == 'success'"
+                tool=tool_name,
+                input_schema=inputs,
+                success_condition=DEFAULT_SUCCESS_CONDITION
             )
-        ]
-
-        return ActionPlan(
-            goal=f"Execute {ap.get('action', 'unknown_action')} for order {order_id}",
-            preconditions=[],
-            actions=actions,
-            postconditions=[],
-            fallback=[]
         )
 
-    if "actions" in plan_dict:
-        actions = []
-        for a in plan_dict["actions"]:
-            actions.append(
-                ActionStep(
-                    tool=a["tool"],
-                    input_schema=a["inputs"],
-                    success_condition=a["success_condition"]
-                )
+    return ActionPlan(
+        goal=f"Process workflow for order {order_id}",
+        preconditions=NO_CONDITIONS,
+        actions=actions,
+        postconditions=NO_CONDITIONS,
+        fallback=NO_STEPS
+    )
+
+
+@register_format("actionPlan", 2)
+def adapt_single_action(plan_dict: dict) -> ActionPlan:
+    ap = plan_dict["actionPlan"]
+
+    order_id = fold_keys(ap).get("orderid")
+    tool_name = ap.get("action", "unknown_action")
+
+    return ActionPlan(
+        goal=f"Execute {tool_name} for order {order_id}",
+        preconditions=NO_CONDITIONS,
+        actions=[
+            ActionStep(
+                tool=tool_name,
+                input_schema={"order_id": order_id},
+                success_condition=DEFAULT_SUCCESS_CONDITION
             )
+        ],
+        postconditions=NO_CONDITIONS,
+        fallback=NO_STEPS
+    )
+
+
+@register_format("actions", 3)
+def adapt_native_actions(plan_dict: dict) -> ActionPlan:
+    """Output already shaped like our own ActionStep fields."""
+    # LLM-written conditions are checked here so a bad one goes back for repair
+    for a in plan_dict["actions"]:
+        compile_success_condition(a["success_condition"])
+    return ActionPlan(
+        goal=plan_dict["goal"],
+        preconditions=NO_CONDITIONS,
+        actions=[
+            ActionStep(
+                tool=a["tool"],
+                input_schema=a["inputs"],
+                success_condition=a["success_condition"]
+            )
+            for a in plan_dict["actions"]
+        ],
+        postconditions=NO_CONDITIONS,
+        fallback=NO_STEPS
+    )
 
-        return ActionPlan(
-            goal=plan_dict["goal"],
-            preconditions=[],
-            actions=actions,
-            postconditions=[],
-            fallback=[]
-        )
 
-    if "plan" in plan_dict and isinstance(plan_dict["plan"], list):
-        actions = []
-         # NEW: start with known order_id from runtime_context IF AVAILABLE
-        order_id = plan_dict.get("order_id")  # may be None
+@register_format("plan", 4)
+def adapt_loose_plan(plan_dict: dict) -> ActionPlan:
+    """A "plan" list whose steps carry arbitrary inputs and may omit order_id."""
+    if not isinstance(plan_dict["plan"], list):
+        raise ValueError(f"Unrecognized LLM plan format: {plan_dict}")
 
-        for step in plan_dict["plan"]:
+    actions = []
+    # start with a top-level order_id IF AVAILABLE
+    order_id = plan_dict.get("order_id")  # may be None
 
-            raw_tool = step.get("action", "")
-            tool_name = normalize_tool_name(raw_tool)
+    for step in plan_dict["plan"]:
+        action_step, order_id = loose_step(step, order_id)
+        actions.append(action_step)
 
-            inputs = collect_inputs(step)
+    # Safer goal (works even if order_id is None)
+    goal_text = (
+        f"Execute plan for order {order_id}"
+        if order_id is not None
+        else "Execute plan"
+    )
 
-            if tool_name in {"check_inventory", "refund_order", "verify_order"}:
-                if "order_id" not in inputs:
-                    if order_id is None:
-                        raise ValueError("order_id required but missing")
-                    inputs["order_id"] = order_id
-            
-            if "order_id" in inputs:
-                order_id = inputs["order_id"]
+    return ActionPlan(
+        goal=goal_text,
+        preconditions=NO_CONDITIONS,
+        actions=actions,
+        postconditions=NO_CONDITIONS,
+        fallback=NO_STEPS
+    )
 
-            if order_id is not None and "order_id" not in inputs:
-                inputs["order_id"] = order_id
 
+def select_adapter(plan_dict: dict):
+    """Pick the adapter from a single look at the top-level keys."""
+    # The strict schema always wins
+    if "plan" in plan_dict and validate_canonical_schema(plan_dict):
+        return adapt_canonical
 
-            actions.append(
-                ActionStep(
-                    tool=tool_name,
-                    input_schema=inputs,
-                    success_condition="result.get('status') == 'success'"
-                )
-            )
+    chosen = None
+    for key in plan_dict:
+        entry = FORMAT_ADAPTERS.get(key)
+        if entry is not None and (chosen is None or entry[0] < chosen[0]):
+            chosen = entry
 
-    # 4) Safer goal (works even if order_id is None)
-        goal_text = (
-            f"Execute plan for order {order_id}"
-            if order_id is not None
-            else "Execute plan"
-        )
+    return chosen[1] if chosen else None
 
-        return ActionPlan(
-            goal=goal_text,
-            preconditions=[],
-            actions=actions,
-            postconditions=[],
-            fallback=[]
-        )
 
-    raise ValueError(f"Unrecognized LLM plan format: {plan_dict}")
+def llm_to_action_plan(raw_text: str, stats: Counter = REPAIR_STATS) -> ActionPlan:
+    """
+    Convert messy LLM JSON output into your strict ASK ActionPlan.
+    This function intentionally supports multiple possible LLM formats,
+    see FORMAT_ADAPTERS.
+    """
+
+    plan_dict = parse_llm_json(raw_text, stats)
+
+    adapter = select_adapter(plan_dict) if isinstance(plan_dict, dict) else None
+    if adapter is None:
+        raise ValueError(f"Unrecognized LLM plan format: {plan_dict}")
+
+    return adapter(plan_dict)
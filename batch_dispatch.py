@@ -0,0 +1,158 @@
+"""
+Micro-batched tool dispatch.
+
+A tool with a bulk backend endpoint can register a batch implementation:
+
+    register_batch_tool("check_inventory", check_inventory_bulk, arg="order_id")
+
+Its TOOL_REGISTRY entry then becomes a BatchedTool. Calls from concurrently
+running plans are collected for up to `window` seconds, or until
+`max_batch` calls are waiting. They go out as one bulk request, and each
+caller gets its own result back. Errors from the bulk call reach every
+caller in that batch. A call whose inputs are not exactly `{arg}` never
+joins a batch: it goes to the unbatched tool, or fails on its own. Cache, single-flight and fallback handling are
+unchanged, because they all sit in front of TOOL_REGISTRY.
+enable_batching() does this for every tool in law_engine.BULK_TOOLS.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from law_engine import BULK_TOOLS, TOOL_REGISTRY
+
+DEFAULT_WINDOW = 0.002   # seconds a batch stays open for more calls
+DEFAULT_MAX_BATCH = 64
+
+# Bulk requests run here, never on the caller's thread (which may be an event loop)
+BATCH_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="ask-batch")
+
+
+class BatchedTool:
+    """Drop-in TOOL_REGISTRY entry that funnels calls into bulk requests."""
+
+    def __init__(self, name: str, bulk_func, arg: str = None,
+                 window: float = DEFAULT_WINDOW, max_batch: int = DEFAULT_MAX_BATCH,
+                 unbatched=None):
+        self.name = name
+        self.bulk_func = bulk_func
+        self.arg = arg
+        self.unbatched = unbatched   # single-call tool for inputs the bulk endpoint can't take
+        self.window = window
+        self.max_batch = max_batch
+        self.calls = 0
+        self.batches = 0
+        self._pending = []    # [(inputs, Future)]
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def submit(self, inputs: dict) -> Future:
+        if self.arg and inputs.keys() != {self.arg}:
+            return self._submit_single(inputs)
+
+        future = Future()
+        with self._lock:
+            self.calls += 1
+            self._pending.append((inputs, future))
+            if len(self._pending) >= self.max_batch:
+                batch = self._take()
+            else:
+                batch = None
+                if self._timer is None:
+                    self._timer = threading.Timer(self.window, self._flush_due)
+                    self._timer.daemon = True
+                    self._timer.start()
+
+        # A full batch goes out right away instead of waiting out the window
+        if batch:
+            BATCH_POOL.submit(self._send, batch)
+        return future
+
+    def __call__(self, **inputs):
+        return self.submit(inputs).result()
+
+    async def call_async(self, **inputs):
+        return await asyncio.wrap_future(self.submit(inputs))
+
+    def _submit_single(self, inputs: dict) -> Future:
+        """Run one call outside any batch, so bad inputs only fail their own caller."""
+        if self.unbatched is not None:
+            return BATCH_POOL.submit(self.unbatched, **inputs)
+        future = Future()
+        future.set_exception(TypeError(
+            f"{self.name} takes exactly {self.arg!r} when batched, got {sorted(inputs)}"
+        ))
+        return future
+
+    def _take(self) -> list:
+        """Detach the open batch. Caller holds the lock."""
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _flush_due(self):
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._send(batch)
+
+    def _send(self, batch: list):
+        self.batches += 1
+        try:
+            args = [inputs[self.arg] if self.arg else inputs for inputs, _ in batch]
+            results = list(self.bulk_func(args))
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"{self.name} bulk call returned {len(results)} results for {len(batch)} calls"
+                )
+        except BaseException as e:  # pylint: disable=broad-except
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "batches": self.batches,
+            "mean_batch": self.calls / self.batches if self.batches else 0.0,
+        }
+
+
+def register_batch_tool(name: str, bulk_func, arg: str = None,
+                        window: float = DEFAULT_WINDOW, max_batch: int = DEFAULT_MAX_BATCH) -> BatchedTool:
+    """
+    Route `name` through a BatchedTool. `bulk_func` gets the list of each
+    call's `arg` value (or of whole input dicts when arg is None) and must
+    return one result per call, in order. The entry it replaces handles
+    calls that don't fit the bulk endpoint.
+    """
+    unbatched = TOOL_REGISTRY.get(name)
+    if isinstance(unbatched, BatchedTool):
+        unbatched = unbatched.unbatched
+    tool = BatchedTool(name, bulk_func, arg, window, max_batch, unbatched)
+    TOOL_REGISTRY[name] = tool
+    return tool
+
+
+# tool name -> the unbatched TOOL_REGISTRY entry it replaced
+UNBATCHED = {}
+
+
+def enable_batching(window: float = DEFAULT_WINDOW, max_batch: int = DEFAULT_MAX_BATCH) -> dict:
+    """Batch every tool that has a bulk endpoint in BULK_TOOLS."""
+    tools = {}
+    for name, (bulk_func, arg) in BULK_TOOLS.items():
+        if not isinstance(TOOL_REGISTRY.get(name), BatchedTool):
+            UNBATCHED[name] = TOOL_REGISTRY.get(name)
+        tools[name] = register_batch_tool(name, bulk_func, arg, window, max_batch)
+    return tools
+
+
+def disable_batching():
+    for name, func in UNBATCHED.items():
+        TOOL_REGISTRY[name] = func
+    UNBATCHED.clear()
@@ -0,0 +1,224 @@
+"""
+Batch runner: drain a JSONL file of tickets across a process pool.
+
+    python batch_runner.py tickets.jsonl -o results.jsonl --laws laws.law --workers 8
+    python batch_runner.py tickets.jsonl -o results.jsonl --law-store laws.db --resume
+
+Each input line is {"goal": ..., "runtime_context": {...}}. Each output line
+is the run_agent result for one ticket, tagged with its input `offset`
+(0-based line number), written in input order or, with --as-completed, as
+soon as it finishes.
+
+- Every worker loads the law book once, in the pool initializer.
+- At most --max-pending tickets are in flight (or waiting for their turn to
+  be written), so a huge input file is never read ahead into memory.
+- A ticket that runs longer than --timeout seconds is written as TIMEOUT.
+- Output is flushed per line; --resume skips offsets already in the output.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from agent_runner import run_agent_async
+from law_compiler import compile_law
+from law_enforcer import install_law_book
+from law_store import LawStore
+from llm_backends import AsyncReplayBackend, set_default_backend
+from tracing import set_quiet
+
+# One LawScript block; quoted reasons may contain braces
+LAW_BLOCK = re.compile(r'LAW\s*\{(?:[^"}]|"[^"]*")*\}')
+
+# Per-process state set up by init_worker
+WORKER_LOOP = None
+WORKER_SETTINGS = {}
+
+
+def load_law_file(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [compile_law(block) for block in LAW_BLOCK.findall(f.read())]
+
+
+def init_worker(law_store: str = None, law_file: str = None, replay: str = None,
+                max_iterations: int = 5, timeout: float = None):
+    """Pool initializer: load the law book and LLM backend once per process."""
+    global WORKER_LOOP
+    set_quiet(True)
+
+    laws = []
+    if law_store:
+        store = LawStore(law_store)
+        laws.extend(store.load()[1])
+        store.close()
+    if law_file:
+        laws.extend(load_law_file(law_file))
+    install_law_book(laws)
+
+    if replay:
+        set_default_backend(async_backend=AsyncReplayBackend(replay))
+
+    # One loop per worker, so the async LLM client keeps its connections
+    WORKER_LOOP = asyncio.new_event_loop()
+    WORKER_SETTINGS.update(max_iterations=max_iterations, timeout=timeout)
+
+
+def run_ticket(offset: int, ticket: dict) -> dict:
+    """Run one ticket in a worker; never raises, every outcome becomes a record."""
+    started = time.perf_counter()
+    record = {"offset": offset, "goal": ticket.get("goal")}
+    try:
+        result = WORKER_LOOP.run_until_complete(asyncio.wait_for(
+            run_agent_async(
+                ticket["goal"], dict(ticket.get("runtime_context") or {}),
+                WORKER_SETTINGS["max_iterations"]
+            ),
+            WORKER_SETTINGS["timeout"]
+        ))
+        record.update(result)
+    except asyncio.TimeoutError:
+        record.update(status="TIMEOUT", reason=f"exceeded {WORKER_SETTINGS['timeout']}s")
+    except Exception as e:  # pylint: disable=broad-except
+        record.update(status="ERROR", reason=f"{type(e).__name__}: {e}")
+
+    record["elapsed_s"] = round(time.perf_counter() - started, 4)
+    return record
+
+
+def read_tickets(path: str, skip: set):
+    """
+    Yield (offset, ticket, error) lazily, skipping offsets already done.
+    A line that is not a JSON object comes back with ticket None and the
+    reason in error, so one bad line never stops the drain.
+    """
+    with open(path, encoding="utf-8") as f:
+        for offset, line in enumerate(f):
+            if offset in skip or not line.strip():
+                continue
+            try:
+                ticket = json.loads(line)
+            except ValueError as e:
+                yield offset, None, f"malformed ticket line: {e}"
+                continue
+            if not isinstance(ticket, dict):
+                yield offset, None, f"malformed ticket line: expected an object, got {type(ticket).__name__}"
+                continue
+            yield offset, ticket, None
+
+
+def completed_offsets(path: str) -> set:
+    """
+    Offsets already in an output file. A torn last line (the process died
+    mid-write) is cut off so appending continues on a clean line.
+    """
+    if not os.path.exists(path):
+        return set()
+
+    done = set()
+    good_bytes = 0
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)["offset"])
+            except (ValueError, KeyError):
+                break
+            good_bytes += len(line)
+    with open(path, "r+b") as f:
+        f.truncate(good_bytes)
+    return done
+
+
+def run_batch(input_path: str, output_path: str, workers: int = None, max_pending: int = None,
+              ordered: bool = True, resume: bool = False, **worker_options) -> dict:
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 4
+    skip = completed_offsets(output_path) if resume else set()
+    tickets = read_tickets(input_path, skip)
+
+    counts = {"written": 0, "skipped": len(skip)}
+    pending = set()
+    buffered = {}   # ordered mode: offset -> record, waiting for earlier offsets
+    order = deque() # ordered mode: offsets in submission order
+
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as out, ProcessPoolExecutor(
+        max_workers=workers, initializer=init_worker, initargs=(
+            worker_options.get("law_store"), worker_options.get("law_file"),
+            worker_options.get("replay"), worker_options.get("max_iterations", 5),
+            worker_options.get("timeout"),
+        )
+    ) as pool:
+
+        def write(record):
+            out.write(json.dumps(record, default=str) + "\n")
+            out.flush()
+            counts["written"] += 1
+            counts[record["status"]] = counts.get(record["status"], 0) + 1
+
+        def finish(record):
+            if ordered:
+                buffered[record["offset"]] = record
+            else:
+                write(record)
+
+        exhausted = False
+        while pending or not exhausted:
+            # Backpressure: never more than max_pending tickets in flight or buffered
+            while not exhausted and len(pending) + len(buffered) < max_pending:
+                try:
+                    offset, ticket, error = next(tickets)
+                except StopIteration:
+                    exhausted = True
+                    break
+                if ordered:
+                    order.append(offset)
+                if error is not None:
+                    finish({"offset": offset, "goal": None, "status": "ERROR", "reason": error})
+                    continue
+                pending.add(pool.submit(run_ticket, offset, ticket))
+
+            if pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finish(future.result())
+
+            while ordered and order and order[0] in buffered:
+                write(buffered.pop(order.popleft()))
+
+    return counts
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run JSONL tickets through run_agent on a process pool.")
+    parser.add_argument("input", help="JSONL tickets: {\"goal\", \"runtime_context\"} per line")
+    parser.add_argument("-o", "--output", required=True, help="JSONL results")
+    parser.add_argument("--workers", type=int, help="processes (default: one per core)")
+    parser.add_argument("--max-pending", type=int, help="tickets in flight at once (default: 4 x workers)")
+    parser.add_argument("--timeout", type=float, help="seconds per ticket")
+    parser.add_argument("--max-iterations", type=int, default=5)
+    parser.add_argument("--as-completed", action="store_true", help="write results as they finish")
+    parser.add_argument("--resume", action="store_true", help="skip offsets already in the output")
+    parser.add_argument("--law-store", help="LawStore SQLite file (latest version is loaded)")
+    parser.add_argument("--laws", dest="law_file", help="file of LawScript LAW { ... } blocks")
+    parser.add_argument("--replay", help="LLM cassette to replay instead of calling the model")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    counts = run_batch(
+        args.input, args.output, workers=args.workers, max_pending=args.max_pending,
+        ordered=not args.as_completed, resume=args.resume,
+        law_store=args.law_store, law_file=args.law_file, replay=args.replay,
+        max_iterations=args.max_iterations, timeout=args.timeout,
+    )
+    elapsed = time.perf_counter() - started
+    print(f"{counts['written']} tickets in {elapsed:.1f}s "
+          f"({counts['written'] / elapsed if elapsed else 0:.1f}/s), {counts}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+"""Benchmark: llm_to_action_plan parse throughput over the messy-output corpus."""
+import json
+import time
+
+from ask_bridge import REPAIR_STATS, llm_to_action_plan
+
+CORPUS_PATH = "llm_output_corpus.jsonl"
+
+
+def load_corpus(path: str = CORPUS_PATH) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def bench_parse(corpus: list = None, rounds: int = 2_000) -> dict:
+    corpus = corpus if corpus is not None else load_corpus()
+    parsed = failed = 0
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for entry in corpus:
+            try:
+                llm_to_action_plan(entry["raw"])
+                parsed += 1
+            except (ValueError, KeyError):
+                failed += 1
+    elapsed = time.perf_counter() - start
+
+    return {
+        "outputs": parsed + failed,
+        "parsed": parsed,
+        "failed": failed,
+        "outputs_per_sec": (parsed + failed) / elapsed,
+    }
+
+
+if __name__ == "__main__":
+    result = bench_parse()
+    print(f"{result['outputs']} outputs ({result['failed']} rejected): "
+          f"{result['outputs_per_sec']:,.0f} outputs/s")
+    print(f"local repairs: {dict(REPAIR_STATS)}")
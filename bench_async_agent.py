@@ -0,0 +1,44 @@
+"""Benchmark: tickets/second for run_agent vs run_tickets over a stub LLM."""
+import asyncio
+import time
+
+from agent_runner import run_agent, run_tickets
+from stub_llm import AsyncStubLLMClient, StubLLMClient
+from tracing import set_quiet
+
+LLM_LATENCY = 0.05  # seconds per simulated model round trip
+TICKETS = 200
+
+
+def make_tickets(n: int) -> list:
+    return [
+        (f"Refund order #{i}", {"inventory": 10, "refund_done": False})
+        for i in range(n)
+    ]
+
+
+def bench_sync(n: int) -> float:
+    llm = StubLLMClient(latency=LLM_LATENCY)
+    start = time.perf_counter()
+    for goal, runtime_context in make_tickets(n):
+        run_agent(goal, runtime_context, llm_client=llm, cache=None)
+    return n / (time.perf_counter() - start)
+
+
+def bench_async(n: int, concurrency: int) -> float:
+    llm = AsyncStubLLMClient(latency=LLM_LATENCY)
+    start = time.perf_counter()
+    asyncio.run(run_tickets(make_tickets(n), concurrency, llm_client=llm, cache=None))
+    return n / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    set_quiet(True)
+    rows = [("sync run_agent", bench_sync(TICKETS // 10))]
+    for concurrency in (1, 10, 50, 200):
+        rows.append((f"async x{concurrency}", bench_async(TICKETS, concurrency)))
+    set_quiet(False)
+
+    print(f"LLM latency: {LLM_LATENCY * 1000:.0f} ms")
+    for name, rate in rows:
+        print(f"{name:>16}: {rate:8.1f} tickets/s")
@@ -0,0 +1,76 @@
+"""Benchmark: backend requests and tail latency for concurrent plans, per-call vs micro-batched."""
+import asyncio
+import threading
+import time
+
+from batch_dispatch import register_batch_tool
+from execution_engine import TOOL_CACHE, call_tool_async
+from law_engine import TOOL_REGISTRY
+from tracing import set_quiet
+
+REQUEST_COST = 0.005   # backend latency per request, whatever its size
+CONCURRENT_CALLS = 500
+MAX_IN_FLIGHT = 32     # backend connection limit
+
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def drive(calls: int) -> list:
+    async def one(order_id):
+        start = time.perf_counter()
+        await call_tool_async("check_inventory", {"order_id": order_id})
+        return time.perf_counter() - start
+
+    # Distinct orders, so neither the cache nor single-flight can help
+    return await asyncio.gather(*(one(f"bench-{time.perf_counter_ns()}-{i}") for i in range(calls)))
+
+
+def bench_batch_dispatch(calls: int = CONCURRENT_CALLS) -> dict:
+    requests = [0]
+    backend = threading.BoundedSemaphore(MAX_IN_FLIGHT)
+
+    def single(order_id):
+        with backend:
+            requests[0] += 1
+            time.sleep(REQUEST_COST)
+        return {"status": "success", "inventory": 10}
+
+    def bulk(order_ids):
+        with backend:
+            requests[0] += 1
+            time.sleep(REQUEST_COST)
+        return [{"status": "success", "inventory": 10} for _ in order_ids]
+
+    original = TOOL_REGISTRY["check_inventory"]
+    set_quiet(True)
+    results = {}
+    try:
+        for mode in ("per_call", "batched"):
+            if mode == "batched":
+                register_batch_tool("check_inventory", bulk, arg="order_id")
+            else:
+                TOOL_REGISTRY["check_inventory"] = single
+            requests[0] = 0
+            TOOL_CACHE.invalidate()
+
+            start = time.perf_counter()
+            latencies = asyncio.run(drive(calls))
+            results[mode] = {
+                "backend_requests": requests[0],
+                "seconds": time.perf_counter() - start,
+                "p50_ms": percentile(latencies, 0.50) * 1e3,
+                "p99_ms": percentile(latencies, 0.99) * 1e3,
+            }
+    finally:
+        TOOL_REGISTRY["check_inventory"] = original
+        set_quiet(False)
+    return results
+
+
+if __name__ == "__main__":
+    for mode, row in bench_batch_dispatch().items():
+        print(f"{mode:>9}: {CONCURRENT_CALLS} calls → {row['backend_requests']:>4} backend requests, "
+              f"{row['seconds'] * 1000:6.0f} ms total, p50 {row['p50_ms']:6.1f} ms, p99 {row['p99_ms']:6.1f} ms")
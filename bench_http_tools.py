@@ -0,0 +1,43 @@
+"""Benchmark: HTTP tool calls/second with keep-alive pools vs a fresh connection per call."""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from api_explorer import MOCK_API_CATALOG
+from http_tools import HttpTool, close_pools
+from stub_commerce import StubCommerceServer
+
+CALLS = 2_000
+
+
+def calls_per_sec(tool: HttpTool, calls: int, threads: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda i: tool(order_id=i), range(calls)))
+    return calls / (time.perf_counter() - start)
+
+
+def bench_http_tools(calls: int = CALLS, thread_counts=(1, 8)) -> list:
+    path = "/orders/{order_id}"
+    method = MOCK_API_CATALOG["shopify_like_system"]["endpoints"][path]["method"]
+    rows = []
+    with StubCommerceServer() as server:
+        for threads in thread_counts:
+            for pooled in (False, True):
+                before = server.connections
+                tool = HttpTool(server.base_url, method, path, pooled=pooled)
+                rate = calls_per_sec(tool, calls, threads)
+                rows.append({
+                    "threads": threads,
+                    "pooled": pooled,
+                    "calls_per_sec": rate,
+                    "connections": server.connections - before,
+                })
+                close_pools()
+    return rows
+
+
+if __name__ == "__main__":
+    print(f"{'threads':>8} {'mode':>10} {'calls/s':>10} {'connections':>12}")
+    for row in bench_http_tools():
+        mode = "pooled" if row["pooled"] else "unpooled"
+        print(f"{row['threads']:>8} {mode:>10} {row['calls_per_sec']:>10.0f} {row['connections']:>12}")
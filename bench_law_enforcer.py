@@ -0,0 +1,82 @@
+"""Benchmark: legality-check cost as the law book grows (10 → 100k laws)."""
+import random
+import time
+
+from agent_models import ActionPlan, ActionStep
+from law_compiler import compile_law
+from law_enforcer import add_law, clear_laws, check_plan_legality, check_step_legality
+
+LAW_COUNTS = [10, 100, 1_000, 10_000, 100_000]
+TOOL_COUNT = 500  # distinct tools blocked across the law book
+
+
+def build_law_book(n_laws: int):
+    clear_laws()
+    for i in range(n_laws):
+        add_law(compile_law(f'''
+        LAW {{
+          when field_{i % 50} > {1_000_000 + i}
+          block tool_{i % TOOL_COUNT}
+          because "rule {i}"
+        }}
+        '''))
+
+
+def build_compound_law_book(n_laws: int, seed: int = 3):
+    """
+    Store owners' near-duplicate rules: compound conditions drawn from a small
+    pool of comparisons, so the decision network shares most of its nodes.
+    """
+    rng = random.Random(seed)
+    clear_laws()
+    for i in range(n_laws):
+        a, b, c = rng.sample(range(12), 3)
+        add_law(compile_law(f'''
+        LAW {{
+          when field_{a % 50} > {1_000_000 + a} and field_{b % 50} in 0..{b}
+               or field_{c % 50} == never
+          block tool_{5 + i % 5}, tool_{5 + (i + 1) % 5}
+          because "compound rule {i}"
+        }}
+        '''))
+
+
+def time_per_call(func, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats
+
+
+def bench_legality(law_counts=LAW_COUNTS, repeats: int = 2_000, build=build_law_book) -> list:
+    runtime_context = {f"field_{i}": i for i in range(50)}
+    step = ActionStep(
+        tool="tool_7",
+        input_schema={"order_id": "123"},
+        success_condition="result.get('status') == 'success'"
+    )
+    plan = ActionPlan(
+        goal="bench", preconditions=[], actions=[step], postconditions=[], fallback=[]
+    )
+
+    # Default tracing configuration: spans on, per-law timing off
+    rows = []
+    for n in law_counts:
+        build(n)
+        rows.append({
+            "laws": n,
+            "plan_check_us": time_per_call(
+                lambda: check_plan_legality(plan, runtime_context), repeats) * 1e6,
+            "step_check_us": time_per_call(
+                lambda: check_step_legality(step, runtime_context), repeats) * 1e6,
+        })
+    clear_laws()
+    return rows
+
+
+if __name__ == "__main__":
+    for title, build in (("simple laws", build_law_book), ("compound laws", build_compound_law_book)):
+        print(f"\n{title}")
+        print(f"{'laws':>8} {'plan check (us)':>16} {'step check (us)':>16}")
+        for row in bench_legality(build=build):
+            print(f"{row['laws']:>8} {row['plan_check_us']:>16.2f} {row['step_check_us']:>16.2f}")
@@ -0,0 +1,131 @@
+"""Benchmark: bytes per in-flight ticket (plan + steps) and per Law, legacy dataclasses vs compact models."""
+import hashlib
+import json
+import tracemalloc
+from dataclasses import dataclass, field as dataclass_field
+from typing import Any, Callable, Dict, List, Optional
+
+import tracing
+from ask_bridge import llm_to_action_plan
+from law_compiler import attach_expression, compile_law
+from law_language import format_condition, parse_law_script
+
+TICKETS = 20_000
+LAW_COPIES = 10_000   # one Law per tenant per rule, as tenants load them
+
+LAW_TEXT = '''
+LAW {
+  when inventory <= 0
+  block refund_order
+  because "Cannot refund when inventory is unknown or zero"
+}
+'''
+
+
+# ---- LEGACY MODELS (the plain @dataclass shapes these replaced) ----
+@dataclass
+class LegacyActionStep:
+    tool: str
+    input_schema: Dict[str, Any]
+    success_condition: str
+
+
+@dataclass
+class LegacyActionPlan:
+    goal: str
+    preconditions: List[str]
+    actions: List[LegacyActionStep]
+    postconditions: List[str]
+    fallback: List[LegacyActionStep]
+
+
+@dataclass
+class LegacyLaw:
+    id: str
+    condition: str
+    block_actions: List[str]
+    reason: str
+    field: Optional[str] = None
+    operator: Optional[str] = None
+    value: Any = None
+    predicate: Optional[Callable[[Any], bool]] = dataclass_field(default=None, repr=False, compare=False)
+    expression: Optional[tuple] = dataclass_field(default=None, repr=False)
+
+
+def legacy_action_plan(raw_text: str) -> LegacyActionPlan:
+    """What adapt_native_actions used to build: fresh strings and empty lists per plan."""
+    plan_dict = json.loads(raw_text)
+    return LegacyActionPlan(
+        goal=plan_dict["goal"],
+        preconditions=[],
+        actions=[
+            LegacyActionStep(tool=a["tool"], input_schema=a["inputs"], success_condition=a["success_condition"])
+            for a in plan_dict["actions"]
+        ],
+        postconditions=[],
+        fallback=[]
+    )
+
+
+def legacy_compile_law(text: str) -> LegacyLaw:
+    parsed = parse_law_script(text)
+    law = LegacyLaw(
+        id=hashlib.sha256(text.encode()).hexdigest()[:8],
+        condition=format_condition(parsed["condition"]),
+        block_actions=parsed["tools"],
+        reason=parsed["reason"]
+    )
+    return attach_expression(law, parsed["condition"])
+
+
+def ticket_output(i: int) -> str:
+    return json.dumps({
+        "goal": f"Refund order {i}",
+        "actions": [
+            {"tool": "check_inventory", "inputs": {"order_id": i},
+             "success_condition": "result['inventory'] > 0"},
+            {"tool": "verify_order", "inputs": {"order_id": i},
+             "success_condition": "result.get('status') == 'success'"},
+            {"tool": "refund_order", "inputs": {"order_id": i},
+             "success_condition": "result.get('status') == 'success'"},
+        ],
+    })
+
+
+def measure(build) -> int:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del kept
+    return sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+
+def bench_memory(tickets: int = TICKETS, law_copies: int = LAW_COPIES) -> dict:
+    outputs = [ticket_output(i) for i in range(tickets)]
+    tracing.set_quiet(True)
+    try:
+        results = {}
+        for mode, parse, compile_one in (
+            ("legacy", legacy_action_plan, legacy_compile_law),
+            ("compact", llm_to_action_plan, compile_law),
+        ):
+            plan_bytes = measure(lambda: [parse(text) for text in outputs])
+            law_bytes = measure(lambda: [compile_one(LAW_TEXT) for _ in range(law_copies)])
+            results[mode] = {
+                "bytes_per_ticket": plan_bytes / tickets,
+                "bytes_per_law": law_bytes / law_copies,
+            }
+    finally:
+        tracing.set_quiet(False)
+    return results
+
+
+if __name__ == "__main__":
+    results = bench_memory()
+    for mode, row in results.items():
+        print(f"{mode:>8}: {row['bytes_per_ticket']:7.0f} bytes per in-flight ticket, "
+              f"{row['bytes_per_law']:6.0f} bytes per Law")
+    saved = 1 - results["compact"]["bytes_per_ticket"] / results["legacy"]["bytes_per_ticket"]
+    print(f"compact plans use {saved:.0%} less memory per ticket")
@@ -0,0 +1,42 @@
+"""Benchmark: record tickets against a slow stub LLM, then replay the cassette at speed."""
+import os
+import tempfile
+import time
+
+from agent_runner import run_agent
+from law_enforcer import clear_laws
+from llm_backends import Cassette, RecordingBackend, ReplayBackend
+from stub_llm import StubLLMClient
+from tracing import set_quiet
+
+LLM_LATENCY = 0.05
+TICKETS = 100
+
+
+def run(llm, tickets: int) -> float:
+    start = time.perf_counter()
+    for i in range(tickets):
+        run_agent(f"Refund order #{i}", {"inventory": 10, "refund_done": False}, llm_client=llm, cache=None)
+    return tickets / (time.perf_counter() - start)
+
+
+def bench_replay(tickets: int = TICKETS, speedups=(None, 1_000)) -> dict:
+    clear_laws()
+    set_quiet(True)
+    with tempfile.TemporaryDirectory() as tmp:
+        cassette = Cassette(os.path.join(tmp, "bench.cassette"))
+        results = {"record": run(RecordingBackend(StubLLMClient(latency=LLM_LATENCY), cassette), tickets)}
+        for speedup in speedups:
+            label = f"replay x{speedup}" if speedup else "replay (no latency)"
+            results[label] = run(ReplayBackend(cassette, speedup=speedup), tickets)
+        results["cassette_kb"] = os.path.getsize(cassette.path) / 1024
+        cassette.close()
+    set_quiet(False)
+    return results
+
+
+if __name__ == "__main__":
+    results = bench_replay()
+    print(f"cassette: {results.pop('cassette_kb'):.0f} KB for {TICKETS} tickets")
+    for name, rate in results.items():
+        print(f"{name:>20}: {rate:10.1f} tickets/s")
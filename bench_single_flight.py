@@ -0,0 +1,57 @@
+"""Benchmark: backend calls for duplicate concurrent tickets, with and without coalescing."""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from execution_engine import TOOL_CACHE, TOOL_FLIGHTS, call_tool
+from law_engine import TOOL_REGISTRY
+from tracing import set_quiet
+
+BACKEND_LATENCY = 0.02
+ORDERS = 50
+DUPLICATES = 3   # a customer who wrote in three times
+
+
+def bench_single_flight(orders: int = ORDERS, duplicates: int = DUPLICATES) -> dict:
+    backend_calls = [0]
+    original = TOOL_REGISTRY["check_inventory"]
+
+    def slow_inventory(order_id):
+        backend_calls[0] += 1
+        time.sleep(BACKEND_LATENCY)
+        return {"status": "success", "inventory": 10}
+
+    TOOL_REGISTRY["check_inventory"] = slow_inventory
+    set_quiet(True)
+    results = {}
+    try:
+        for coalesce in (False, True):
+            TOOL_CACHE.invalidate()
+            TOOL_CACHE.flights = TOOL_FLIGHTS if coalesce else None
+            backend_calls[0] = 0
+            calls = [i % orders for i in range(orders * duplicates)]
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+                list(pool.map(lambda order_id: call_tool("check_inventory", {"order_id": order_id}), calls))
+            results["coalesced" if coalesce else "independent"] = {
+                "tool_calls": len(calls),
+                "backend_calls": backend_calls[0],
+                "seconds": time.perf_counter() - start,
+            }
+    finally:
+        TOOL_REGISTRY["check_inventory"] = original
+        TOOL_CACHE.flights = TOOL_FLIGHTS
+        TOOL_CACHE.invalidate()
+        set_quiet(False)
+
+    results["coalescing_ratio"] = TOOL_FLIGHTS.stats()["coalescing_ratio"]
+    return results
+
+
+if __name__ == "__main__":
+    results = bench_single_flight()
+    ratio = results.pop("coalescing_ratio")
+    for mode, row in results.items():
+        print(f"{mode:>12}: {row['tool_calls']} tool calls → {row['backend_calls']} backend calls "
+              f"in {row['seconds'] * 1000:.0f} ms")
+    print(f"coalescing ratio: {ratio:.2f}")
@@ -0,0 +1,57 @@
+"""Benchmark: time-to-verdict and tokens paid for blocked plans, streamed vs whole-text."""
+import time
+
+import tracing
+from agent_runner import call_llm, call_llm_stream
+from ask_bridge import llm_to_action_plan
+from law_compiler import compile_law
+from law_enforcer import add_law, clear_laws, validate_plan
+from law_engine import LawViolation
+from stub_llm import StubLLMClient
+
+# The first step is illegal; everything after it is wasted output
+BLOCKED_PLAN = {
+    "plan": [{"action": "refund_order", "order_id": 123}]
+    + [{"action": "verify_order", "order_id": 123, "note": "double-check"} for _ in range(8)]
+}
+
+
+def verdict(stream: bool, client: StubLLMClient, runtime_context: dict) -> float:
+    start = time.perf_counter()
+    try:
+        if stream:
+            call_llm_stream("Refund order #123", runtime_context, client, cache=None)
+        else:
+            raw = call_llm("Refund order #123", runtime_context, client, cache=None)
+            validate_plan(llm_to_action_plan(raw), runtime_context)
+    except LawViolation:
+        pass
+    return time.perf_counter() - start
+
+
+def bench_streaming(rounds: int = 20, chunk_delay: float = 0.002) -> dict:
+    clear_laws()
+    add_law(compile_law('LAW { when inventory < 5 block refund_order because "Low stock" }'))
+    tracing.set_quiet(True)
+
+    results = {}
+    for stream in (False, True):
+        client = StubLLMClient(plan=BLOCKED_PLAN, chunk_size=8, chunk_delay=chunk_delay)
+        total_chunks = -(-len(client.plan_text) // client.chunk_size)
+        # A whole-text call waits for (and pays for) every chunk before any check
+        client.latency = 0.0 if stream else chunk_delay * total_chunks
+        elapsed = sum(verdict(stream, client, {"inventory": 2}) for _ in range(rounds))
+        chunks = client.chunks_sent if stream else rounds * total_chunks
+        results["stream" if stream else "whole"] = {
+            "ms_to_verdict": elapsed / rounds * 1e3,
+            "chunks_per_plan": chunks / rounds,
+        }
+
+    tracing.set_quiet(False)
+    return results
+
+
+if __name__ == "__main__":
+    for mode, row in bench_streaming().items():
+        print(f"{mode:>6}: {row['ms_to_verdict']:6.1f} ms to verdict, "
+              f"{row['chunks_per_plan']:5.1f} chunks paid per blocked plan")
@@ -0,0 +1,30 @@
+"""Benchmark: per-step cost of compiled success conditions against a bare dict lookup."""
+import timeit
+
+from success_conditions import compile_success_condition
+
+STEPS = 1_000_000
+CONDITIONS = {
+    "status": ("result.get('status') == 'success'", {"status": "success"}),
+    "inventory": ("result['inventory'] > 0", {"status": "success", "inventory": 10}),
+    "compound": ("result.get('status') == 'success' and 0 < result['inventory'] <= 100",
+                 {"status": "success", "inventory": 10}),
+}
+
+
+def bench_success_conditions(steps: int = STEPS) -> dict:
+    result = {"status": "success"}
+    baseline = timeit.timeit(lambda: result.get("status") == "success", number=steps)
+
+    rows = {"dict_lookup": {"ns_per_step": baseline / steps * 1e9}}
+    for name, (condition, result) in CONDITIONS.items():
+        # Lookup by text on every step, as apply_step_result does
+        seconds = timeit.timeit(lambda: compile_success_condition(condition)(result), number=steps)
+        rows[name] = {"ns_per_step": seconds / steps * 1e9, "vs_dict_lookup": seconds / baseline}
+    return rows
+
+
+if __name__ == "__main__":
+    for name, row in bench_success_conditions().items():
+        ratio = f"  ({row['vs_dict_lookup']:.1f}x dict lookup)" if "vs_dict_lookup" in row else ""
+        print(f"{name:>12}: {row['ns_per_step']:6.0f} ns/step{ratio}")
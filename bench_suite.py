@@ -0,0 +1,145 @@
+"""
+Self-contained benchmark suite: stub LLM + the mock tools in law_engine,
+no OpenAI key needed.
+
+    python bench_suite.py                      # run, compare to bench_baseline.json
+    python bench_suite.py --out results.json   # also write this run's numbers
+    python bench_suite.py --save-baseline      # accept this run as the new baseline
+
+Exits with status 1 when any metric regressed by more than --tolerance.
+Metrics ending in _per_s are better higher; metrics ending in _us better lower.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+import tracing
+from agent_models import ActionPlan, ActionStep
+from agent_runner import run_agent
+from bench_ask_bridge import bench_parse
+from bench_law_enforcer import bench_legality, build_compound_law_book, time_per_call
+from execution_engine import execute_plan
+from law_enforcer import clear_laws
+from stub_llm import StubLLMClient
+
+BASELINE_PATH = "bench_baseline.json"
+DEFAULT_TOLERANCE = 0.25   # allowed relative slowdown before a metric counts as regressed
+
+SUITE_LAW_COUNTS = [10, 1_000, 10_000]
+PLAN_STEPS = 20
+
+
+def bench_run_agent(tickets: int = 300) -> dict:
+    clear_laws()
+    llm = StubLLMClient()
+    start = time.perf_counter()
+    for i in range(tickets):
+        run_agent(f"Refund order #{i}", {"inventory": 10, "refund_done": False},
+                  llm_client=llm, cache=None)
+    elapsed = time.perf_counter() - start
+    # One model round trip per iteration (the stub plan never needs repair)
+    return {"run_agent_iterations_per_s": llm.calls / elapsed}
+
+
+def bench_execute_plan(repeats: int = 500) -> dict:
+    clear_laws()
+    steps = [
+        ActionStep(
+            tool="verify_order" if i % 2 else "check_inventory",
+            input_schema={"order_id": i},
+            success_condition="result.get('status') == 'success'"
+        )
+        for i in range(PLAN_STEPS)
+    ]
+    plan = ActionPlan(goal="bench", preconditions=[], actions=steps, postconditions=[], fallback=[])
+    per_plan = time_per_call(lambda: execute_plan(plan, {"inventory": 10}), repeats)
+    return {"execute_plan_step_us": per_plan / PLAN_STEPS * 1e6}
+
+
+def bench_legality_scaling() -> dict:
+    metrics = {}
+    for title, build in (("simple", None), ("compound", build_compound_law_book)):
+        kwargs = {"build": build} if build else {}
+        for row in bench_legality(SUITE_LAW_COUNTS, repeats=1_000, **kwargs):
+            metrics[f"legality_{title}_{row['laws']}_laws_step_us"] = row["step_check_us"]
+    return metrics
+
+
+def bench_parsing() -> dict:
+    return {"parse_outputs_per_s": bench_parse(rounds=500)["outputs_per_sec"]}
+
+
+SUITE = [bench_run_agent, bench_execute_plan, bench_legality_scaling, bench_parsing]
+
+
+def run_suite() -> dict:
+    tracing.set_quiet(True)
+    metrics = {}
+    try:
+        for bench in SUITE:
+            metrics.update(bench())
+    finally:
+        tracing.set_quiet(False)
+        clear_laws()
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "metrics": metrics,
+    }
+
+
+def compare(metrics: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list:
+    """One row per metric in both runs: (name, baseline, current, relative change, regressed)."""
+    rows = []
+    for name, current in metrics.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        # Positive change always means "worse"
+        change = (base - current) / base if name.endswith("_per_s") else (current - base) / base
+        rows.append((name, base, current, change, change > tolerance))
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--out", help="write this run's results as JSON")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    result = run_suite()
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+        print(f"saved baseline → {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["metrics"]
+    except FileNotFoundError:
+        print(f"no baseline at {args.baseline}; run with --save-baseline first")
+        return 0
+
+    regressed = 0
+    print(f"{'metric':<42} {'baseline':>12} {'current':>12} {'worse by':>9}")
+    for name, base, current, change, bad in compare(result["metrics"], baseline, args.tolerance):
+        regressed += bad
+        print(f"{name:<42} {base:>12.2f} {current:>12.2f} {change:>8.0%}{'  ❌' if bad else ''}")
+
+    if regressed:
+        print(f"\n{regressed} metric(s) regressed by more than {args.tolerance:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
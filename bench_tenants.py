@@ -0,0 +1,104 @@
+"""Benchmark: memory and lookup cost of per-tenant law books at 10k tenants."""
+import random
+import time
+import tracemalloc
+
+from agent_models import ActionStep
+from law_compiler import compile_law
+from law_enforcer import (
+    TENANT_BOOKS, check_step_legality, install_tenant_law_book
+)
+
+TENANTS = 10_000
+COMMON_RULES = 40      # distinct rules storefronts pick from
+RULES_PER_TENANT = 8
+
+TOOLS = ["refund_order", "check_inventory", "verify_order", "cancel_order"]
+
+
+def rule_texts() -> list:
+    return [
+        f'''
+        LAW {{
+          when field_{i % 10} > {100 + i}
+          block {TOOLS[i % len(TOOLS)]}
+          because "Store rule {i}"
+        }}
+        '''
+        for i in range(COMMON_RULES)
+    ]
+
+
+def tenant_rule_sets(rng: random.Random) -> list:
+    # Most stores stick to a handful of popular templates
+    templates = [sorted(rng.sample(range(COMMON_RULES), RULES_PER_TENANT)) for _ in range(50)]
+    return [rng.choice(templates) for _ in range(TENANTS)]
+
+
+def measure(build) -> tuple:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    kept = build()
+    elapsed = time.perf_counter() - start
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return kept, size, elapsed
+
+
+def bench_tenants() -> dict:
+    rng = random.Random(7)
+    texts = rule_texts()
+    rule_sets = tenant_rule_sets(rng)
+
+    # Before: every tenant compiles and indexes its own copy of every rule
+    def unshared():
+        books = []
+        for rules in rule_sets:
+            laws = [compile_law(texts[i]) for i in rules]
+            index = {}
+            for law in laws:
+                for tool in law.block_actions:
+                    index.setdefault(tool, []).append(law)
+            books.append((laws, index))
+        return books
+
+    # After: interned laws and content-addressed books
+    def shared():
+        compiled = [compile_law(t) for t in texts]
+        for tenant, rules in enumerate(rule_sets):
+            install_tenant_law_book(f"store-{tenant}", [compiled[i] for i in rules])
+        return TENANT_BOOKS
+
+    _, unshared_bytes, unshared_s = measure(unshared)
+    _, shared_bytes, shared_s = measure(shared)
+
+    step = ActionStep(tool="refund_order", input_schema={}, success_condition="")
+    contexts = [
+        {"tenant_id": f"store-{rng.randrange(TENANTS)}", **{f"field_{i}": 0 for i in range(10)}}
+        for _ in range(10_000)
+    ]
+    start = time.perf_counter()
+    for runtime_context in contexts:
+        check_step_legality(step, runtime_context)
+    lookup_us = (time.perf_counter() - start) / len(contexts) * 1e6
+
+    return {
+        "tenants": TENANTS,
+        "distinct_books": len({id(book) for book in TENANT_BOOKS.values()}),
+        "unshared_mb": unshared_bytes / 1e6,
+        "shared_mb": shared_bytes / 1e6,
+        "unshared_build_s": unshared_s,
+        "shared_build_s": shared_s,
+        "tenant_check_us": lookup_us,
+    }
+
+
+if __name__ == "__main__":
+    result = bench_tenants()
+    print(f"{result['tenants']} tenants → {result['distinct_books']} distinct law books")
+    print(f"memory: {result['unshared_mb']:.1f} MB per-tenant copies vs "
+          f"{result['shared_mb']:.1f} MB shared")
+    print(f"build:  {result['unshared_build_s']:.2f} s vs {result['shared_build_s']:.2f} s")
+    print(f"tenant step check: {result['tenant_check_us']:.2f} us")
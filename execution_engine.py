@@ -1,34 +1,123 @@
 """Executes ActionPlans while enforcing laws and updating world state."""
-from agent_models import ActionPlan
-from law_enforcer import check_plan_legality, check_step_legality
-from law_engine import TOOL_REGISTRY, LawViolation
+import asyncio
+import contextvars
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+
+from agent_models import ActionPlan, ActionStep
+from law_enforcer import check_step_legality, validate_plan
+from law_engine import READ_ONLY_TOOLS, TOOL_EFFECTS, TOOL_REGISTRY, LawViolation
+from single_flight import SingleFlight
+from success_conditions import compile_success_condition
+from tool_cache import ToolResultCache
+from tracing import register_gauge, span
+
+# Shared pool for running independent read-only steps side by side
+STEP_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="ask-step")
+
+# Concurrent identical reads (duplicate tickets for one order) share one backend call
+TOOL_FLIGHTS = SingleFlight()
+register_gauge(
+    "ask_tool_coalescing_ratio", "Share of read-only tool misses that joined an in-flight call.",
+    lambda: TOOL_FLIGHTS.stats()["coalescing_ratio"]
+)
+
+# Read-only results are reused across steps, fallbacks and agent iterations
+TOOL_CACHE = ToolResultCache(ttl=30.0, flights=TOOL_FLIGHTS)
+register_gauge(
+    "ask_tool_cache_hit_rate", "Share of read-only tool calls served from cache.",
+    lambda: TOOL_CACHE.stats()["hit_rate"]
+)
+
+
+def call_tool(tool_name: str, inputs: dict):
+    """Every tool call goes through the result cache."""
+    with span("tool_call", tool=tool_name):
+        return TOOL_CACHE.call(tool_name, inputs)
 
 def run_fallback(plan: ActionPlan):
     """Run fallback actions when a law is violated or a step fails."""
     for step in plan.fallback:
-        tool_func = TOOL_REGISTRY[step.tool]
-        tool_func(**step.input_schema)
+        call_tool(step.tool, step.input_schema)
+
 
+def apply_step_result(step: ActionStep, result: dict, runtime_context: dict):
+    """Update the world from a tool result and verify the step succeeded."""
+    # ---- WORLD UPDATE (keep this) ----
+    if step.tool in TOOL_EFFECTS and result.get("status") == "success":
+        runtime_context.update(TOOL_EFFECTS[step.tool])
 
-def execute_plan(plan: ActionPlan, runtime_context: dict):
-    """Execute an ActionPlan while enforcing laws and updating state."""
+    # Verify success against the step's own condition (compiled once per text)
     try:
-        # Check if plan is legal
-        check_plan_legality(plan, runtime_context)
+        succeeded = compile_success_condition(step.success_condition)
+    except ValueError as e:
+        raise RuntimeError(f"Step failed: {e}") from e
+    if not succeeded(result):
+        raise RuntimeError("Step failed")
 
-        # Run each legal action
-        for step in plan.actions:
-            check_step_legality(step, runtime_context)
-            tool_func = TOOL_REGISTRY[step.tool]
-            result = tool_func(**step.input_schema)
 
-            # ---- WORLD UPDATE (keep this) ----
-            if step.tool == "refund_order" and result.get("status") == "success":
-                runtime_context["refund_done"] = True
+def plan_stages(actions: list) -> list:
+    """
+    Split a plan into stages that respect dependencies:
+    consecutive read-only steps share a stage, every write step gets its own,
+    so writes keep their order after everything proposed before them.
+    """
+    stages = []
+    for step in actions:
+        if step.tool in READ_ONLY_TOOLS and stages and stages[-1][0].tool in READ_ONLY_TOOLS:
+            stages[-1].append(step)
+        else:
+            stages.append([step])
+    return stages
+
+
+def run_stage(stage: list, runtime_context: dict):
+    """Run one stage; several read-only steps go to the thread pool at once."""
+    if len(stage) == 1:
+        step = stage[0]
+        check_step_legality(step, runtime_context)
+        result = call_tool(step.tool, step.input_schema)
+        apply_step_result(step, result, runtime_context)
+        return
+
+    # Read-only steps don't change the world, so they all see this context
+    for step in stage:
+        check_step_legality(step, runtime_context)
 
-            # Verify success
-            if not result.get("status") == "success":
-                raise RuntimeError("Step failed")
+    futures = [
+        # copy_context keeps each tool span nested under the current trace
+        STEP_POOL.submit(contextvars.copy_context().run, call_tool, step.tool, step.input_schema)
+        for step in stage
+    ]
+    for step, future in zip(stage, futures):
+        apply_step_result(step, future.result(), runtime_context)
+
+
+def execute_plan(plan: ActionPlan, runtime_context: dict, parallel: bool = False):
+    """
+    Execute an ActionPlan while enforcing laws and updating state.
+    With parallel=True, independent read-only steps run concurrently.
+    """
+    # Reject illegal plans before any tool runs: nothing to undo, no fallback
+    try:
+        validate_plan(plan, runtime_context)
+    except LawViolation as lv:
+        return {
+            "status": "BLOCKED",
+            "reason": str(lv),
+            "context": runtime_context
+        }
+
+    try:
+        # Run each legal action
+        if parallel:
+            for stage in plan_stages(plan.actions):
+                run_stage(stage, runtime_context)
+        else:
+            for step in plan.actions:
+                check_step_legality(step, runtime_context)
+                result = call_tool(step.tool, step.input_schema)
+                apply_step_result(step, result, runtime_context)
 
         return {
             "status": "SUCCESS",
@@ -49,3 +138,73 @@ def execute_plan(plan: ActionPlan, runtime_context: dict):
             "status": "FAILED",
             "context": runtime_context
         }
+
+
+async def call_tool_async(tool_name: str, inputs: dict):
+    """Await async tools directly; run blocking ones on a worker thread."""
+    tool_func = TOOL_REGISTRY[tool_name]
+    if not inspect.iscoroutinefunction(tool_func):
+        # Batched tools can be awaited without parking a thread per call
+        tool_func = getattr(tool_func, "call_async", None)
+        if tool_func is None:
+            return await asyncio.to_thread(call_tool, tool_name, inputs)
+
+    with span("tool_call", tool=tool_name):
+        key, result = TOOL_CACHE.lookup(tool_name, inputs)
+        if result is not None:
+            return result
+
+        generation = TOOL_CACHE.invalidations
+
+        async def run():
+            fresh = await tool_func(**inputs)
+            TOOL_CACHE.store(key, tool_name, inputs, fresh, generation)
+            return fresh
+
+        if key is None:
+            return await run()
+        return await TOOL_FLIGHTS.do_async(TOOL_CACHE.flight_key(key), run)
+
+
+async def run_fallback_async(plan: ActionPlan):
+    """Async version of run_fallback."""
+    for step in plan.fallback:
+        await call_tool_async(step.tool, step.input_schema)
+
+
+async def execute_plan_async(plan: ActionPlan, runtime_context: dict):
+    """Async version of execute_plan: tool calls never block the event loop."""
+    try:
+        validate_plan(plan, runtime_context)
+    except LawViolation as lv:
+        return {
+            "status": "BLOCKED",
+            "reason": str(lv),
+            "context": runtime_context
+        }
+
+    try:
+        for step in plan.actions:
+            check_step_legality(step, runtime_context)
+            result = await call_tool_async(step.tool, step.input_schema)
+            apply_step_result(step, result, runtime_context)
+
+        return {
+            "status": "SUCCESS",
+            "context": runtime_context
+        }
+
+    except LawViolation as lv:
+        await run_fallback_async(plan)
+        return {
+            "status": "BLOCKED",
+            "reason": str(lv),
+            "context": runtime_context
+        }
+
+    except RuntimeError:
+        await run_fallback_async(plan)
+        return {
+            "status": "FAILED",
+            "context": runtime_context
+        }
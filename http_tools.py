@@ -0,0 +1,248 @@
+"""
+HTTP tool adapter: turns the endpoint catalog from api_explorer.discover_api
+into real tools in TOOL_REGISTRY.
+
+    api = discover_api("shopify_like_system")
+    register_http_tools(api, "http://commerce.internal:8080",
+                        tool_names={"/refunds": "refund_order"},
+                        timeouts={"/refunds": 10.0})
+
+Each host gets a pool of keep-alive http.client connections shared by all of
+its tools. Path parameters are percent-encoded, so an input can never change
+which endpoint is called. Every endpoint has its own timeout. Transient failures
+(connection errors, timeouts, 429/5xx) are retried with jittered exponential
+backoff, though only idempotent methods are retried once the request may have
+reached the server. A POST is only retried when a reused keep-alive
+connection turns out to be stale.
+"""
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import quote, urlencode, urlsplit
+
+from law_engine import READ_ONLY_TOOLS, TOOL_REGISTRY
+from tracing import register_gauge
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS"})
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+# Raised before anything is sent (bad URL, unencodable header): retrying cannot help
+LOCAL_ERRORS = (http.client.InvalidURL, ValueError)
+
+DEFAULT_TIMEOUT = 5.0
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.05    # seconds; attempt n waits up to BACKOFF * 2**n
+
+
+class ConnectionPool:
+    """Idle keep-alive connections to one host, reused most-recent first."""
+
+    def __init__(self, scheme: str, host: str, port: int, max_idle: int = 16):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.max_idle = max_idle
+        self.opened = 0
+        self.reused = 0
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float):
+        """(connection, reused?) — an idle connection if there is one, else a new one."""
+        with self._lock:
+            if self._idle:
+                conn = self._idle.pop()
+                self.reused += 1
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+            self.opened += 1
+
+        factory = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        return factory(self.host, self.port, timeout=timeout), False
+
+    def release(self, conn, reusable: bool = True):
+        with self._lock:
+            if reusable and len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def stats(self) -> dict:
+        return {"opened": self.opened, "reused": self.reused, "idle": len(self._idle)}
+
+
+# (scheme, host, port) -> ConnectionPool, shared by every tool on that host
+POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def pool_key(base_url: str) -> tuple:
+    parts = urlsplit(base_url)
+    return parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == "https" else 80)
+
+
+def pool_for(base_url: str) -> ConnectionPool:
+    key = pool_key(base_url)
+    with _POOLS_LOCK:
+        if key not in POOLS:
+            POOLS[key] = ConnectionPool(*key)
+        return POOLS[key]
+
+
+def close_pools():
+    with _POOLS_LOCK:
+        pools = list(POOLS.values())
+        POOLS.clear()
+    for pool in pools:
+        pool.close()
+
+
+def connection_reuse_rate() -> float:
+    opened = sum(pool.opened for pool in POOLS.values())
+    reused = sum(pool.reused for pool in POOLS.values())
+    return reused / (opened + reused) if opened + reused else 0.0
+
+
+register_gauge(
+    "ask_http_connection_reuse_rate", "Share of HTTP tool requests sent on a kept-alive connection.",
+    connection_reuse_rate
+)
+
+
+class HttpTool:
+    """
+    One catalog endpoint as a tool: path parameters are filled from the tool
+    inputs, the rest go in the query string (GET) or the JSON body.
+    Always returns a dict with "status"; failures never raise.
+    """
+
+    def __init__(self, base_url: str, method: str, path: str, timeout: float = DEFAULT_TIMEOUT,
+                 retries: int = DEFAULT_RETRIES, backoff: float = DEFAULT_BACKOFF, pooled: bool = True):
+        self.base_path = urlsplit(base_url).path.rstrip("/")
+        self.method = method.upper()
+        self.path = path
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        # Unpooled: a private pool that keeps nothing, i.e. a fresh connection per call
+        self.pool = pool_for(base_url) if pooled else ConnectionPool(*pool_key(base_url), max_idle=0)
+        self.retried = 0
+
+    def __call__(self, **inputs):
+        try:
+            target, body = self._request_parts(inputs)
+        except KeyError as e:
+            return {"status": "error", "error": f"missing path parameter {e.args[0]}"}
+
+        attempt = 0
+        while True:
+            outcome = self._send(target, body)
+            retry = outcome.pop("_retry", False)
+            if not retry or attempt >= self.retries:
+                return outcome
+            # Full jitter keeps a burst of failing callers from retrying in lockstep
+            time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+            attempt += 1
+            self.retried += 1
+
+    def _request_parts(self, inputs: dict):
+        params = {k: v for k, v in inputs.items() if "{" + k + "}" not in self.path}
+        # Each value is one path segment: "../x", "/", "?" and "#" are escaped, not interpreted
+        target = self.base_path + self.path.format(**{k: quote(str(v), safe="") for k, v in inputs.items()})
+        if self.method in ("GET", "HEAD", "DELETE"):
+            return (target + "?" + urlencode(params) if params else target), None
+        return target, json.dumps(params).encode()
+
+    def _send(self, target: str, body):
+        conn, reused = self.pool.acquire(self.timeout)
+        headers = {"Accept": "application/json", "Connection": "keep-alive"}
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+
+        try:
+            conn.request(self.method, target, body=body, headers=headers)
+            response = conn.getresponse()
+            raw = response.read()
+        except STALE_CONNECTION_ERRORS as e:
+            conn.close()
+            # A reused keep-alive connection the server already dropped never saw the request
+            retry = reused or self.method in IDEMPOTENT_METHODS
+            return {"status": "error", "error": f"{type(e).__name__}: {e}", "_retry": retry}
+        except LOCAL_ERRORS as e:
+            conn.close()
+            return {"status": "error", "error": f"{type(e).__name__}: {e}"}
+        except (OSError, http.client.HTTPException) as e:   # refused, timed out, garbled
+            conn.close()
+            return {"status": "error", "error": f"{type(e).__name__}: {e}",
+                    "_retry": self.method in IDEMPOTENT_METHODS}
+
+        self.pool.release(conn, reusable=not response.will_close)
+        return self._result(response.status, raw)
+
+    def _result(self, status: int, raw: bytes) -> dict:
+        try:
+            data = json.loads(raw) if raw else {}
+        except ValueError:
+            data = {"body": raw.decode(errors="replace")}
+        if not isinstance(data, dict):
+            data = {"data": data}
+
+        if 200 <= status < 300:
+            data.setdefault("status", "success")
+            return data
+        return {
+            "status": "error", "http_status": status, "body": data,
+            "_retry": status in RETRY_STATUSES and self.method in IDEMPOTENT_METHODS,
+        }
+
+
+def default_tool_name(method: str, path: str) -> str:
+    """GET /inventory/{sku} → get_inventory"""
+    words = [p for p in path.strip("/").split("/") if p and not p.startswith("{")]
+    return "_".join([method.lower()] + words)
+
+
+def register_http_tools(api, base_url: str = None, tool_names: dict = None, timeouts: dict = None,
+                        retries: int = DEFAULT_RETRIES, pooled: bool = True) -> dict:
+    """
+    Register one HttpTool per endpoint of a discover_api catalog (the mock
+    dict or an OpenAPI ApiCatalog) and return {tool name: HttpTool}.
+    `tool_names` / `timeouts` are keyed by path or operationId; a catalog entry
+    may also carry its own "tool" and "timeout". GET tools are marked
+    read-only, so their results can be cached and run in parallel; any other
+    method clears that mark from a name it reuses.
+    """
+    tool_names = tool_names or {}
+    timeouts = timeouts or {}
+    base_url = base_url or getattr(api, "base_url", "")
+    entries = api.entries() if hasattr(api, "entries") else api["endpoints"].items()
+    tools = {}
+
+    for path, info in entries:
+        method = info["method"].upper()
+        key = info.get("tool")
+        name = tool_names.get(key) or tool_names.get(path) or key or default_tool_name(method, path)
+        tool = HttpTool(
+            base_url, method, path,
+            timeout=timeouts.get(key, timeouts.get(path, info.get("timeout", DEFAULT_TIMEOUT))),
+            retries=retries, pooled=pooled
+        )
+        TOOL_REGISTRY[name] = tool
+        if method == "GET":
+            READ_ONLY_TOOLS.add(name)
+        else:
+            # The name may have been a GET tool before this catalog
+            READ_ONLY_TOOLS.discard(name)
+        tools[name] = tool
+
+    return tools
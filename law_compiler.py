@@ -1,8 +1,59 @@
-from law_language import parse_law_script
+from law_language import format_condition, parse_condition, parse_law_script, parse_number
 from law_models import Law
 import hashlib
 
 
+def parse_literal(op: str, value: str):
+    """Ordering operators compare numbers, equality compares strings."""
+    if op in (">", "<", ">=", "<="):
+        return parse_number(value)
+    return value
+
+
+def compile_condition(op: str, value: str):
+    """
+    Turn `op value` into a predicate over the runtime value.
+    The literal is parsed once here instead of on every check.
+    """
+    if op == ">":
+        limit = parse_number(value)
+        return lambda actual: actual > limit
+    if op == "<":
+        limit = parse_number(value)
+        return lambda actual: actual < limit
+    if op == ">=":
+        limit = parse_number(value)
+        return lambda actual: actual >= limit
+    if op == "<=":
+        limit = parse_number(value)
+        return lambda actual: actual <= limit
+    if op == "==":
+        return lambda actual: str(actual) == value
+    if op == "!=":
+        return lambda actual: str(actual) != value
+
+    raise ValueError(f"Unsupported operator: {op}")
+
+
+def attach_expression(law: Law, expression: tuple) -> Law:
+    """Set the parsed condition, plus the flat fields for single comparisons."""
+    law.expression = expression
+    if expression[0] == "cmp":
+        _, field, op, value = expression
+        law.field = field
+        law.operator = op
+        law.value = parse_literal(op, value)
+        law.predicate = compile_condition(op, value)
+    return law
+
+
+def ensure_compiled(law: Law) -> Law:
+    """Attach the parsed condition (and predicate) to a Law that was built by hand."""
+    if law.expression is None:
+        attach_expression(law, parse_condition(law.condition))
+    return law
+
+
 def compile_law(text: str) -> Law:
     # 1) Parse the human LawScript
     parsed = parse_law_script(text)
@@ -10,10 +61,11 @@ def compile_law(text: str) -> Law:
     # 2) Create a short unique id for this law
     law_id = hashlib.sha256(text.encode()).hexdigest()[:8]
 
-    # 3) Build and return a Law object
-    return Law(
+    # 3) Build and return a Law object (with a ready-to-run condition)
+    law = Law(
         id=law_id,
-        condition=f"{parsed['field']} {parsed['operator']} {parsed['value']}",
-        block_actions=[parsed["tool"]],
+        condition=format_condition(parsed["condition"]),
+        block_actions=parsed["tools"],
         reason=parsed["reason"]
     )
+    return attach_expression(law, parsed["condition"])
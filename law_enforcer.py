@@ -1,65 +1,458 @@
+import random
+import time
+import weakref
+
+import numpy as np
+
+import tracing
 from law_models import Law
 from agent_models import ActionPlan
-from law_engine import LawViolation
+from law_engine import TOOL_EFFECTS, LawViolation
+from law_compiler import compile_condition, ensure_compiled, parse_literal
+from observable_context import ObservableContext
+
+# law_key -> the one compiled Law shared by every book (and tenant) using it.
+# Weak: a law no book holds any more (removed tenant, hot reload) drops out.
+LAW_INTERN = weakref.WeakValueDictionary()
+
+
+def expression_fields(expression: tuple) -> frozenset:
+    """Every runtime_context field a condition reads."""
+    if expression[0] == "cmp":
+        return frozenset((expression[1],))
+    return frozenset().union(*(expression_fields(part) for part in expression[1]))
+
+
+def law_key(law: Law) -> tuple:
+    """Everything that makes two laws the same rule. Ids alone are not enough:
+    Law(id=...) can be built by hand, and compile_law ids are short hashes."""
+    return (law.id, law.condition, tuple(law.block_actions), law.reason)
+
+
+def intern_law(law: Law) -> Law:
+    key = law_key(law)
+    interned = LAW_INTERN.get(key)
+    if interned is None:
+        interned = LAW_INTERN.setdefault(key, ensure_compiled(law))
+    return interned
+
+
+class LawBook:
+    """
+    Compiled laws plus an index from tool name to the laws that block it.
+
+    All conditions in the book also compile into one shared decision network:
+    each distinct comparison (field, op, value) is a single node, evaluated at
+    most once per check however many laws use it.
+    """
+
+    def __init__(self, laws=()):
+        self.laws = []
+        # tool name -> laws that block it (in self.laws order)
+        self.index = {}
+        # tool name -> [(law, rule)]: rule is a node id for single comparisons,
+        # otherwise an evaluator over network nodes
+        self.rules = {}
+        # tool name -> fields each rule reads (parallel to self.rules[tool]),
+        # and the union of those fields
+        self.rule_fields = {}
+        self.tool_fields = {}
+        self._seen = set()
+        # bumped on every change so cached verdicts know they are stale
+        self.version = 0
+        # (field, op, raw value) -> node id, and per-node field / op / value / predicate
+        self.nodes = {}
+        self.node_fields = []
+        self.node_specs = []
+        self.node_predicates = []
+        for law in laws:
+            self.add(law)
+
+    def add(self, law: Law):
+        law = intern_law(law)
+        self.version += 1
+        self.laws.append(law)
+        rule = self._compile(law.expression)
+        for tool in law.block_actions:
+            self.index.setdefault(tool, []).append(law)
+            # A later law with the same condition for the same tool can never
+            # be the first violation, so it never needs evaluating.
+            if (tool, law.expression) not in self._seen:
+                self._seen.add((tool, law.expression))
+                fields = expression_fields(law.expression)
+                self.rules.setdefault(tool, []).append((law, rule))
+                self.rule_fields.setdefault(tool, []).append(fields)
+                self.tool_fields[tool] = self.tool_fields.get(tool, frozenset()) | fields
+
+    def clear(self):
+        self.version += 1
+        self.laws.clear()
+        self.index.clear()
+        self.rules.clear()
+        self.rule_fields.clear()
+        self.tool_fields.clear()
+        self._seen.clear()
+        self.nodes.clear()
+        self.node_fields.clear()
+        self.node_specs.clear()
+        self.node_predicates.clear()
+
+    def _node(self, field: str, op: str, value: str) -> int:
+        key = (field, op, value)
+        node = self.nodes.get(key)
+        if node is None:
+            node = self.nodes[key] = len(self.node_fields)
+            self.node_fields.append(field)
+            self.node_specs.append((field, op, parse_literal(op, value)))
+            self.node_predicates.append(compile_condition(op, value))
+        return node
+
+    def _compile(self, expression: tuple):
+        if expression[0] == "cmp":
+            return self._node(*expression[1:])
+
+        parts = tuple(self._compile(part) for part in expression[1])
+        nodes = tuple(part for part in parts if isinstance(part, int))
+        nested = tuple(part for part in parts if not isinstance(part, int))
+
+        # Plain comparisons first: they are memoized and cheapest to test
+        if expression[0] == "and":
+            def evaluate(test):
+                for node in nodes:
+                    if not test(node):
+                        return False
+                for part in nested:
+                    if not part(test):
+                        return False
+                return True
+        else:
+            def evaluate(test):
+                for node in nodes:
+                    if test(node):
+                        return True
+                for part in nested:
+                    if part(test):
+                        return True
+                return False
+
+        return evaluate
 
-# Simple in-memory law book
-LAW_BOOK = []
+    def make_test(self, lookup, memo: dict = None):
+        """
+        Node tester for one check: `lookup(field)` reads the runtime value,
+        a missing value never violates, and each node runs at most once.
+        """
+        fields = self.node_fields
+        predicates = self.node_predicates
+        memo = {} if memo is None else memo
+
+        def test(node):
+            hit = memo.get(node)
+            if hit is None:
+                actual = lookup(fields[node])
+                hit = memo[node] = actual is not None and predicates[node](actual)
+            return hit
+
+        return test
+
+    @staticmethod
+    def evaluate(rule, test) -> bool:
+        return test(rule) if rule.__class__ is int else rule(test)
+
+    def first_violation(self, tool: str, lookup):
+        """Return the first law blocking `tool` whose condition holds, or None."""
+        rules = self.rules.get(tool)
+        if not rules:
+            return None
+
+        fields = self.node_fields
+        predicates = self.node_predicates
+        memo = {}
+        test = self.make_test(lookup, memo)
+
+        # Per-law timing only when explicitly sampled (tracing.set_law_timing)
+        rate = tracing.LAW_TIMING_RATE
+        timed = rate > 0.0 and tracing.ENABLED and (rate >= 1.0 or random.random() < rate)
+        for law, rule in rules:
+            if timed:
+                start = time.perf_counter()
+
+            if rule.__class__ is int:
+                # single comparison: inline of test(rule)
+                violated = memo.get(rule)
+                if violated is None:
+                    actual = lookup(fields[rule])
+                    violated = memo[rule] = actual is not None and predicates[rule](actual)
+            else:
+                violated = rule(test)
+
+            if timed:
+                tracing.observe("law_eval", time.perf_counter() - start, law=law.id)
+
+            if violated:
+                return law
+        return None
+
+
+# The law book every check reads. install_law_book swaps in a new one with a
+# single assignment, so in-flight checks finish on the book they started with.
+ACTIVE_BOOK = LawBook()
+
+# Simple in-memory law book (aliases of the active book)
+LAW_BOOK = ACTIVE_BOOK.laws
+LAW_INDEX = ACTIVE_BOOK.index
 
 
 def add_law(law: Law):
-    LAW_BOOK.append(law)
+    ACTIVE_BOOK.add(law)
 
 
-def check_plan_legality(plan: ActionPlan, runtime_context: dict):
-    for law in LAW_BOOK:
-        field, op, value = law.condition.split()
+def clear_laws():
+    ACTIVE_BOOK.clear()
 
-        actual = runtime_context.get(field)
 
-        if actual is None:
-            continue
+def install_law_book(laws) -> LawBook:
+    """Atomically replace the active law book (e.g. on a hot reload)."""
+    global ACTIVE_BOOK, LAW_BOOK, LAW_INDEX
+    book = LawBook(laws)
+    ACTIVE_BOOK, LAW_BOOK, LAW_INDEX = book, book.laws, book.index
+    return book
+
+
+# ---- PER-TENANT LAW BOOKS ----
+# The runtime_context key that selects a tenant's law book
+TENANT_KEY = "tenant_id"
+
+# tenant id -> LawBook. Tenant books are never edited in place: a change
+# builds (or reuses) another book, so tenants with the same rule set share one.
+TENANT_BOOKS = {}
+
+# tuple of law_keys -> shared LawBook, for as long as some tenant uses it
+_BOOKS_BY_CONTENT = weakref.WeakValueDictionary()
+
+
+def shared_law_book(laws) -> LawBook:
+    """Return the one LawBook holding exactly these laws, in this order."""
+    laws = [intern_law(law) for law in laws]
+    key = tuple(law_key(law) for law in laws)
+    book = _BOOKS_BY_CONTENT.get(key)
+    if book is None:
+        book = _BOOKS_BY_CONTENT[key] = LawBook(laws)
+    return book
+
 
-        violated = False
+def install_tenant_law_book(tenant_id, laws) -> LawBook:
+    """Atomically replace one tenant's law book."""
+    book = shared_law_book(laws)
+    TENANT_BOOKS[tenant_id] = book
+    return book
 
-        if op == ">" and actual > int(value):
-            violated = True
-        elif op == "<" and actual < int(value):
-            violated = True
-        elif op == "==" and str(actual) == value:
-            violated = True
-        elif op == "!=" and str(actual) != value:
-            violated = True
 
-        if violated:
-            # ONLY block if the FIRST step is illegal (naked refund)
-            first_tool = plan.actions[0].tool
-            if first_tool in law.block_actions:
-                raise LawViolation(law.reason)
+def add_tenant_law(tenant_id, law: Law) -> LawBook:
+    current = TENANT_BOOKS.get(tenant_id)
+    return install_tenant_law_book(tenant_id, (current.laws if current else []) + [law])
+
+
+def remove_tenant(tenant_id):
+    TENANT_BOOKS.pop(tenant_id, None)
+
+
+def resolve_law_book(runtime_context: dict, tenant=None) -> LawBook:
+    """
+    Pick the law book for a check: an explicit tenant handle (a tenant id or
+    a LawBook) wins, then runtime_context["tenant_id"], then the global book.
+    """
+    if isinstance(tenant, LawBook):
+        return tenant
+    if tenant is None:
+        tenant = runtime_context.get(TENANT_KEY)
+    if tenant is None:
+        return ACTIVE_BOOK
+    return TENANT_BOOKS.get(tenant, ACTIVE_BOOK)
+
+
+def check_plan_legality(plan: ActionPlan, runtime_context: dict, tenant=None):
+    if not plan.actions:
+        return True
+
+    # ONLY block if the FIRST step is illegal (naked refund)
+    first_tool = plan.actions[0].tool
+
+    with tracing.span("legality_check", scope="plan", tool=first_tool):
+        book = resolve_law_book(runtime_context, tenant)
+        if isinstance(runtime_context, ObservableContext):
+            law = runtime_context.verdicts.first_violation(book, first_tool, runtime_context)
+        else:
+            law = book.first_violation(first_tool, runtime_context.get)
+        if law is not None:
+            raise LawViolation(law.reason)
 
     return True
 
-def check_step_legality(step, runtime_context: dict):
-    for law in LAW_BOOK:
-        field, op, value = law.condition.split()
+def step_lookup(step, runtime_context: dict):
+    """
+    Field reader for a step check: the context value as it is (0 and False
+    count), and the step's own input only when the context has no value.
+    """
+    inputs = step.input_schema
 
-        actual = runtime_context.get(field) or step.input_schema.get(field)
+    def lookup(field):
+        value = runtime_context.get(field)
+        return inputs.get(field) if value is None else value
 
-        if actual is None:
-            continue
+    return lookup
 
-        violated = False
 
-        if op == ">" and actual > int(value):
-            violated = True
-        elif op == "<" and actual < int(value):
-            violated = True
-        elif op == "==" and str(actual) == value:
-            violated = True
-        elif op == "!=" and str(actual) != value:
-            violated = True
+def check_step_legality(step, runtime_context: dict, tenant=None):
+    # THIS is the key difference from check_plan_legality:
+    # every step is checked, against the laws for its own tool
+    with tracing.span("legality_check", scope="step", tool=step.tool):
+        book = resolve_law_book(runtime_context, tenant)
+        tool_fields = book.tool_fields.get(step.tool, ())
 
-        # THIS is the key difference from check_plan_legality:
-        if violated and step.tool in law.block_actions:
+        # The cached verdict only knows the context; fall back to a full check
+        # when a law would read this step's own inputs instead.
+        if isinstance(runtime_context, ObservableContext) and not any(
+            field in tool_fields and runtime_context.get(field) is None
+            for field in step.input_schema
+        ):
+            law = runtime_context.verdicts.first_violation(book, step.tool, runtime_context)
+        else:
+            law = book.first_violation(step.tool, step_lookup(step, runtime_context))
+        if law is not None:
             raise LawViolation(law.reason)
 
     return True
+
+
+def dry_run_step(step, simulated: dict, runtime_context: dict, tenant=None) -> dict:
+    """
+    Check one step against the simulated context, then apply its declared
+    TOOL_EFFECTS. Returns the context the next step would see; the caller's
+    runtime_context is copied on the first real change, never modified.
+    """
+    check_step_legality(step, simulated, tenant)
+
+    effects = TOOL_EFFECTS.get(step.tool)
+    if effects and any(simulated.get(k) != v for k, v in effects.items()):
+        if simulated is runtime_context:
+            simulated = dict(runtime_context)
+        simulated.update(effects)
+    return simulated
+
+
+def validate_plan(plan: ActionPlan, runtime_context: dict, tenant=None):
+    """
+    Dry-run the whole plan before any tool is called.
+    Each step is checked against the context it would see after the earlier
+    steps. Raises LawViolation for the first step that would be blocked.
+    """
+    with tracing.span("legality_check", scope="dry_run", steps=len(plan.actions)):
+        simulated = runtime_context
+        for step in plan.actions:
+            simulated = dry_run_step(step, simulated, runtime_context, tenant)
+
+    return True
+
+
+def _numeric_column(values: list):
+    """Context values as floats; missing or non-numeric become NaN (never violate)."""
+    return np.array(
+        [v if isinstance(v, (int, float)) else np.nan for v in values],
+        dtype=float
+    )
+
+
+def _string_column(values: list):
+    return np.array([None if v is None else str(v) for v in values], dtype=object)
+
+
+def _compare_column(op: str, value, values: list, columns: dict, field: str):
+    """Evaluate one network node against every ticket as a single array comparison."""
+    if op in (">", "<", ">=", "<="):
+        key = (field, "num")
+        if key not in columns:
+            columns[key] = _numeric_column(values)
+        column = columns[key]
+        with np.errstate(invalid="ignore"):
+            if op == ">":
+                return column > value
+            if op == "<":
+                return column < value
+            if op == ">=":
+                return column >= value
+            return column <= value
+
+    key = (field, "str")
+    if key not in columns:
+        columns[key] = _string_column(values)
+    column = columns[key]
+    present = column != None  # noqa: E711 (elementwise on object arrays)
+    if op == "==":
+        return present & (column == value)
+    return present & (column != value)
+
+
+def check_batch_legality(tickets: list, tenant=None):
+    """
+    Pre-screen many (ActionPlan, runtime_context) pairs in one pass.
+
+    Same rules as check_plan_legality, but the context fields are laid out
+    as NumPy columns and each law is one array comparison over all tickets.
+    Tickets are grouped by law book, so a mixed-tenant queue works too.
+    Returns one (legal, reason) tuple per ticket.
+    """
+    groups = {}  # id(book) -> (book, ticket positions)
+    for i, (_, runtime_context) in enumerate(tickets):
+        book = resolve_law_book(runtime_context, tenant)
+        groups.setdefault(id(book), (book, []))[1].append(i)
+
+    verdicts = [None] * len(tickets)
+    for book, positions in groups.values():
+        group = [tickets[i] for i in positions]
+        for i, verdict in zip(positions, _check_batch(book, group)):
+            verdicts[i] = verdict
+    return verdicts
+
+
+def _check_batch(book: LawBook, tickets: list):
+    first_tools = np.array(
+        [plan.actions[0].tool if plan.actions else None for plan, _ in tickets],
+        dtype=object
+    )
+    tools_in_batch = set(first_tools.tolist())
+
+    blocked = np.zeros(len(tickets), dtype=bool)
+    reasons = [None] * len(tickets)
+    columns = {}
+    node_columns = {}
+
+    def node_column(node):
+        if node not in node_columns:
+            field, op, value = book.node_specs[node]
+            values = [ctx.get(field) for _, ctx in tickets]
+            node_columns[node] = _compare_column(op, value, values, columns, field)
+        return node_columns[node]
+
+    def evaluate(expression):
+        if expression[0] == "cmp":
+            return node_column(book.nodes[expression[1:]])
+        parts = [evaluate(part) for part in expression[1]]
+        if expression[0] == "and":
+            return np.logical_and.reduce(parts)
+        return np.logical_or.reduce(parts)
+
+    for law in book.laws:
+        if tools_in_batch.isdisjoint(law.block_actions):
+            continue
+
+        targets = np.isin(first_tools, law.block_actions) & ~blocked
+        if not targets.any():
+            continue
+
+        hits = targets & evaluate(law.expression)
+        for i in np.flatnonzero(hits):
+            reasons[i] = law.reason
+        blocked |= hits
+
+    return [(not blocked[i], reasons[i]) for i in range(len(tickets))]
@@ -1,6 +1,7 @@
 # ----------------------------
 # LAW ENGINE = TOOL LAYER + EXCEPTIONS
 # ----------------------------
+from tracing import log
 
 class LawViolation(Exception):
     """Custom exception raised when a law is violated."""
@@ -9,7 +10,7 @@ class LawViolation(Exception):
 
 def refund_order(order_id: str):
     """Mock refund tool for demo."""
-    print(f"💸 Refunding order {order_id} (mock)...")
+    log(f"💸 Refunding order {order_id} (mock)...")
     return {
         "status": "success",
         "order_id": order_id
@@ -17,7 +18,7 @@ def refund_order(order_id: str):
 
 def check_inventory(order_id: str):
     """Mock inventory check for demo."""
-    print(f"📦 Checking inventory for order {order_id} (mock)...")
+    log(f"📦 Checking inventory for order {order_id} (mock)...")
     return {
         "status": "success",
         "inventory": 10
@@ -25,16 +26,50 @@ def check_inventory(order_id: str):
 
 def verify_order(order_id: int):
     """Mock order verification for demo."""
-    print(f"🔎 Verifying order {order_id} (mock)...")
+    log(f"🔎 Verifying order {order_id} (mock)...")
     return {
         "status": "success",
         "order_id": order_id,
         "order_status": "paid"
     }
 
+def check_inventory_bulk(order_ids: list):
+    """Mock bulk inventory endpoint: one request for many orders."""
+    log(f"📦 Checking inventory for {len(order_ids)} orders in one request (mock)...")
+    return [{"status": "success", "inventory": 10} for _ in order_ids]
+
+def verify_order_bulk(order_ids: list):
+    """Mock bulk order verification endpoint."""
+    log(f"🔎 Verifying {len(order_ids)} orders in one request (mock)...")
+    return [
+        {"status": "success", "order_id": order_id, "order_status": "paid"}
+        for order_id in order_ids
+    ]
+
 # ---- TOOL REGISTRY (SINGLE SOURCE OF TRUTH FOR DEMO) ----
 TOOL_REGISTRY = {
     "refund_order": refund_order,
     "check_inventory": check_inventory,
     "verify_order": verify_order,
-}
\ No newline at end of file
+}
+
+# ---- TOOL METADATA ----
+# Tools that only read backend state. Anything not listed is treated as a
+# write and never reordered or run concurrently with other steps.
+READ_ONLY_TOOLS = {
+    "check_inventory",
+    "verify_order",
+}
+
+# What a successful call writes into runtime_context.
+# Used both to update the world and to dry-run whole plans before execution.
+TOOL_EFFECTS = {
+    "refund_order": {"refund_done": True},
+}
+
+# Bulk endpoints a tool can be batched onto: tool -> (bulk function, batched argument).
+# See batch_dispatch.enable_batching.
+BULK_TOOLS = {
+    "check_inventory": (check_inventory_bulk, "order_id"),
+    "verify_order": (verify_order_bulk, "order_id"),
+}
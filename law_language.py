@@ -2,23 +2,149 @@ import re
 
 LAW_PATTERN = re.compile(
     r"LAW\s*{\s*"
-    r"when\s+(?P<field>\w+)\s*(?P<op>>|<|==|!=)\s*(?P<value>\w+)\s*"
-    r"block\s+(?P<tool>\w+)\s*"
+    r"when\s+(?P<condition>.+?)\s+"
+    r"block\s+(?P<tools>\w+(?:\s*,\s*\w+)*)\s*"
     r"because\s+\"(?P<reason>[^\"]+)\"\s*"
     r"}",
-    re.IGNORECASE
+    re.IGNORECASE | re.S
 )
 
+# Operators a condition may use (longest first so ">=" wins over ">")
+OPERATORS = (">=", "<=", "==", "!=", ">", "<")
+ORDERING_OPERATORS = (">=", "<=", ">", "<")
+
+# Ordering operators compare numbers: integers or decimals, optionally negative
+NUMBER_PATTERN = re.compile(r"-?\d+(?:\.\d+)?")
+
+TOKEN_PATTERN = re.compile(r"\s*(\.\.|>=|<=|==|!=|>|<|\(|\)|-?\w+(?:\.\w+)?)")
+
+
+def parse_number(text: str):
+    """int for "10", float for "1.5"; anything else is invalid LawScript."""
+    if not NUMBER_PATTERN.fullmatch(text):
+        raise ValueError(f"Invalid LawScript number: {text!r}")
+    return float(text) if "." in text else int(text)
+
+
+def tokenize_condition(text: str) -> list:
+    tokens = []
+    pos = 0
+    text = text.strip()
+    while pos < len(text):
+        match = TOKEN_PATTERN.match(text, pos)
+        if not match:
+            raise ValueError(f"Invalid LawScript condition near: {text[pos:]!r}")
+        tokens.append(match.group(1))
+        pos = match.end()
+    return tokens
+
+
+class _ConditionParser:
+    """
+    Recursive descent over:
+
+        condition := term ("or" term)*
+        term      := atom ("and" atom)*
+        atom      := "(" condition ")"
+                   | field op value
+                   | field "in" low ".." high
+
+    Produces ("cmp", field, op, value) leaves under ("and", (...)) / ("or", (...)).
+    """
+
+    def __init__(self, tokens: list):
+        self.tokens = tokens
+        self.pos = 0
+
+    def parse(self):
+        expr = self.condition()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"Unexpected token in LawScript condition: {self.tokens[self.pos]!r}")
+        return expr
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self):
+        token = self.peek()
+        if token is None:
+            raise ValueError("LawScript condition ended unexpectedly")
+        self.pos += 1
+        return token
+
+    def condition(self):
+        parts = [self.term()]
+        while (self.peek() or "").lower() == "or":
+            self.take()
+            parts.append(self.term())
+        return parts[0] if len(parts) == 1 else ("or", tuple(parts))
+
+    def term(self):
+        parts = [self.atom()]
+        while (self.peek() or "").lower() == "and":
+            self.take()
+            parts.append(self.atom())
+        return parts[0] if len(parts) == 1 else ("and", tuple(parts))
+
+    def atom(self):
+        if self.peek() == "(":
+            self.take()
+            expr = self.condition()
+            if self.take() != ")":
+                raise ValueError("Unbalanced parentheses in LawScript condition")
+            return expr
+
+        field = self.take()
+        op = self.take()
+
+        if op.lower() == "in":
+            low = self.take()
+            if self.take() != "..":
+                raise ValueError(f"Expected '..' in range for {field}")
+            high = self.take()
+            parse_number(low)
+            parse_number(high)
+            return ("and", (("cmp", field, ">=", low), ("cmp", field, "<=", high)))
+
+        if op not in OPERATORS:
+            raise ValueError(f"Unsupported operator: {op}")
+        value = self.take()
+        if op in ORDERING_OPERATORS:
+            parse_number(value)
+        return ("cmp", field, op, value)
+
+
+def parse_condition(text: str):
+    """Parse a `when` clause into an expression tree."""
+    return _ConditionParser(tokenize_condition(text)).parse()
+
+
+def format_condition(expr, nested: bool = False) -> str:
+    """Canonical text for an expression tree (inverse of parse_condition)."""
+    if expr[0] == "cmp":
+        return " ".join(expr[1:])
+    text = f" {expr[0]} ".join(format_condition(part, True) for part in expr[1])
+    return f"({text})" if nested else text
+
 
 def parse_law_script(text: str):
     match = LAW_PATTERN.search(text)
     if not match:
         raise ValueError("Invalid LawScript")
 
-    return {
-        "field": match.group("field"),
-        "operator": match.group("op"),
-        "value": match.group("value"),
-        "tool": match.group("tool"),
-        "reason": match.group("reason")
+    expression = parse_condition(match.group("condition"))
+    tools = [tool.strip() for tool in match.group("tools").split(",")]
+
+    parsed = {
+        "condition": expression,
+        "tools": tools,
+        "reason": match.group("reason"),
+        # Single-comparison, single-tool laws keep the original flat keys
+        "field": None,
+        "operator": None,
+        "value": None,
+        "tool": tools[0],
     }
+    if expression[0] == "cmp":
+        _, parsed["field"], parsed["operator"], parsed["value"] = expression
+    return parsed
@@ -1,9 +1,35 @@
-from dataclasses import dataclass
-from typing import List
+import sys
+from dataclasses import dataclass, field as dataclass_field
+from typing import Any, Callable, List, Optional
 
-@dataclass
+from agent_models import intern_text
+
+# slots: every tenant holds its own copies, so there can be a great many;
+# weakref_slot: law_enforcer interns them weakly. weakref_slot is Python 3.11+;
+# before that Law keeps its __dict__, which is weakly referenceable.
+LAW_SLOTS = {"slots": True, "weakref_slot": True} if sys.version_info >= (3, 11) else {}
+
+
+@dataclass(**LAW_SLOTS)
 class Law:
     id: str
     condition: str
     block_actions: List[str]
     reason: str
+    # Filled in by law_compiler so checks never re-parse `condition`.
+    # `expression` is the parsed condition tree; single-comparison laws
+    # also get field / operator / value / predicate.
+    field: Optional[str] = None
+    operator: Optional[str] = None
+    value: Any = None
+    predicate: Optional[Callable[[Any], bool]] = dataclass_field(
+        default=None, repr=False, compare=False
+    )
+    expression: Optional[tuple] = dataclass_field(default=None, repr=False)
+
+    def __post_init__(self):
+        # Tenants mostly load the same laws; share their text rather than copy it
+        self.id = intern_text(self.id)
+        self.condition = intern_text(self.condition)
+        self.reason = intern_text(self.reason)
+        self.block_actions = [intern_text(tool) for tool in self.block_actions]
@@ -0,0 +1,195 @@
+"""
+Versioned on-disk law store (SQLite).
+
+Laws are stored already compiled (condition tree / tools / reason), so
+loading them never touches the LawScript regex. Each row is keyed by a
+sha256 of the whole law (its id plus content): republishing an id with a
+new condition adds a row instead of being ignored, and older versions keep
+reading the rows they were published with. Every change publishes a new law book version;
+old versions stay readable. A LawStoreWatcher polls for new versions and
+swaps them into the enforcer without pausing ticket processing.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from law_compiler import attach_expression, ensure_compiled
+from law_enforcer import install_law_book, law_key
+from law_models import Law
+from tracing import log
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS laws (
+    law_id        TEXT PRIMARY KEY,   -- row key: content_key(law)
+    law_ref       TEXT,               -- Law.id (NULL in rows keyed by Law.id itself)
+    condition     TEXT NOT NULL,
+    field         TEXT NOT NULL,
+    operator      TEXT NOT NULL,
+    value         TEXT NOT NULL,
+    block_actions TEXT NOT NULL,
+    reason        TEXT NOT NULL,
+    expression    TEXT
+);
+CREATE TABLE IF NOT EXISTS versions (
+    version    INTEGER PRIMARY KEY AUTOINCREMENT,
+    law_ids    TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def expression_from_json(data):
+    """JSON arrays back into the tuple tree produced by law_language."""
+    if data[0] == "cmp":
+        return tuple(data)
+    return (data[0], tuple(expression_from_json(part) for part in data[1]))
+
+
+def content_key(law: Law) -> str:
+    """Full sha256 of everything that defines the law, including its compiled tree."""
+    payload = json.dumps([*law_key(law), law.expression], default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def law_from_row(row) -> Law:
+    law_id, law_ref, condition, field, operator, value, block_actions, reason, expression = row
+    law = Law(
+        id=law_ref or law_id,
+        condition=condition,
+        block_actions=json.loads(block_actions),
+        reason=reason
+    )
+    if expression:
+        return attach_expression(law, expression_from_json(json.loads(expression)))
+    return attach_expression(law, ("cmp", field, operator, value))
+
+
+class LawStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.executescript(SCHEMA)
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(laws)")}
+            if "expression" not in columns:
+                # stores created before compound conditions
+                self._db.execute("ALTER TABLE laws ADD COLUMN expression TEXT")
+            if "law_ref" not in columns:
+                # stores whose rows were keyed by Law.id; those rows read back unchanged
+                self._db.execute("ALTER TABLE laws ADD COLUMN law_ref TEXT")
+            self._db.commit()
+
+    def current_version(self) -> int:
+        with self._lock:
+            row = self._db.execute("SELECT MAX(version) FROM versions").fetchone()
+        return row[0] or 0
+
+    def publish(self, laws) -> int:
+        """Store `laws` (in order) as the next law book version and return it."""
+        rows = []
+        for law in laws:
+            ensure_compiled(law)
+            rows.append((
+                content_key(law), law.id, law.condition, law.field or "", law.operator or "",
+                "" if law.value is None else str(law.value),
+                json.dumps(law.block_actions), law.reason, json.dumps(law.expression)
+            ))
+
+        with self._lock:
+            self._db.executemany(
+                # Same key means same content, so an existing row is already right
+                "INSERT OR IGNORE INTO laws "
+                "(law_id, law_ref, condition, field, operator, value, block_actions, reason, expression) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            cursor = self._db.execute(
+                "INSERT INTO versions (law_ids, created_at) VALUES (?, ?)",
+                (json.dumps([row[0] for row in rows]), time.time())
+            )
+            self._db.commit()
+        return cursor.lastrowid
+
+    def add(self, law: Law) -> int:
+        """Publish the current book plus one law."""
+        _, laws = self.load()
+        return self.publish(laws + [law])
+
+    def remove(self, law_id: str) -> int:
+        """Publish the current book without one law."""
+        _, laws = self.load()
+        return self.publish([law for law in laws if law.id != law_id])
+
+    def load(self, version: int = None):
+        """Return (version, laws) for `version`, or the latest one."""
+        with self._lock:
+            if version is None:
+                row = self._db.execute(
+                    "SELECT version, law_ids FROM versions ORDER BY version DESC LIMIT 1"
+                ).fetchone()
+            else:
+                row = self._db.execute(
+                    "SELECT version, law_ids FROM versions WHERE version = ?", (version,)
+                ).fetchone()
+
+            if row is None:
+                return 0, []
+
+            law_ids = json.loads(row[1])
+            by_id = {
+                r[0]: r for r in self._db.execute(
+                    "SELECT law_id, law_ref, condition, field, operator, value, block_actions, reason, expression "
+                    "FROM laws WHERE law_id IN (SELECT value FROM json_each(?))",
+                    (row[1],)
+                )
+            }
+
+        return row[0], [law_from_row(by_id[law_id]) for law_id in law_ids]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class LawStoreWatcher:
+    """
+    Background thread that polls the store and installs each new version.
+    `on_change(laws)` defaults to swapping the enforcer's active law book.
+    """
+
+    def __init__(self, store: LawStore, interval: float = 1.0, on_change=install_law_book):
+        self.store = store
+        self.interval = interval
+        self.on_change = on_change
+        self.version = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="law-store-watcher", daemon=True)
+
+    def start(self):
+        self.reload()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def reload(self) -> bool:
+        """Install the latest version if it is newer than the one we have."""
+        if self.store.current_version() == self.version:
+            return False
+        version, laws = self.store.load()
+        self.on_change(laws)
+        self.version = version
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            # One bad poll (locked file, corrupt row) must not end hot reloading
+            try:
+                self.reload()
+            except Exception as e:  # pylint: disable=broad-except
+                log(f"⚠️ Law store reload failed, keeping version {self.version}: {type(e).__name__}: {e}")
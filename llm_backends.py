@@ -0,0 +1,310 @@
+"""
+Pluggable LLM backends.
+
+A backend is anything shaped like the OpenAI client that agent_runner uses:
+`backend.responses.create(model=..., input=..., stream=False)` returning an
+object with `.output_text` (or delta events when stream=True). The real
+OpenAI client, the stubs in stub_llm and the backends below all qualify.
+
+- RecordingBackend wraps a real client and writes every prompt/response
+  (plans and repairs alike) to a cassette: one indexed, zlib-compressed
+  SQLite file.
+- ReplayBackend serves a cassette from memory, with optional injected
+  latency (fixed, or the recorded latency divided by `speedup`) and
+  injected failures.
+
+Without an explicit llm_client, agent_runner asks default_backend(), which
+honours ASK_LLM_REPLAY=<cassette> (plus ASK_LLM_SPEEDUP) and
+ASK_LLM_RECORD=<cassette>, and otherwise creates the OpenAI client lazily.
+"""
+import asyncio
+import hashlib
+import os
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from types import SimpleNamespace
+
+from stub_llm import AsyncStubStream, StubStream
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS interactions (
+    seq      INTEGER PRIMARY KEY AUTOINCREMENT,
+    key      TEXT NOT NULL,
+    model    TEXT NOT NULL,
+    prompt   BLOB NOT NULL,
+    response BLOB NOT NULL,
+    latency  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS interactions_key ON interactions (key);
+"""
+
+
+class CassetteMiss(KeyError):
+    """The replayed prompt was never recorded."""
+
+
+class InjectedLLMError(RuntimeError):
+    """A failure injected by ReplayBackend(failure_rate=...)."""
+
+
+def cassette_key(model: str, prompt: str) -> str:
+    return hashlib.sha256(f"{model}\x1f{prompt}".encode()).hexdigest()
+
+
+class Cassette:
+    """Recorded (model, prompt) → response text, in call order."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+
+    def record(self, model: str, prompt: str, text: str, latency: float):
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO interactions (key, model, prompt, response, latency) VALUES (?, ?, ?, ?, ?)",
+                (cassette_key(model, prompt), model,
+                 zlib.compress(prompt.encode()), zlib.compress(text.encode()), latency)
+            )
+            self._db.commit()
+
+    def load(self) -> dict:
+        """key -> [(text, latency), ...] in recorded order."""
+        entries = {}
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, response, latency FROM interactions ORDER BY seq"
+            ).fetchall()
+        for key, response, latency in rows:
+            entries.setdefault(key, []).append((zlib.decompress(response).decode(), latency))
+        return entries
+
+    def prompts(self) -> list:
+        """Every recorded prompt, in call order (for inspecting a cassette)."""
+        with self._lock:
+            rows = self._db.execute("SELECT prompt FROM interactions ORDER BY seq").fetchall()
+        return [zlib.decompress(prompt).decode() for (prompt,) in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM interactions").fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+
+# ---- RECORDING ----
+class _RecordingStream:
+    """Passes delta events through and records the text once the stream ends or is closed."""
+
+    def __init__(self, stream, finish):
+        self._stream = stream
+        self._finish = finish
+        self._parts = []
+        self._done = False
+
+    def _collect(self, event):
+        if getattr(event, "type", None) == "response.output_text.delta":
+            self._parts.append(event.delta)
+
+    def _record(self):
+        # A cancelled stream is recorded as far as it got, so replay cancels at the same step
+        if not self._done:
+            self._done = True
+            self._finish("".join(self._parts))
+
+    def __iter__(self):
+        for event in self._stream:
+            self._collect(event)
+            yield event
+        self._record()
+
+    def close(self):
+        self._record()
+        self._stream.close()
+
+
+class _AsyncRecordingStream(_RecordingStream):
+    async def __aiter__(self):
+        async for event in self._stream:
+            self._collect(event)
+            yield event
+        self._record()
+
+    async def close(self):
+        self._record()
+        await self._stream.close()
+
+
+class _RecordingResponses:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, model: str, input: str, stream: bool = False, **kwargs):  # pylint: disable=redefined-builtin
+        started = time.perf_counter()
+        response = self._owner.client.responses.create(model=model, input=input, stream=stream, **kwargs)
+        finish = self._owner.recorder(model, input, started)
+        if stream:
+            return _RecordingStream(response, finish)
+        finish(response.output_text)
+        return response
+
+
+class _AsyncRecordingResponses(_RecordingResponses):
+    async def create(self, model: str, input: str, stream: bool = False, **kwargs):  # pylint: disable=redefined-builtin
+        started = time.perf_counter()
+        response = await self._owner.client.responses.create(model=model, input=input, stream=stream, **kwargs)
+        finish = self._owner.recorder(model, input, started)
+        if stream:
+            return _AsyncRecordingStream(response, finish)
+        finish(response.output_text)
+        return response
+
+
+class RecordingBackend:
+    """Wraps a sync client and records every call to `cassette`."""
+
+    def __init__(self, client, cassette):
+        self.client = client
+        self.cassette = cassette if isinstance(cassette, Cassette) else Cassette(cassette)
+        self.responses = _RecordingResponses(self)
+
+    def recorder(self, model: str, prompt: str, started: float):
+        def finish(text: str):
+            self.cassette.record(model, prompt, text, time.perf_counter() - started)
+        return finish
+
+
+class AsyncRecordingBackend(RecordingBackend):
+    """Wraps an async client (AsyncOpenAI, AsyncStubLLMClient)."""
+
+    def __init__(self, client, cassette):
+        super().__init__(client, cassette)
+        self.responses = _AsyncRecordingResponses(self)
+
+
+# ---- REPLAY ----
+class _ReplayResponses:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, model: str, input: str, stream: bool = False, **_kwargs):  # pylint: disable=redefined-builtin
+        text, delay = self._owner.respond(model, input)
+        if delay:
+            time.sleep(delay)
+        if stream:
+            return StubStream(self._owner, text)
+        return SimpleNamespace(output_text=text)
+
+
+class _AsyncReplayResponses(_ReplayResponses):
+    async def create(self, model: str, input: str, stream: bool = False, **_kwargs):  # pylint: disable=redefined-builtin
+        text, delay = self._owner.respond(model, input)
+        if delay:
+            await asyncio.sleep(delay)
+        if stream:
+            return AsyncStubStream(self._owner, text)
+        return SimpleNamespace(output_text=text)
+
+
+class ReplayBackend:
+    """
+    Serves a cassette from memory. A prompt recorded several times replays
+    its responses in recorded order, then starts over.
+    """
+
+    def __init__(self, cassette, latency: float = 0.0, speedup: float = None,
+                 failure_rate: float = 0.0, seed: int = None, chunk_size: int = 8):
+        cassette = cassette if isinstance(cassette, Cassette) else Cassette(cassette)
+        self.entries = cassette.load()
+        self.latency = latency
+        self.speedup = speedup
+        self.failure_rate = failure_rate
+        self.chunk_size = chunk_size
+        self.chunk_delay = 0.0
+        self.calls = 0
+        self.chunks_sent = 0
+        self.failures = 0
+        self.misses = 0
+        self._cursor = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.responses = _ReplayResponses(self)
+
+    def respond(self, model: str, prompt: str) -> tuple:
+        """(text, seconds to wait) for the next recording of this prompt."""
+        key = cassette_key(model, prompt)
+        with self._lock:
+            self.calls += 1
+            if self.failure_rate and self._rng.random() < self.failure_rate:
+                self.failures += 1
+                raise InjectedLLMError("injected LLM failure")
+
+            recordings = self.entries.get(key)
+            if not recordings:
+                self.misses += 1
+                raise CassetteMiss(f"no recording for prompt {key[:12]}")
+
+            index = self._cursor.get(key, 0)
+            self._cursor[key] = (index + 1) % len(recordings)
+            text, recorded_latency = recordings[index]
+
+        delay = self.latency
+        if self.speedup:
+            delay += recorded_latency / self.speedup
+        return text, delay
+
+
+class AsyncReplayBackend(ReplayBackend):
+    """Async counterpart of ReplayBackend: injected latency never blocks the loop."""
+
+    def __init__(self, cassette, **kwargs):
+        super().__init__(cassette, **kwargs)
+        self.responses = _AsyncReplayResponses(self)
+
+
+# ---- DEFAULTS ----
+DEFAULT_BACKEND = None
+DEFAULT_ASYNC_BACKEND = None
+
+
+def backend_from_env(use_async: bool = False):
+    replay = os.environ.get("ASK_LLM_REPLAY")
+    if replay:
+        speedup = float(os.environ.get("ASK_LLM_SPEEDUP", "0")) or None
+        return (AsyncReplayBackend if use_async else ReplayBackend)(replay, speedup=speedup)
+
+    # Only the real backend needs the openai package and an API key
+    from openai import AsyncOpenAI, OpenAI  # pylint: disable=import-outside-toplevel
+    client = AsyncOpenAI() if use_async else OpenAI()
+
+    record = os.environ.get("ASK_LLM_RECORD")
+    if record:
+        return (AsyncRecordingBackend if use_async else RecordingBackend)(client, record)
+    return client
+
+
+def default_backend():
+    global DEFAULT_BACKEND
+    if DEFAULT_BACKEND is None:
+        DEFAULT_BACKEND = backend_from_env(use_async=False)
+    return DEFAULT_BACKEND
+
+
+def default_async_backend():
+    global DEFAULT_ASYNC_BACKEND
+    if DEFAULT_ASYNC_BACKEND is None:
+        DEFAULT_ASYNC_BACKEND = backend_from_env(use_async=True)
+    return DEFAULT_ASYNC_BACKEND
+
+
+def set_default_backend(backend=None, async_backend=None):
+    """Swap the backends used when no llm_client is passed (None → back to lazy default)."""
+    global DEFAULT_BACKEND, DEFAULT_ASYNC_BACKEND
+    DEFAULT_BACKEND = backend
+    DEFAULT_ASYNC_BACKEND = async_backend
@@ -0,0 +1,123 @@
+"""
+Response cache for LLM plan proposals and repairs.
+
+Entries are keyed on a hash of (model, prompt template version, prompt
+text): whatever the prompt tells the model is part of the key. Entries are
+evicted LRU (from memory and disk) once `max_entries` is hit,
+and expire after `ttl` seconds. An optional SQLite file keeps entries
+across restarts.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_context(runtime_context: dict) -> str:
+    """Canonical JSON: key order and whitespace never change the key."""
+    return json.dumps(runtime_context, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def make_prompt_key(model: str, template_version: str, prompt: str) -> str:
+    """Key for the exact prompt sent, so two tickets share an entry only if the model sees the same text."""
+    payload = "\x1f".join([model, template_version, prompt])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LLMCache:
+    """Size-bounded LRU + TTL cache with optional on-disk backing."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0, path: str = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, text)
+        self._lock = threading.Lock()
+        self._db = None
+
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, expires_at REAL NOT NULL, text TEXT NOT NULL)"
+            )
+            # Start from the same bound memory keeps: nothing expired, at most
+            # max_entries rows (the freshest)
+            self._db.execute("DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),))
+            self._db.execute(
+                "DELETE FROM llm_cache WHERE key NOT IN "
+                "(SELECT key FROM llm_cache ORDER BY expires_at DESC LIMIT ?)",
+                (max_entries,)
+            )
+            self._db.commit()
+
+    def get(self, key: str):
+        """Return the cached text, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT expires_at, text FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = tuple(row)
+                    self._remember(key, entry)
+
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    self._forget(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, text: str):
+        entry = (time.time() + self.ttl, text)
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, expires_at, text) VALUES (?, ?, ?)",
+                    (key, entry[0], text)
+                )
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+    def _remember(self, key: str, entry: tuple):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        evicted = []
+        while len(self._entries) > self.max_entries:
+            evicted.append(self._entries.popitem(last=False)[0])
+        # Evicted entries leave the disk store too, so it stays bounded
+        if evicted and self._db is not None:
+            self._db.executemany("DELETE FROM llm_cache WHERE key = ?", [(k,) for k in evicted])
+            self._db.commit()
+
+    def _forget(self, key: str):
+        self._entries.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self._db.commit()
@@ -0,0 +1,147 @@
+"""
+Incremental legality verdicts for a runtime_context that changes a little at a time.
+
+ObservableContext is a dict that records which fields changed. Its
+VerdictTable caches, per (law book, tool), each rule's last result; on the
+next check only the rules that read a changed field are re-evaluated, so
+step checks inside long plans and across run_agent iterations stay close
+to O(1).
+
+    runtime_context = ObservableContext({"inventory": 10})
+    execute_plan(plan, runtime_context)
+"""
+
+import copy
+
+_MISSING = object()
+
+
+class ObservableContext(dict):
+    """A runtime_context dict that tracks which fields changed."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.changed = set()
+        self.verdicts = VerdictTable()
+
+    def __setitem__(self, key, value):
+        # Identity, not ==: laws compare str(actual), so 1 → True or 10 → 10.0
+        # is a change even though the values are equal
+        if self.get(key, _MISSING) is not value:
+            self.changed.add(key)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.changed.add(key)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *default):
+        if key in self:
+            self.changed.add(key)
+        return super().pop(key, *default)
+
+    def popitem(self):
+        key, value = super().popitem()
+        self.changed.add(key)
+        return key, value
+
+    def clear(self):
+        self.changed.update(self.keys())
+        super().clear()
+
+    def copy(self):
+        """
+        Same values, fresh verdicts: the copy changes independently of this
+        context, so it must never answer from this context's cached results.
+        """
+        return ObservableContext(self)
+
+    __copy__ = copy
+
+    def __deepcopy__(self, memo):
+        return ObservableContext(copy.deepcopy(dict(self), memo))
+
+    def drain_changes(self) -> set:
+        changed, self.changed = self.changed, set()
+        return changed
+
+
+class _ToolVerdicts:
+    """Per-rule results for one tool in one law book."""
+
+    def __init__(self, book, tool: str):
+        self.book = book
+        self.version = book.version
+        self.verdict = None
+        self.clean = False  # verdict is current
+        self.rules = book.rules.get(tool, [])
+        self.results = [None] * len(self.rules)  # None = needs evaluating
+        self.rules_by_field = {}
+        for i, fields in enumerate(book.rule_fields.get(tool, [])):
+            for field in fields:
+                self.rules_by_field.setdefault(field, []).append(i)
+
+    def invalidate(self, changed: set):
+        for field in changed:
+            for i in self.rules_by_field.get(field, ()):
+                self.results[i] = None
+                self.clean = False
+
+    def first_violation(self, lookup):
+        if self.clean:
+            return self.verdict
+
+        self.verdict = self._scan(lookup)
+        self.clean = True
+        return self.verdict
+
+    def _scan(self, lookup):
+        test = None
+        for i, (law, rule) in enumerate(self.rules):
+            violated = self.results[i]
+            if violated is None:
+                if test is None:
+                    test = self.book.make_test(lookup)
+                violated = self.results[i] = self.book.evaluate(rule, test)
+            if violated:
+                return law
+        return None
+
+
+class VerdictTable:
+    """
+    Cached "tool → blocking law" verdicts for one ObservableContext.
+
+    Plan and step checks read context values as they are, so they share
+    verdicts; a step check that needs its own inputs skips the table.
+    """
+
+    def __init__(self):
+        self._tools = {}  # tool -> _ToolVerdicts
+
+    def first_violation(self, book, tool: str, runtime_context: ObservableContext):
+        changed = runtime_context.drain_changes()
+        if changed:
+            for verdicts in self._tools.values():
+                verdicts.invalidate(changed)
+
+        verdicts = self._tools.get(tool)
+        if verdicts is None or verdicts.book is not book or verdicts.version != book.version:
+            # first check for this tool, or the law book was swapped / edited
+            verdicts = self._tools[tool] = _ToolVerdicts(book, tool)
+
+        # Values are always read from the context being checked, never one captured earlier
+        return verdicts.first_violation(runtime_context.get)
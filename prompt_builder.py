@@ -0,0 +1,129 @@
+"""
+Cache-friendly prompt construction for call_llm and the repair call.
+
+Prompts are laid out so the prefix stays byte-identical across iterations
+of one ticket, which lets the provider's prefix cache hit:
+
+    [static instructions][original goal][initial world state]  ← stable
+    [iteration update: changed fields + feedback]              ← small
+
+The world state is sent as compact canonical JSON. If a prompt would exceed
+the token budget, low-value fields are dropped first, then long strings are
+clipped, then the largest remaining fields are dropped.
+"""
+from llm_cache import normalize_context
+from tracing import log
+
+PLAN_INSTRUCTIONS = """You are an autonomous agent operating inside an ASK (Assured Safe Kernel) system.
+
+YOU MUST OUTPUT ONLY JSON IN THIS EXACT FORMAT:
+{"plan": [{"action": "<one action name>", "order_id": 123, "... any other useful parameters ...": "..."}]}
+
+RULES:
+1) ALWAYS use top-level key "plan"
+2) "plan" MUST be a list
+3) Every step MUST include "action"
+4) Include "order_id" whenever relevant
+5) Do NOT add explanations, markdown, or code blocks — ONLY raw JSON
+"""
+
+REPAIR_INSTRUCTIONS = """Your previous output was invalid JSON.
+
+Respond ONLY with JSON in exactly this format:
+{"plan": [{"action": "check_inventory", "order_id": 123}]}
+"""
+
+# Dropped first when a prompt runs over budget (derived, re-observable fields)
+LOW_VALUE_FIELDS = ("last_observation", "inventory_status")
+
+MAX_STRING_CHARS = 200
+
+# Share of the budget the stable prefix may use; the rest is for iteration updates
+PREFIX_BUDGET_SHARE = 0.75
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English + JSON)."""
+    return (len(text) + 3) // 4
+
+
+def fit_to_budget(state: dict, fixed_tokens: int, token_budget: int) -> dict:
+    """Shrink `state` until fixed text + its JSON fits in the budget."""
+    if fixed_tokens + estimate_tokens(normalize_context(state)) <= token_budget:
+        return state
+
+    state = dict(state)
+    for field in LOW_VALUE_FIELDS:
+        if state.pop(field, None) is not None:
+            if fixed_tokens + estimate_tokens(normalize_context(state)) <= token_budget:
+                return state
+
+    state = {
+        k: v[:MAX_STRING_CHARS] + "…" if isinstance(v, str) and len(v) > MAX_STRING_CHARS else v
+        for k, v in state.items()
+    }
+
+    for field in sorted(state, key=lambda k: len(normalize_context({k: state[k]})), reverse=True):
+        if fixed_tokens + estimate_tokens(normalize_context(state)) <= token_budget:
+            break
+        del state[field]
+    return state
+
+
+class PromptBuilder:
+    """
+    Builds the prompts for one ticket. The first plan prompt carries the full
+    world state; later ones only what changed since then plus the feedback.
+    """
+
+    def __init__(self, token_budget: int = 2000):
+        self.token_budget = token_budget
+        self.base_goal = None
+        self.base_context = None
+        self.base_state = None  # base_context as sent, trimmed to the budget
+        self.prompt_tokens = []  # one entry per prompt built
+
+    def build(self, goal: str, runtime_context: dict) -> str:
+        if self.base_context is None:
+            self.base_goal = goal
+            self.base_context = dict(runtime_context)
+            # Fitted once, so the prefix stays byte-identical for this ticket,
+            # leaving room for later iterations' feedback and changes
+            head = f"{PLAN_INSTRUCTIONS}\nGOAL:\n{goal.strip()}\n\nINITIAL WORLD STATE:\n"
+            self.base_state = fit_to_budget(
+                self.base_context, estimate_tokens(head), int(self.token_budget * PREFIX_BUDGET_SHARE)
+            )
+
+        prefix = (
+            f"{PLAN_INSTRUCTIONS}\n"
+            f"GOAL:\n{self.base_goal.strip()}\n\n"
+            f"INITIAL WORLD STATE:\n{normalize_context(self.base_state)}\n"
+        )
+
+        changed = {
+            k: v for k, v in runtime_context.items()
+            if k not in self.base_context or self.base_context[k] != v
+        }
+        changed.update({k: None for k in self.base_context if k not in runtime_context})
+
+        update = ""
+        if goal != self.base_goal:
+            update += f"\nFEEDBACK:\n{goal.strip()}\n"
+
+        if changed:
+            changed = fit_to_budget(changed, estimate_tokens(prefix + update), self.token_budget)
+        if changed:
+            update += f"\nWORLD STATE CHANGES:\n{normalize_context(changed)}\n"
+
+        return self._record(prefix + update)
+
+    def build_repair(self, error: Exception, runtime_context: dict) -> str:
+        fixed = f"{REPAIR_INSTRUCTIONS}\nERROR:\n{error}\n\nCURRENT WORLD STATE:\n"
+        state = fit_to_budget(runtime_context, estimate_tokens(fixed), self.token_budget)
+        return self._record(fixed + normalize_context(state) + "\n")
+
+    def _record(self, prompt: str) -> str:
+        tokens = estimate_tokens(prompt)
+        self.prompt_tokens.append(tokens)
+        log(f"📏 Prompt #{len(self.prompt_tokens)}: ~{tokens} tokens")
+        return prompt
@@ -0,0 +1,88 @@
+"""
+Single-flight coalescing of identical in-flight calls.
+
+While one caller (the leader) runs the call for a key, every other caller
+with the same key waits for that result instead of issuing its own request.
+The result, or the exception, is handed to all of them. Once the call
+finishes the key is free again, so nothing is remembered between flights;
+caching is ToolResultCache's job.
+
+Works for threads (do) and for asyncio (do_async). An async flight runs as
+its own task, so a cancelled waiter, leader included, never cancels the call
+for the others.
+"""
+import asyncio
+import threading
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self.calls = 0        # every do / do_async
+        self.executions = 0   # calls that actually reached the backend
+        self._flights = {}    # key -> _Flight
+        self._tasks = {}      # (event loop, key) -> asyncio.Task
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        """Run func() once per key at a time; concurrent callers share its outcome."""
+        with self._lock:
+            self.calls += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.executions += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = func()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    async def do_async(self, key, make_coro):
+        """Async do: make_coro() is awaited once per key (per event loop) at a time."""
+        loop_key = (asyncio.get_running_loop(), key)
+        with self._lock:
+            self.calls += 1
+            task = self._tasks.get(loop_key)
+            if task is None:
+                task = self._tasks[loop_key] = asyncio.ensure_future(make_coro())
+                task.add_done_callback(lambda done: self._land(loop_key, done))
+                self.executions += 1
+
+        return await asyncio.shield(task)
+
+    def _land(self, loop_key, task):
+        with self._lock:
+            if self._tasks.get(loop_key) is task:
+                del self._tasks[loop_key]
+
+    def stats(self) -> dict:
+        coalesced = self.calls - self.executions
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": coalesced,
+            "coalescing_ratio": coalesced / self.calls if self.calls else 0.0,
+            "in_flight": len(self._flights) + len(self._tasks),
+        }
@@ -0,0 +1,110 @@
+"""
+Local stand-in for the commerce backend behind api_explorer's catalog,
+so HTTP tools can be exercised offline:
+
+    with StubCommerceServer() as server:
+        register_http_tools(discover_api("shopify_like_system"), server.base_url)
+
+Speaks HTTP/1.1 keep-alive and counts the connections it accepts.
+`fail_next` makes the next N requests answer 503 to exercise retries;
+`drop_next` makes the next N replies silently close their connection, the
+way a server's idle timeout leaves a pooled keep-alive connection stale.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class _CommerceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without this, Nagle plus
+    # delayed ACKs stall every kept-alive request by ~40 ms
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.owner.lock:
+            self.server.owner.connections += 1
+
+    def _reply(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method: str):
+        owner = self.server.owner
+        parts = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length)) if length else {}
+
+        with owner.lock:
+            owner.requests += 1
+            failing = owner.fail_next > 0
+            owner.fail_next -= failing
+            dropping = owner.drop_next > 0
+            owner.drop_next -= dropping
+        if dropping:
+            # Closed after this reply without a "Connection: close" the client could see
+            self.close_connection = True
+        if owner.delay:
+            time.sleep(owner.delay)
+        if failing:
+            self._reply(503, {"error": "temporarily unavailable"})
+            return
+
+        segments = parts.path.strip("/").split("/")
+        if method == "GET" and segments[0] == "orders" and len(segments) == 2:
+            self._reply(200, {"order_id": segments[1], "order_status": "paid"})
+        elif method == "GET" and segments[0] == "inventory" and len(segments) == 2:
+            self._reply(200, {"sku": segments[1], "inventory": 10, **parse_qs(parts.query)})
+        elif method == "POST" and segments == ["refunds"]:
+            self._reply(200, {"refund_id": f"r_{body.get('order_id')}", "order_id": body.get("order_id")})
+        else:
+            self._reply(404, {"error": f"no route for {method} {parts.path}"})
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self._handle("GET")
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        self._handle("POST")
+
+    def log_message(self, *_args):
+        pass
+
+
+class StubCommerceServer:
+    def __init__(self, delay: float = 0.0, port: int = 0):
+        self.delay = delay
+        self.fail_next = 0
+        self.drop_next = 0
+        self.requests = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), _CommerceHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.owner = self
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *_exc):
+        self.stop()
@@ -0,0 +1,197 @@
+"""
+Local stand-in for the OpenAI client so the agent loop can run offline.
+It mimics `client.responses.create(model=..., input=...)` and answers with
+canonical plan JSON after a configurable delay.
+With stream=True the answer arrives as output_text delta events instead;
+FakeStreamingServer serves the same events over HTTP for the real client.
+"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+DEFAULT_PLAN = {
+    "plan": [
+        {"action": "check_inventory", "order_id": 123},
+        {"action": "refund_order", "order_id": 123},
+    ]
+}
+
+
+class _StubResponses:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, model: str, input: str, stream: bool = False):  # pylint: disable=redefined-builtin
+        time.sleep(self._owner.latency)
+        if stream:
+            return StubStream(self._owner, self._owner.respond(model, input).output_text)
+        return self._owner.respond(model, input)
+
+
+class _AsyncStubResponses:
+    def __init__(self, owner):
+        self._owner = owner
+
+    async def create(self, model: str, input: str, stream: bool = False):  # pylint: disable=redefined-builtin
+        await asyncio.sleep(self._owner.latency)
+        if stream:
+            return AsyncStubStream(self._owner, self._owner.respond(model, input).output_text)
+        return self._owner.respond(model, input)
+
+
+def text_chunks(text: str, chunk_size: int) -> list:
+    return [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+
+
+def delta_event(delta: str) -> SimpleNamespace:
+    return SimpleNamespace(type="response.output_text.delta", delta=delta)
+
+
+class StubStream:
+    """Iterable of delta events; close() cancels the rest, like openai.Stream."""
+
+    def __init__(self, owner, text: str):
+        self._owner = owner
+        self._chunks = text_chunks(text, owner.chunk_size)
+        self.closed = False
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            if self.closed:
+                return
+            time.sleep(self._owner.chunk_delay)
+            self._owner.chunks_sent += 1
+            yield delta_event(chunk)
+
+    def close(self):
+        self.closed = True
+
+
+class AsyncStubStream(StubStream):
+    """Async iterable counterpart of StubStream, like openai.AsyncStream."""
+
+    async def __aiter__(self):
+        for chunk in self._chunks:
+            if self.closed:
+                return
+            await asyncio.sleep(self._owner.chunk_delay)
+            self._owner.chunks_sent += 1
+            yield delta_event(chunk)
+
+    async def close(self):
+        self.closed = True
+
+
+class StubLLMClient:
+    """Sync stub: drop-in for `OpenAI()` in call_llm / run_agent."""
+
+    def __init__(self, plan: dict = None, latency: float = 0.0, chunk_size: int = 8, chunk_delay: float = 0.0):
+        self.plan_text = json.dumps(plan or DEFAULT_PLAN)
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.calls = 0
+        self.chunks_sent = 0
+        self.responses = _StubResponses(self)
+
+    def respond(self, _model: str, _prompt: str):
+        self.calls += 1
+        return SimpleNamespace(output_text=self.plan_text)
+
+
+class AsyncStubLLMClient(StubLLMClient):
+    """Async stub: drop-in for `AsyncOpenAI()` in call_llm_async / run_agent_async."""
+
+    def __init__(self, plan: dict = None, latency: float = 0.0, chunk_size: int = 8, chunk_delay: float = 0.0):
+        super().__init__(plan, latency, chunk_size, chunk_delay)
+        self.responses = _AsyncStubResponses(self)
+
+
+class _FakeResponsesHandler(BaseHTTPRequestHandler):
+    """POST {base_url}/responses, answered as JSON or as server-sent events."""
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        server = self.server.owner
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        text = server.plan_text
+        server.calls += 1
+
+        if not body.get("stream"):
+            payload = json.dumps({
+                "id": "resp_stub", "object": "response", "created_at": 0,
+                "model": body.get("model", ""), "status": "completed",
+                "output": [{
+                    "type": "message", "id": "msg_stub", "role": "assistant", "status": "completed",
+                    "content": [{"type": "output_text", "text": text, "annotations": []}],
+                }],
+                "parallel_tool_calls": False, "tool_choice": "auto", "tools": [],
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        try:
+            for seq, chunk in enumerate(text_chunks(text, server.chunk_size)):
+                time.sleep(server.chunk_delay)
+                event = {
+                    "type": "response.output_text.delta", "delta": chunk, "item_id": "msg_stub",
+                    "output_index": 0, "content_index": 0, "sequence_number": seq, "logprobs": [],
+                }
+                self.wfile.write(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode())
+                self.wfile.flush()
+                server.chunks_sent += 1
+            self.wfile.write(b'event: response.completed\ndata: {"type": "response.completed"}\n\n')
+        except (BrokenPipeError, ConnectionResetError):
+            # The client cancelled the stream
+            server.cancelled += 1
+
+    def log_message(self, *_args):
+        pass
+
+
+class FakeStreamingServer:
+    """
+    Local HTTP stand-in for the Responses API, for the real OpenAI client:
+        with FakeStreamingServer(chunk_delay=0.01) as server:
+            client = OpenAI(base_url=server.base_url, api_key="stub")
+    """
+
+    def __init__(self, plan: dict = None, chunk_size: int = 8, chunk_delay: float = 0.0, port: int = 0):
+        self.plan_text = json.dumps(plan or DEFAULT_PLAN)
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.calls = 0
+        self.chunks_sent = 0
+        self.cancelled = 0
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), _FakeResponsesHandler)
+        self._httpd.owner = self
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *_exc):
+        self.stop()
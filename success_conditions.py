@@ -0,0 +1,203 @@
+"""
+Compiled ActionStep.success_condition predicates.
+
+A condition such as "result.get('status') == 'success'" or
+"result['inventory'] > 0" is parsed once with `ast` and turned into nested
+closures over a small whitelist:
+
+- the name `result`, and constants
+- `x.get(key[, default])`, `x[key]` and `len(x)`
+- comparisons (including chained ones and `in` / `is`)
+- `and` / `or` / `not` / unary minus
+- tuple, list and set literals
+
+Nothing is ever passed to eval. Compiled predicates are kept in an LRU
+cache keyed by their text, so a condition repeated across millions of
+steps costs one cache lookup plus the closure call, and a stream of
+one-off LLM-written conditions cannot grow it without bound. A condition that fails while evaluating
+(missing key, wrong type) just means the step did not succeed.
+"""
+import ast
+import functools
+import operator
+
+DEFAULT_CONDITION = "result.get('status') == 'success'"
+
+COMPARE_OPS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda a, b: a in b,
+    ast.NotIn: lambda a, b: a not in b,
+    ast.Is: operator.is_,
+    ast.IsNot: operator.is_not,
+}
+
+# Distinct condition texts kept compiled (least recently used go first)
+MAX_SUCCESS_PREDICATES = 4096
+
+
+def _compile(node):
+    """AST node → function of `result`. Raises ValueError for anything off the whitelist."""
+    if isinstance(node, ast.Constant):
+        value = node.value
+        return lambda result: value
+
+    if isinstance(node, ast.Name):
+        if node.id != "result":
+            raise ValueError(f"Unknown name in success condition: {node.id}")
+        return lambda result: result
+
+    if isinstance(node, (ast.Tuple, ast.List, ast.Set)):
+        items = [_compile(elt) for elt in node.elts]
+        kind = {ast.Tuple: tuple, ast.List: list, ast.Set: frozenset}[type(node)]
+        return lambda result: kind(item(result) for item in items)
+
+    if isinstance(node, ast.Subscript):
+        target, key = _compile(node.value), _compile(node.slice)
+        return lambda result: target(result)[key(result)]
+
+    if isinstance(node, ast.Call):
+        if node.keywords:
+            raise ValueError("Keyword arguments are not allowed in success conditions")
+        args = [_compile(arg) for arg in node.args]
+        func = node.func
+
+        if isinstance(func, ast.Attribute) and func.attr == "get" and 1 <= len(args) <= 2:
+            target = _compile(func.value)
+            if len(args) == 1:
+                key = args[0]
+                return lambda result: target(result).get(key(result))
+            key, default = args
+            return lambda result: target(result).get(key(result), default(result))
+
+        if isinstance(func, ast.Name) and func.id == "len" and len(args) == 1:
+            arg = args[0]
+            return lambda result: len(arg(result))
+
+        raise ValueError(f"Call not allowed in success condition: {ast.unparse(node)}")
+
+    if isinstance(node, ast.Compare):
+        fast = _compile_field_compare(node)
+        if fast is not None:
+            return fast
+        left = _compile(node.left)
+        ops = [COMPARE_OPS.get(type(op)) for op in node.ops]
+        if None in ops:
+            raise ValueError(f"Comparison not allowed in success condition: {ast.unparse(node)}")
+        rights = [_compile(c) for c in node.comparators]
+
+        if len(ops) == 1:
+            op, right = ops[0], rights[0]
+            return lambda result: op(left(result), right(result))
+
+        def chained(result):
+            current = left(result)
+            for op, right in zip(ops, rights):
+                value = right(result)
+                if not op(current, value):
+                    return False
+                current = value
+            return True
+        return chained
+
+    if isinstance(node, ast.BoolOp):
+        parts = [_compile(value) for value in node.values]
+        if isinstance(node.op, ast.And):
+            def all_of(result):
+                value = True
+                for part in parts:
+                    value = part(result)
+                    if not value:
+                        return value
+                return value
+            return all_of
+
+        def any_of(result):
+            value = False
+            for part in parts:
+                value = part(result)
+                if value:
+                    return value
+            return value
+        return any_of
+
+    if isinstance(node, ast.UnaryOp):
+        operand = _compile(node.operand)
+        if isinstance(node.op, ast.Not):
+            return lambda result: not operand(result)
+        if isinstance(node.op, ast.USub):
+            return lambda result: -operand(result)
+
+    raise ValueError(f"Unsupported success condition syntax: {type(node).__name__}")
+
+
+def _field_of(node):
+    """('get' | 'item', key) for result.get('key') / result['key'], else None."""
+    if isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name) \
+            and node.value.id == "result" and isinstance(node.slice, ast.Constant):
+        return "item", node.slice.value
+    if isinstance(node, ast.Call) and not node.keywords and len(node.args) == 1 \
+            and isinstance(node.func, ast.Attribute) and node.func.attr == "get" \
+            and isinstance(node.func.value, ast.Name) and node.func.value.id == "result" \
+            and isinstance(node.args[0], ast.Constant):
+        return "get", node.args[0].value
+    return None
+
+
+def _compile_field_compare(node):
+    """
+    Single closure for the shape nearly every condition has:
+    result.get('key') <op> constant, or result['key'] <op> constant.
+    """
+    if len(node.ops) != 1 or not isinstance(node.comparators[0], ast.Constant):
+        return None
+    field = _field_of(node.left)
+    op = COMPARE_OPS.get(type(node.ops[0]))
+    if field is None or op is None:
+        return None
+
+    kind, key = field
+    value = node.comparators[0].value
+    if kind == "get" and op is operator.eq:
+        return lambda result: result.get(key) == value
+    if kind == "get":
+        return lambda result: op(result.get(key), value)
+    return lambda result: op(result[key], value)
+
+
+def compile_success_condition(text: str):
+    """
+    Predicate `result -> bool` for a success condition, cached by text.
+    An empty condition means the usual status check.
+    Raises ValueError for anything that is not a safe condition string,
+    including non-strings an LLM may put in the field.
+    """
+    if type(text) is not str:
+        raise ValueError(f"Success condition must be a string, got {type(text).__name__}: {text!r}")
+    return _compile_text(text)
+
+
+@functools.lru_cache(maxsize=MAX_SUCCESS_PREDICATES)
+def _compile_text(text: str):
+    """Parse and compile one condition text. Only successes are cached."""
+    try:
+        tree = ast.parse(text.strip() or DEFAULT_CONDITION, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid success condition {text!r}: {e.msg}") from e
+    body = _compile(tree.body)
+
+    def predicate(result) -> bool:
+        try:
+            return bool(body(result))
+        except (LookupError, TypeError, AttributeError, ValueError):
+            return False
+
+    return predicate
+
+
+def step_succeeded(step, result) -> bool:
+    return compile_success_condition(step.success_condition)(result)
@@ -0,0 +1,15 @@
+"""ActionPlan keeps the sequences it is given."""
+from agent_models import NO_CONDITIONS, NO_STEPS, ActionPlan, ActionStep
+
+
+def test_caller_lists_are_kept():
+    preconditions, fallback = [], []
+    plan = ActionPlan("g", preconditions, [ActionStep("refund_order", {}, "")], [], fallback)
+    plan.fallback.append(ActionStep("verify_order", {}, ""))
+    assert plan.preconditions is preconditions
+    assert fallback == [ActionStep("verify_order", {}, "")]
+
+
+def test_omitted_sequences_share_the_empty_tuples():
+    plan = ActionPlan("g", NO_CONDITIONS, [])
+    assert plan.postconditions is NO_CONDITIONS and plan.fallback is NO_STEPS
@@ -0,0 +1,140 @@
+"""LLM call caching, prompt construction and streamed plan checks."""
+import json
+
+import pytest
+from openai import OpenAI
+
+import tracing
+from agent_runner import call_llm, call_llm_stream, call_repair_llm
+from ask_bridge import REPAIR_STATS, llm_to_action_plan
+from law_compiler import compile_law
+from law_enforcer import install_law_book, validate_plan
+from law_engine import LawViolation
+from llm_cache import LLMCache
+from prompt_builder import PromptBuilder, estimate_tokens
+from stub_llm import FakeStreamingServer, StubLLMClient, text_chunks
+
+FEEDBACK = "Your last plan was blocked because: Check inventory first. Now propose a new plan."
+
+
+@pytest.fixture(autouse=True)
+def quiet():
+    tracing.set_quiet(True)
+    yield
+    tracing.set_quiet(False)
+
+
+def test_feedback_iterations_of_different_tickets_do_not_share_cache_entries():
+    cache = LLMCache()
+    context = {"order_id": 1, "inventory": 5}
+    tickets = {
+        "Refund order #111": StubLLMClient({"plan": [{"action": "refund_order", "order_id": 111}]}),
+        "Cancel order #222": StubLLMClient({"plan": [{"action": "cancel_order", "order_id": 222}]}),
+    }
+
+    for goal, client in tickets.items():
+        builder = PromptBuilder()
+        first = call_llm(goal, context, client, cache, builder)
+        # Same feedback and world state as the other ticket, but a different original goal
+        retry = call_llm(FEEDBACK, context, client, cache, builder)
+        assert retry == first == client.plan_text
+        assert client.calls == 2
+
+
+def test_identical_tickets_share_cache_entries():
+    cache = LLMCache()
+    client = StubLLMClient()
+    for _ in range(3):
+        call_llm("Refund order #111", {"inventory": 5}, client, cache, PromptBuilder())
+    assert client.calls == 1
+
+
+def test_initial_world_state_fits_the_token_budget():
+    context = {f"note_{i}": "x" * 150 for i in range(270)}
+    context["history"] = list(range(5000))
+    context["order_id"] = 111
+
+    builder = PromptBuilder(token_budget=500)
+    first = builder.build("Refund order #111", context)
+    assert estimate_tokens(first) <= 500
+
+    retry = builder.build(FEEDBACK, dict(context, inventory=3))
+    assert estimate_tokens(retry) <= 500
+    # The stable prefix is unchanged, so the provider's prefix cache still hits
+    assert retry.startswith(first.rstrip("\n"))
+
+
+@pytest.mark.parametrize("raw", ["not json at all", '{"plan": "not a list"}', '{"unknown": 1}'])
+def test_unparseable_proposals_are_not_cached(raw):
+    cache = LLMCache()
+    client = StubLLMClient()
+    client.plan_text = raw
+    for _ in range(3):
+        assert call_llm("Refund order #111", {"inventory": 5}, client, cache, PromptBuilder()) == raw
+    assert client.calls == 3
+    assert cache.stats()["entries"] == 0
+
+
+def test_unparseable_repairs_are_not_cached():
+    cache = LLMCache()
+    client = StubLLMClient()
+    client.plan_text = "still not json"
+    error = ValueError("Expecting value: line 1 column 1 (char 0)")
+    for _ in range(3):
+        call_repair_llm(error, {"inventory": 5}, client, cache, PromptBuilder())
+    assert client.calls == 3
+
+
+def test_caching_a_locally_repaired_proposal_does_not_count_the_repair():
+    cache = LLMCache()
+    client = StubLLMClient()
+    client.plan_text = '{"plan": [{"action": "check_inventory", "order_id": 1},]}'
+    before = REPAIR_STATS.copy()
+    call_llm("Refund order #111", {"inventory": 5}, client, cache, PromptBuilder())
+    assert REPAIR_STATS == before
+    assert cache.stats()["entries"] == 1
+
+
+@pytest.fixture
+def refund_cap():
+    install_law_book([compile_law('LAW { when amount > 100 block refund_order because "Refund over cap" }')])
+    yield
+    install_law_book([])
+
+
+def blocked(check) -> bool:
+    try:
+        check()
+        return False
+    except LawViolation:
+        return True
+
+
+@pytest.mark.parametrize("plan", [
+    # Canonical: only order_id reaches the tool, so the amount is never checked
+    {"plan": [{"action": "refund_order", "order_id": 1, "amount": 500}]},
+    {"plan": [{"action": "verify_order", "order_id": 1}, {"action": "refund_order", "order_id": 1, "amount": 500}]},
+    # Loose: every input is kept
+    {"plan": [{"action": "notify"}, {"action": "refund_order", "order_id": 1, "amount": 500}]},
+    {"plan": [{"action": "notify"}, {"action": "refund_order", "order_id": 1, "amount": 50}]},
+])
+def test_streamed_steps_match_the_parsed_plan(refund_cap, plan):
+    client = StubLLMClient(plan, chunk_size=5)
+    parsed = llm_to_action_plan(client.plan_text, stats=None)
+    assert blocked(lambda: call_llm_stream("Refund order #1", {}, client, cache=None)) \
+        == blocked(lambda: validate_plan(parsed, {}))
+
+
+def test_illegal_step_cancels_the_real_stream(refund_cap):
+    steps = [{"action": "notify"}, {"action": "refund_order", "order_id": 1, "amount": 500}]
+    steps += [{"action": "notify", "note": f"step {i}"} for i in range(40)]
+    plan = {"plan": steps}
+    total_chunks = len(text_chunks(json.dumps(plan), 8))
+
+    with FakeStreamingServer(plan, chunk_size=8, chunk_delay=0.002) as server:
+        client = OpenAI(base_url=server.base_url, api_key="stub", max_retries=0)
+        with pytest.raises(LawViolation, match="Refund over cap"):
+            call_llm_stream("Refund order #1", {}, client, cache=None)
+
+    assert server.calls == 1
+    assert server.chunks_sent < total_chunks // 2
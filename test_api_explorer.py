@@ -0,0 +1,59 @@
+"""OpenAPI ingestion: route resolution and the on-disk catalog cache."""
+import json
+import os
+
+import pytest
+
+import api_explorer
+from api_explorer import load_openapi
+
+SPEC = {
+    "openapi": "3.0.0",
+    "servers": [{"url": "http://commerce.internal"}],
+    "paths": {
+        "/orders/{order_id}": {"get": {"operationId": "get_order"}},
+        "/orders/{id}/items": {"get": {"operationId": "list_items"}},
+        "/orders/{id}/items/{item_id}": {"get": {"operationId": "get_item"}},
+        "/orders/export": {"get": {"operationId": "export_orders"}},
+    },
+}
+
+
+@pytest.fixture
+def spec_path(tmp_path):
+    path = tmp_path / "spec.json"
+    path.write_text(json.dumps(SPEC))
+    return str(path)
+
+
+@pytest.mark.parametrize("path, operation_id, params", [
+    ("/orders/5", "get_order", {"order_id": "5"}),
+    ("/orders/5/items", "list_items", {"id": "5"}),
+    ("/orders/5/items/9", "get_item", {"id": "5", "item_id": "9"}),
+    ("/orders/export", "export_orders", {}),
+    ("/orders/export/items", "list_items", {"id": "export"}),
+])
+def test_params_are_named_by_the_matched_template(spec_path, tmp_path, path, operation_id, params):
+    catalog = load_openapi(spec_path, cache_dir=str(tmp_path / "cache"))
+    operation, found = catalog.resolve("GET", path)
+    assert operation["operation_id"] == operation_id
+    assert found == params
+
+
+def test_unknown_routes_do_not_resolve(spec_path, tmp_path):
+    catalog = load_openapi(spec_path, cache_dir=str(tmp_path / "cache"))
+    assert catalog.resolve("GET", "/orders/5/refunds") == (None, {})
+    assert catalog.resolve("POST", "/orders/5") == (None, {})
+
+
+def test_cache_is_keyed_on_the_catalog_format(spec_path, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    load_openapi(spec_path, cache_dir=cache_dir)
+    (cached,) = os.listdir(cache_dir)
+    # A cache entry written by an older parser, for the same spec
+    with open(os.path.join(cache_dir, cached), "w", encoding="utf-8") as f:
+        json.dump({"base_url": "", "operations": []}, f)
+
+    assert len(load_openapi(spec_path, cache_dir=cache_dir)) == 0   # same format: served from cache
+    monkeypatch.setattr(api_explorer, "CATALOG_FORMAT_VERSION", api_explorer.CATALOG_FORMAT_VERSION + 1)
+    assert len(load_openapi(spec_path, cache_dir=cache_dir)) == len(SPEC["paths"])
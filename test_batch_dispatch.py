@@ -0,0 +1,43 @@
+"""BatchedTool: calls that don't fit the bulk endpoint stay out of the batch."""
+from concurrent.futures import wait
+
+import pytest
+
+from batch_dispatch import BatchedTool, register_batch_tool
+from law_engine import TOOL_REGISTRY
+
+
+def bulk(order_ids):
+    return [{"status": "success", "order_id": order_id} for order_id in order_ids]
+
+
+def single(order_id, note=None):
+    return {"status": "success", "order_id": order_id, "note": note}
+
+
+def test_mismatched_inputs_fail_only_their_caller():
+    tool = BatchedTool("lookup", bulk, arg="order_id", window=0.05)
+    futures = [tool.submit({"order_id": 1}), tool.submit({"id": 2}), tool.submit({"order_id": 3})]
+    wait(futures, timeout=2)
+
+    assert futures[0].result() == {"status": "success", "order_id": 1}
+    assert futures[2].result() == {"status": "success", "order_id": 3}
+    with pytest.raises(TypeError):
+        futures[1].result()
+    assert tool.stats()["batches"] == 1
+
+
+def test_extra_inputs_go_to_the_unbatched_tool():
+    original = TOOL_REGISTRY.get("lookup")
+    TOOL_REGISTRY["lookup"] = single
+    try:
+        tool = register_batch_tool("lookup", bulk, arg="order_id", window=0.01)
+        assert tool(order_id=1, note="rush") == {"status": "success", "order_id": 1, "note": "rush"}
+        assert tool(order_id=2) == {"status": "success", "order_id": 2}
+        # Re-registering keeps the original single-call tool, not the previous BatchedTool
+        assert register_batch_tool("lookup", bulk, arg="order_id").unbatched is single
+    finally:
+        if original is None:
+            TOOL_REGISTRY.pop("lookup", None)
+        else:
+            TOOL_REGISTRY["lookup"] = original
@@ -0,0 +1,58 @@
+"""batch_runner end to end, replaying a recorded cassette in the workers."""
+import json
+
+import pytest
+
+import tracing
+from agent_runner import run_agent
+from batch_runner import run_batch
+from law_enforcer import clear_laws
+from llm_backends import Cassette, RecordingBackend
+from stub_llm import StubLLMClient
+
+CONTEXT = {"inventory": 10, "refund_done": False}
+
+
+@pytest.fixture
+def cassette_path(tmp_path):
+    tracing.set_quiet(True)
+    clear_laws()
+    path = str(tmp_path / "tickets.cassette")
+    cassette = Cassette(path)
+    llm = RecordingBackend(StubLLMClient(), cassette)
+    for i in range(3):
+        run_agent(f"Refund order #{i}", dict(CONTEXT), llm_client=llm, cache=None)
+    cassette.close()
+    yield path
+    tracing.set_quiet(False)
+
+
+def read_records(path) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_malformed_lines_become_error_records(tmp_path, cassette_path, ordered):
+    lines = [
+        json.dumps({"goal": "Refund order #0", "runtime_context": CONTEXT}),
+        '{"goal": "Refund order #1", "runtime_con',
+        json.dumps({"goal": "Refund order #1", "runtime_context": CONTEXT}),
+        "[1, 2, 3]",
+        json.dumps({"goal": "Refund order #2", "runtime_context": CONTEXT}),
+    ]
+    tickets, results = tmp_path / "tickets.jsonl", tmp_path / "results.jsonl"
+    tickets.write_text("\n".join(lines) + "\n")
+
+    counts = run_batch(str(tickets), str(results), workers=2, ordered=ordered, replay=cassette_path)
+
+    records = {record["offset"]: record for record in read_records(results)}
+    assert sorted(records) == [0, 1, 2, 3, 4]
+    assert counts["written"] == 5 and counts["ERROR"] == 2
+    for offset in (1, 3):
+        assert records[offset]["status"] == "ERROR"
+        assert records[offset]["reason"].startswith("malformed ticket line")
+    for offset in (0, 2, 4):
+        assert records[offset]["status"] == "SUCCESS"
+    if ordered:
+        assert [record["offset"] for record in read_records(results)] == [0, 1, 2, 3, 4]
@@ -0,0 +1,97 @@
+"""HttpTool against the local stub commerce server."""
+import pytest
+
+from http_tools import HttpTool, close_pools, register_http_tools
+from law_engine import READ_ONLY_TOOLS, TOOL_REGISTRY
+from stub_commerce import StubCommerceServer
+
+
+@pytest.fixture
+def server():
+    with StubCommerceServer() as server:
+        yield server
+    close_pools()
+
+
+def tool(server, method="GET", path="/orders/{order_id}", **kwargs) -> HttpTool:
+    kwargs.setdefault("backoff", 0.001)
+    return HttpTool(server.base_url, method, path, **kwargs)
+
+
+def test_keep_alive_connections_are_reused(server):
+    get_order = tool(server)
+    for i in range(10):
+        assert get_order(order_id=i) == {"order_id": str(i), "order_status": "paid", "status": "success"}
+    assert server.connections == 1
+    assert get_order.pool.stats()["reused"] == 9
+
+
+def test_unpooled_tool_opens_a_connection_per_call(server):
+    get_order = tool(server, pooled=False)
+    for i in range(3):
+        get_order(order_id=i)
+    assert server.connections == 3
+
+
+def test_get_retries_transient_errors(server):
+    server.fail_next = 2
+    get_order = tool(server, retries=2)
+    assert get_order(order_id=1)["status"] == "success"
+    assert server.requests == 3
+    assert get_order.retried == 2
+
+
+def test_get_gives_up_after_its_retries(server):
+    server.fail_next = 5
+    result = tool(server, retries=2)(order_id=1)
+    assert result["status"] == "error" and result["http_status"] == 503
+    assert server.requests == 3
+
+
+def test_post_is_not_retried_after_the_server_saw_it(server):
+    server.fail_next = 1
+    refund = tool(server, "POST", "/refunds", retries=2)
+    result = refund(order_id=7)
+    assert result["status"] == "error" and result["http_status"] == 503
+    assert server.requests == 1
+
+
+def test_post_is_retried_on_a_stale_keep_alive_connection(server):
+    refund = tool(server, "POST", "/refunds", retries=2)
+    server.drop_next = 1
+    assert refund(order_id=1)["status"] == "success"   # the server drops this connection afterwards
+
+    result = refund(order_id=2)
+    assert result == {"refund_id": "r_2", "order_id": 2, "status": "success"}
+    assert refund.retried == 1
+    assert server.requests == 2   # the stale attempt never reached the server
+    assert server.connections == 2
+
+
+@pytest.mark.parametrize("order_id", ["../inventory/abc", "1?sku=x", "1#frag", "a/b"])
+def test_path_values_cannot_change_the_endpoint(server, order_id):
+    result = tool(server)(order_id=order_id)
+    # One escaped segment under /orders, never another route or a query string
+    assert result["status"] == "success"
+    assert "inventory" not in result and "sku" not in result
+    assert result["order_id"] != order_id.split("/")[0]
+
+
+def test_local_errors_are_not_retried(server):
+    bad = HttpTool(server.base_url + "/bad path", "GET", "/orders/{order_id}", retries=3, backoff=0.001)
+    result = bad(order_id=1)
+    assert result["status"] == "error" and "InvalidURL" in result["error"]
+    assert bad.retried == 0
+    assert server.requests == 0
+
+
+def test_reregistering_a_name_as_a_write_clears_read_only(server):
+    tool_names = {"/orders/{order_id}": "order_tool"}
+    try:
+        register_http_tools({"endpoints": {"/orders/{order_id}": {"method": "GET"}}}, server.base_url, tool_names)
+        assert "order_tool" in READ_ONLY_TOOLS
+        register_http_tools({"endpoints": {"/orders/{order_id}": {"method": "POST"}}}, server.base_url, tool_names)
+        assert "order_tool" not in READ_ONLY_TOOLS
+    finally:
+        READ_ONLY_TOOLS.discard("order_tool")
+        TOOL_REGISTRY.pop("order_tool", None)
@@ -0,0 +1,104 @@
+"""Law enforcement regressions. Run with: python -m pytest -q"""
+import gc
+
+import pytest
+
+import tracing
+from agent_models import ActionPlan, ActionStep
+from execution_engine import execute_plan
+from law_compiler import compile_law
+from law_enforcer import (
+    LAW_INTERN, TENANT_BOOKS, _BOOKS_BY_CONTENT, add_law, check_step_legality, clear_laws,
+    install_tenant_law_book, remove_tenant, validate_plan
+)
+from law_engine import LawViolation
+from law_models import Law
+from observable_context import ObservableContext
+
+
+def law(condition: str, tool: str = "refund_order") -> str:
+    return f'LAW {{ when {condition} block {tool} because "blocked: {condition}" }}'
+
+
+def refund_plan(order_id: int = 111) -> ActionPlan:
+    return ActionPlan(
+        goal="refund",
+        preconditions=[],
+        actions=[ActionStep("refund_order", {"order_id": order_id}, "result.get('status') == 'success'")],
+        postconditions=[],
+        fallback=[]
+    )
+
+
+@pytest.fixture(autouse=True)
+def law_book():
+    tracing.set_quiet(True)
+    clear_laws()
+    yield
+    clear_laws()
+    tracing.set_quiet(False)
+
+
+@pytest.mark.parametrize("condition, context", [
+    ("inventory == 0", {"inventory": 0}),
+    ("refund_done == False", {"refund_done": False}),
+])
+def test_falsy_context_values_still_violate(condition, context):
+    add_law(compile_law(law(condition)))
+
+    for make in (dict, ObservableContext):
+        runtime_context = make(context)
+        result = execute_plan(refund_plan(), runtime_context)
+        assert result["status"] == "BLOCKED"
+        assert result["reason"] == f"blocked: {condition}"
+
+        with pytest.raises(LawViolation):
+            validate_plan(refund_plan(), make(context))
+        with pytest.raises(LawViolation):
+            check_step_legality(refund_plan().actions[0], make(context))
+
+
+def test_step_inputs_fill_in_missing_context_fields():
+    add_law(compile_law(law("order_id == 111")))
+
+    with pytest.raises(LawViolation):
+        check_step_legality(refund_plan(111).actions[0], {})
+    with pytest.raises(LawViolation):
+        check_step_legality(refund_plan(111).actions[0], ObservableContext())
+    assert check_step_legality(refund_plan(222).actions[0], {})
+    # A context value wins over the step's own input
+    assert check_step_legality(refund_plan(111).actions[0], {"order_id": 222})
+
+
+def test_tenants_with_same_law_id_but_different_rules_keep_their_own():
+    install_tenant_law_book("a", [Law(id="store-rule", condition="inventory > 0",
+                                      block_actions=["refund_order"], reason="a's rule")])
+    install_tenant_law_book("b", [Law(id="store-rule", condition="inventory < 0",
+                                      block_actions=["cancel_order"], reason="b's rule")])
+    try:
+        assert TENANT_BOOKS["a"] is not TENANT_BOOKS["b"]
+        assert [law.reason for law in TENANT_BOOKS["b"].laws] == ["b's rule"]
+
+        refund = refund_plan().actions[0]
+        with pytest.raises(LawViolation, match="a's rule"):
+            check_step_legality(refund, {"inventory": 5}, tenant="a")
+        assert check_step_legality(refund, {"inventory": 5}, tenant="b")
+    finally:
+        remove_tenant("a")
+        remove_tenant("b")
+
+
+def test_removed_tenants_and_reloads_release_books_and_laws():
+    gc.collect()
+    laws_before, books_before = len(LAW_INTERN), len(_BOOKS_BY_CONTENT)
+
+    for tenant in range(50):
+        for version in range(3):  # hot reloads replace the book each time
+            install_tenant_law_book(tenant, [compile_law(law(f"inventory > {tenant * 10 + version}"))])
+    assert len(_BOOKS_BY_CONTENT) == books_before + 50
+
+    for tenant in range(50):
+        remove_tenant(tenant)
+    gc.collect()
+    assert len(LAW_INTERN) == laws_before
+    assert len(_BOOKS_BY_CONTENT) == books_before
@@ -0,0 +1,34 @@
+"""LawScript parsing and compiled law predicates."""
+import pytest
+
+from law_compiler import compile_law
+from law_enforcer import LawBook, check_batch_legality
+from agent_models import ActionPlan, ActionStep
+
+
+def script(condition: str) -> str:
+    return f'LAW {{ when {condition} block refund_order because "rule" }}'
+
+
+@pytest.mark.parametrize("condition, context, violated", [
+    ("price > 1.5", {"price": 2}, True),
+    ("price > 1.5", {"price": 1.5}, False),
+    ("price <= -0.25", {"price": -1}, True),
+    ("price in 0.5..2.5", {"price": 1}, True),
+    ("price in 0.5..2.5", {"price": 3}, False),
+    ("qty >= 10", {"qty": 10}, True),
+    ("status == 1.5", {"status": 1.5}, True),
+])
+def test_numeric_literals(condition, context, violated):
+    law = compile_law(script(condition))
+    book = LawBook([law])
+    assert (book.first_violation("refund_order", context.get) is law) == violated
+
+    plan = ActionPlan("g", [], [ActionStep("refund_order", {}, "")], [], [])
+    assert check_batch_legality([(plan, context)], tenant=book) == [(not violated, "rule" if violated else None)]
+
+
+@pytest.mark.parametrize("condition", ["price > abc", "price < 1.5.2", "price in a..3", "price >= 1e3"])
+def test_non_numeric_ordering_literals_are_invalid_lawscript(condition):
+    with pytest.raises(ValueError, match="Invalid LawScript"):
+        compile_law(script(condition))
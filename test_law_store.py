@@ -0,0 +1,54 @@
+"""LawStore versioning and the hot-reload watcher."""
+import time
+
+import tracing
+from law_models import Law
+from law_store import LawStore, LawStoreWatcher
+
+
+def make_law(condition: str, reason: str = "Blocked") -> Law:
+    field, operator, value = condition.split()
+    return Law(id="refund-cap", condition=condition, field=field, operator=operator,
+               value=value, block_actions=["refund_order"], reason=reason)
+
+
+def test_republished_id_takes_new_content(tmp_path):
+    store = LawStore(str(tmp_path / "laws.db"))
+    first = store.publish([make_law("amount > 100")])
+    second = store.publish([make_law("amount > 500", reason="Too large")])
+
+    _, laws = store.load()
+    assert [(law.id, law.condition, law.reason) for law in laws] == [
+        ("refund-cap", "amount > 500", "Too large")
+    ]
+    _, old = store.load(first)
+    assert [(law.id, law.condition) for law in old] == [("refund-cap", "amount > 100")]
+    assert second == first + 1
+    store.close()
+
+
+def test_watcher_survives_failed_reload(tmp_path):
+    tracing.set_quiet(True)
+    store = LawStore(str(tmp_path / "laws.db"))
+    installed = []
+
+    def on_change(laws):
+        if not installed:
+            installed.append(None)
+            raise RuntimeError("install failed")
+        installed.append([law.condition for law in laws])
+
+    watcher = LawStoreWatcher(store, interval=0.01, on_change=on_change)
+    watcher.start()
+    try:
+        store.publish([make_law("amount > 100")])
+        deadline = time.time() + 2
+        while len(installed) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        watcher.stop()
+        store.close()
+        tracing.set_quiet(False)
+
+    assert installed[1:] == [["amount > 100"]]
+    assert watcher._thread.is_alive() is False
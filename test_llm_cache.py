@@ -0,0 +1,37 @@
+"""LLMCache bounds, in memory and on disk."""
+import sqlite3
+import time
+
+from llm_cache import LLMCache
+
+
+def disk_rows(path) -> int:
+    with sqlite3.connect(path) as db:
+        return db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+def test_lru_eviction_also_trims_the_disk_store(tmp_path):
+    path = tmp_path / "llm_cache.db"
+    cache = LLMCache(max_entries=5, path=str(path))
+    for i in range(20):
+        cache.put(f"k{i}", f"text {i}")
+    assert cache.stats()["entries"] == 5
+    assert disk_rows(path) == 5
+    assert cache.get("k0") is None
+    assert cache.get("k19") == "text 19"
+
+
+def test_reopening_drops_expired_and_excess_rows(tmp_path):
+    path = tmp_path / "llm_cache.db"
+    cache = LLMCache(max_entries=100, ttl=0.01, path=str(path))
+    for i in range(10):
+        cache.put(f"old{i}", "stale")
+    time.sleep(0.02)
+    cache.ttl = 60
+    for i in range(10):
+        cache.put(f"new{i}", "fresh")
+
+    reopened = LLMCache(max_entries=4, path=str(path))
+    assert disk_rows(path) == 4
+    assert reopened.get("old0") is None
+    assert reopened.get("new9") == "fresh"
@@ -0,0 +1,115 @@
+"""ObservableContext verdicts must always match a plain dict's."""
+import copy
+import random
+
+import pytest
+
+import tracing
+from agent_models import ActionPlan, ActionStep
+from law_compiler import compile_law
+from law_enforcer import check_plan_legality, check_step_legality, install_law_book
+from law_engine import LawViolation
+from observable_context import ObservableContext
+
+LAWS = [
+    ("refund_done == True", "refund_order"),
+    ("refund_done == 1", "cancel_order"),
+    ("inventory == 10", "refund_order"),
+    ("inventory <= 0", "refund_order"),
+    ("inventory > 5 and status != open", "cancel_order"),
+    ("status == open or refund_done == False", "verify_order"),
+]
+TOOLS = ["refund_order", "cancel_order", "verify_order", "check_inventory"]
+# Ordering laws only ever see numbers (or nothing) in their field
+VALUES = {
+    "refund_done": [0, 1, True, False, 1.0, "True", None],
+    "inventory": [0, 1, True, False, 10, 10.0, -1, None],
+    "status": ["open", "closed", 0, None],
+}
+
+
+@pytest.fixture(autouse=True)
+def law_book():
+    tracing.set_quiet(True)
+    install_law_book([
+        compile_law(f'LAW {{ when {condition} block {tool} because "{condition} / {tool}" }}')
+        for condition, tool in LAWS
+    ])
+    yield
+    install_law_book([])
+    tracing.set_quiet(False)
+
+
+def verdict(check, *args):
+    try:
+        check(*args)
+        return None
+    except LawViolation as lv:
+        return str(lv)
+
+
+def verdicts(runtime_context) -> list:
+    out = []
+    for tool in TOOLS:
+        step = ActionStep(tool, {"order_id": 1}, "")
+        plan = ActionPlan("g", [], [step], [], [])
+        out.append(verdict(check_plan_legality, plan, runtime_context))
+        out.append(verdict(check_step_legality, step, runtime_context))
+    return out
+
+
+def mutate(rng: random.Random, contexts: tuple):
+    op = rng.choice(["set", "set", "set", "update", "ior", "del", "pop", "setdefault", "clear"])
+    field = rng.choice(list(VALUES))
+    value = rng.choice(VALUES[field])
+    for ctx in contexts:
+        if op == "set":
+            ctx[field] = value
+        elif op == "update":
+            ctx.update({field: value})
+        elif op == "ior":
+            ctx |= {field: value}
+        elif op == "del" and field in ctx:
+            del ctx[field]
+        elif op == "pop":
+            ctx.pop(field, None)
+        elif op == "setdefault":
+            ctx.setdefault(field, value)
+        elif op == "clear" and rng.random() < 0.2:
+            ctx.clear()
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_plain_dict(seed):
+    rng = random.Random(seed)
+    plain, observable = {}, ObservableContext()
+    for _ in range(200):
+        # Both contexts see the same op (the op draws happen before either is touched)
+        state = rng.getstate()
+        mutate(rng, (plain,))
+        rng.setstate(state)
+        mutate(rng, (observable,))
+        assert observable == plain
+        assert verdicts(observable) == verdicts(plain)
+
+
+@pytest.mark.parametrize("before, after", [(1, True), (0, False), (10, 10.0), (True, 1)])
+def test_equal_values_of_another_type_are_changes(before, after):
+    plain, observable = {"refund_done": before, "inventory": before}, ObservableContext(refund_done=before, inventory=before)
+    assert verdicts(observable) == verdicts(plain)
+    plain["refund_done"] = observable["refund_done"] = after
+    plain["inventory"] = observable["inventory"] = after
+    assert verdicts(observable) == verdicts(plain)
+
+
+@pytest.mark.parametrize("make_copy", [copy.copy, copy.deepcopy, ObservableContext.copy])
+def test_copies_check_their_own_values(make_copy):
+    original = ObservableContext(inventory=10, refund_done=False)
+    assert verdicts(original) == verdicts(dict(original))
+
+    duplicate = make_copy(original)
+    assert type(duplicate) is ObservableContext and duplicate.verdicts is not original.verdicts
+    duplicate["inventory"] = 3
+    original["refund_done"] = True
+    assert verdicts(duplicate) == verdicts({"inventory": 3, "refund_done": False})
+    assert verdicts(original) == verdicts({"inventory": 10, "refund_done": True})
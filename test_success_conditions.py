@@ -0,0 +1,53 @@
+"""Compiled success conditions: semantics, sandboxing and bad LLM input."""
+import json
+
+import pytest
+
+from ask_bridge import llm_to_action_plan
+from success_conditions import MAX_SUCCESS_PREDICATES, _compile_text, compile_success_condition
+
+
+@pytest.mark.parametrize("condition, result, expected", [
+    ("result.get('status') == 'success'", {"status": "success"}, True),
+    ("result.get('status') == 'success'", {"status": "error"}, False),
+    ("", {"status": "success"}, True),
+    ("result['inventory'] > 0", {"inventory": 3}, True),
+    ("result['inventory'] > 0", {}, False),            # missing key: not a success, not a crash
+    ("result['success']", {"status": "success"}, False),
+    ("0 < result['n'] <= 5 and result.get('x', 1) in (1, 2)", {"n": 3}, True),
+    ("not len(result.get('items', []))", {}, True),
+    ("-result['a'] < 0", {"a": 1}, True),
+])
+def test_conditions(condition, result, expected):
+    assert compile_success_condition(condition)(result) is expected
+
+
+@pytest.mark.parametrize("condition", [
+    "__import__('os')", "result.__class__", "open('x')", "result.get(k=1)",
+    "lambda: 1", "(", "result if 1 else 2", "result.items()",
+])
+def test_unsafe_or_invalid_conditions_are_rejected(condition):
+    with pytest.raises(ValueError):
+        compile_success_condition(condition)
+
+
+@pytest.mark.parametrize("condition", [None, 1, ["result"], {"status": "success"}])
+def test_non_string_conditions_are_value_errors(condition):
+    with pytest.raises(ValueError, match="must be a string"):
+        compile_success_condition(condition)
+
+    raw = json.dumps({"goal": "g", "actions": [
+        {"tool": "check_inventory", "inputs": {"order_id": 1}, "success_condition": condition},
+    ]})
+    # ValueError is what run_agent's repair loop catches
+    with pytest.raises(ValueError):
+        llm_to_action_plan(raw)
+
+
+def test_compiled_conditions_are_bounded():
+    for i in range(MAX_SUCCESS_PREDICATES + 100):
+        compile_success_condition(f"result.get('count') == {i}")
+    assert _compile_text.cache_info().currsize == MAX_SUCCESS_PREDICATES
+    # Recently used conditions are still the same compiled predicate
+    last = f"result.get('count') == {MAX_SUCCESS_PREDICATES + 99}"
+    assert compile_success_condition(last) is compile_success_condition(last)
@@ -0,0 +1,65 @@
+"""ToolResultCache expiry, size bound and write invalidation."""
+import time
+
+import pytest
+
+from law_engine import READ_ONLY_TOOLS, TOOL_REGISTRY
+from tool_cache import ToolResultCache
+
+
+@pytest.fixture
+def lookups():
+    calls = []
+
+    def read_order(order_id):
+        calls.append(order_id)
+        return {"status": "success", "order_id": order_id}
+
+    TOOL_REGISTRY["test_read_order"] = read_order
+    READ_ONLY_TOOLS.add("test_read_order")
+    yield calls
+    del TOOL_REGISTRY["test_read_order"]
+    READ_ONLY_TOOLS.discard("test_read_order")
+
+
+def test_repeated_reads_hit_the_cache(lookups):
+    cache = ToolResultCache()
+    for _ in range(3):
+        cache.call("test_read_order", {"order_id": 1})
+    assert lookups == [1]
+
+
+def test_expired_entries_are_removed(lookups):
+    cache = ToolResultCache(ttl=0.01)
+    for i in range(10):
+        cache.call("test_read_order", {"order_id": i})
+    time.sleep(0.02)
+    for i in range(10):
+        cache.call("test_read_order", {"order_id": i})
+    assert len(lookups) == 20
+    assert cache.stats()["entries"] == 10
+    assert len(cache._by_order) == 10
+
+
+def test_size_is_capped_least_recently_used_first(lookups):
+    cache = ToolResultCache(max_entries=3)
+    for i in range(3):
+        cache.call("test_read_order", {"order_id": i})
+    cache.call("test_read_order", {"order_id": 0})   # 0 is now the most recent
+    cache.call("test_read_order", {"order_id": 3})   # so 1 goes
+    assert set(cache._by_order) == {"0", "2", "3"}
+
+    for i in range(4, 100):
+        cache.call("test_read_order", {"order_id": i})
+    assert cache.stats()["entries"] == 3
+    assert set(cache._by_order) == {"97", "98", "99"}
+
+
+def test_writes_invalidate_their_order(lookups):
+    cache = ToolResultCache()
+    cache.call("test_read_order", {"order_id": 1})
+    cache.call("test_read_order", {"order_id": 2})
+    cache.store(None, "refund_order", {"order_id": 1}, {"status": "success"})
+    cache.call("test_read_order", {"order_id": 1})
+    cache.call("test_read_order", {"order_id": 2})
+    assert lookups == [1, 2, 1]
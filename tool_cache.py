@@ -0,0 +1,129 @@
+"""
+Per-order memoization of read-only tool results.
+
+Sits between execute_plan / run_fallback and TOOL_REGISTRY. Results of
+READ_ONLY_TOOLS are cached per (tool, arguments) for `ttl` seconds, and at
+most `max_entries` are kept (least recently used go first); running any
+write tool for an order drops every cached result for that order.
+With `flights`, concurrent misses for the same read share one backend call.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from law_engine import READ_ONLY_TOOLS, TOOL_REGISTRY
+
+
+def freeze_inputs(inputs: dict) -> tuple:
+    return tuple(sorted((k, repr(v)) for k, v in inputs.items()))
+
+
+class ToolResultCache:
+    def __init__(self, ttl: float = 30.0, flights=None, max_entries: int = 10_000):
+        self.ttl = ttl
+        self.flights = flights
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # (tool, frozen inputs) -> (expires_at, result, order key), least recently used first
+        self._entries = OrderedDict()
+        self._by_order = {}  # str(order_id) -> set of entry keys
+        self._lock = threading.Lock()
+
+    def lookup(self, tool_name: str, inputs: dict):
+        """Return (key, cached result or None). key is None for write tools."""
+        if tool_name not in READ_ONLY_TOOLS:
+            return None, None
+
+        key = (tool_name, freeze_inputs(inputs))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] >= time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return key, entry[1]
+                self._drop(key)
+            self.misses += 1
+        return key, None
+
+    def store(self, key, tool_name: str, inputs: dict, result: dict, generation: int = None):
+        """
+        Remember a read result, or invalidate the order after a write.
+        A read started at `generation` is not cached if a write landed meanwhile.
+        """
+        order_id = inputs.get("order_id")
+
+        if key is None:
+            self.invalidate(order_id)
+            return
+
+        # Failures are usually transient, so never pin them
+        if not isinstance(result, dict) or result.get("status") != "success":
+            return
+
+        with self._lock:
+            if generation is not None and generation != self.invalidations:
+                return
+            order = None if order_id is None else str(order_id)
+            self._entries[key] = (time.monotonic() + self.ttl, result, order)
+            self._entries.move_to_end(key)
+            if order is not None:
+                self._by_order.setdefault(order, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, order_id=None):
+        """Drop cached results for one order (or everything if order_id is None)."""
+        with self._lock:
+            self.invalidations += 1
+            if order_id is None:
+                self._entries.clear()
+                self._by_order.clear()
+                return
+            for key in self._by_order.pop(str(order_id), ()):
+                self._entries.pop(key, None)
+
+    def _drop(self, key):
+        """Forget one entry and its order index. Caller holds the lock."""
+        _, _, order = self._entries.pop(key)
+        keys = self._by_order.get(order)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_order[order]
+
+    def flight_key(self, key) -> tuple:
+        """
+        Key for coalescing a read miss. It carries the invalidation count, so
+        a read that starts after a write never joins a flight that began
+        before the write.
+        """
+        return key + (self.invalidations,)
+
+    def call(self, tool_name: str, inputs: dict):
+        key, result = self.lookup(tool_name, inputs)
+        if result is not None:
+            return result
+
+        generation = self.invalidations
+
+        def run():
+            fresh = TOOL_REGISTRY[tool_name](**inputs)
+            self.store(key, tool_name, inputs, fresh, generation)
+            return fresh
+
+        if key is None or self.flights is None:
+            return run()
+        return self.flights.do(self.flight_key(key), run)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "entries": len(self._entries),
+        }
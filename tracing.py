@@ -0,0 +1,198 @@
+"""
+Structured span tracing and latency histograms for the agent loop.
+
+    with span("tool_call", tool="refund_order"):
+        ...
+
+Every finished span is folded into a latency histogram keyed by phase and
+labels (tool, law, ...). Spans can also be streamed to a JSONL file, and the
+histograms rendered in Prometheus text format. `set_quiet(True)` turns off
+the human-readable `log` output entirely. Per-law timing inside legality
+checks is off unless `set_law_timing(rate)` samples it.
+"""
+import contextvars
+import itertools
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Upper bounds in seconds; the last bucket is +Inf
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+QUIET = False
+ENABLED = True
+# Share of law-book checks that time every law they evaluate. Off by
+# default: timing each law costs more than evaluating it, and every law id
+# becomes its own histogram series.
+LAW_TIMING_RATE = 0.0
+
+_span_ids = itertools.count(1)
+_current_span = contextvars.ContextVar("current_span", default=None)
+_lock = threading.Lock()
+_histograms = {}  # (phase, sorted labels) -> Histogram
+_jsonl_file = None
+_gauges = {}  # name -> (help, read)
+_NO_SPAN = nullcontext()
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                break
+        else:
+            i = len(BUCKETS)
+        self.counts[i] += 1
+        self.total += seconds
+        self.count += 1
+
+
+def set_quiet(quiet: bool = True):
+    """Silence (or restore) every `log` call on the hot path."""
+    global QUIET
+    QUIET = quiet
+
+
+def set_enabled(enabled: bool = True):
+    """Turn span recording on or off; spans become no-ops when off."""
+    global ENABLED
+    ENABLED = enabled
+
+
+def set_law_timing(rate: float = 1.0):
+    """Time each law in `rate` (0..1) of legality checks, as "law_eval" samples; 0 turns it off."""
+    global LAW_TIMING_RATE
+    LAW_TIMING_RATE = min(max(rate, 0.0), 1.0)
+
+
+def log(*args, **kwargs):
+    """Drop-in for print() that respects quiet mode."""
+    if not QUIET:
+        print(*args, **kwargs)
+
+
+def open_jsonl(path: str):
+    """Stream every finished span to `path`, one JSON object per line."""
+    global _jsonl_file
+    close_jsonl()
+    _jsonl_file = open(path, "a", encoding="utf-8")
+
+
+def close_jsonl():
+    global _jsonl_file
+    if _jsonl_file is not None:
+        _jsonl_file.close()
+        _jsonl_file = None
+
+
+def observe(phase: str, seconds: float, **labels):
+    """Record one latency sample without opening a span."""
+    key = (phase, tuple(sorted(labels.items())))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(seconds)
+
+
+def span(phase: str, **labels):
+    """Time a block, nest it under the current span, and record it."""
+    if not ENABLED:
+        return _NO_SPAN
+    return _span(phase, labels)
+
+
+@contextmanager
+def _span(phase: str, labels: dict):
+    span_id = next(_span_ids)
+    parent = _current_span.get()
+    token = _current_span.set(span_id)
+    error = None
+    start = time.perf_counter()
+    try:
+        yield span_id
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        _current_span.reset(token)
+        observe(phase, elapsed, **labels)
+
+        if _jsonl_file is not None:
+            record = {
+                "span": span_id,
+                "parent": parent,
+                "phase": phase,
+                "labels": labels,
+                "start": time.time() - elapsed,
+                "duration_ms": elapsed * 1000,
+                "error": error,
+            }
+            with _lock:
+                _jsonl_file.write(json.dumps(record, default=str) + "\n")
+
+
+def snapshot() -> dict:
+    """Histogram summary per (phase, labels): count, total and mean seconds."""
+    with _lock:
+        return {
+            key: {
+                "count": h.count,
+                "total": h.total,
+                "mean": h.total / h.count if h.count else 0.0,
+            }
+            for key, h in _histograms.items()
+        }
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+def register_gauge(name: str, help_text: str, read):
+    """Export `read()` (a number) as a Prometheus gauge, e.g. a cache hit rate."""
+    _gauges[name] = (help_text, read)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: tuple, extra: tuple = ()) -> str:
+    pairs = [f'{k}="{_escape(v)}"' for k, v in labels + extra]
+    return "{" + ",".join(pairs) + "}"
+
+
+def prometheus_text(metric: str = "ask_span_duration_seconds") -> str:
+    """Render every histogram in the Prometheus text exposition format."""
+    lines = [
+        f"# HELP {metric} Latency of ASK agent loop phases.",
+        f"# TYPE {metric} histogram",
+    ]
+    with _lock:
+        for (phase, labels), h in sorted(_histograms.items()):
+            base = (("phase", phase),) + labels
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), h.counts):
+                cumulative += count
+                lines.append(
+                    f"{metric}_bucket{_format_labels(base, (('le', bound),))} {cumulative}"
+                )
+            lines.append(f"{metric}_sum{_format_labels(base)} {h.total}")
+            lines.append(f"{metric}_count{_format_labels(base)} {h.count}")
+
+    for name, (help_text, read) in sorted(_gauges.items()):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {read()}")
+    return "\n".join(lines) + "\n"